@@ -13,8 +13,7 @@ from kgx.cli.utils import get_file_types, get_type, get_transformer, is_writable
 from kgx.cli.utils import Config
 from kgx.utils import file_write
 
-from neo4j.v1 import GraphDatabase
-from neo4j.v1.types import Node, Record
+from neo4j import GraphDatabase
 
 from collections import Counter, defaultdict, OrderedDict
 from terminaltables import AsciiTable
@@ -197,7 +196,7 @@ def neo4j_node_summary(config, address, username, password, output=None):
     """
 
     with bolt_driver.session() as session:
-        records = session.run(query)
+        records = list(session.run(query))
 
     categories = set()
 
@@ -216,16 +215,16 @@ def neo4j_node_summary(config, address, username, password, output=None):
     with click.progressbar(categories, length=len(categories)) as bar:
         for category in bar:
             query = """
-            MATCH (x) WHERE x.category = {category} OR {category} IN x.category
+            MATCH (x) WHERE x.category = $category OR $category IN x.category
             RETURN DISTINCT
-                {category} AS category,
+                $category AS category,
                 split(x.id, ':')[0] AS prefix,
                 COUNT(*) AS frequency
             ORDER BY category, frequency DESC;
             """
 
             with bolt_driver.session() as session:
-                records = session.run(query, category=category)
+                records = list(session.run(query, category=category))
 
             for record in records:
                 rows.append({
@@ -260,7 +259,7 @@ def neo4j_edge_summary(config, address, username, password, output=None):
     """
 
     with bolt_driver.session() as session:
-        records = session.run(query)
+        records = list(session.run(query))
 
     categories = set()
 
@@ -280,11 +279,11 @@ def neo4j_edge_summary(config, address, username, password, output=None):
     query = """
     MATCH (n)-[r]-(m)
     WHERE
-        (n.category = {category1} OR {category1} IN n.category) AND
-        (m.category = {category2} OR {category2} IN m.category)
+        (n.category = $category1 OR $category1 IN n.category) AND
+        (m.category = $category2 OR $category2 IN m.category)
     RETURN DISTINCT
-        {category1} AS subject_category,
-        {category2} AS object_category,
+        $category1 AS subject_category,
+        $category2 AS object_category,
         type(r) AS edge_type,
         split(n.id, ':')[0] AS subject_prefix,
         split(m.id, ':')[0] AS object_prefix,
@@ -341,9 +340,6 @@ def validate(config, path, output, output_dir):
         if output_dir is not None:
             append_errors_to_files(output_dir, validator.errors, time)
 
-from neo4jrestclient.client import GraphDatabase as http_gdb
-import networkx as nx
-
 @cli.command(name='neo4j-download')
 # @click.option('-d', '--directed', is_flag=True, help='Enforces subject -> object edge direction')
 # @click.option('-lb', '--labels', type=(click.Choice(FilterLocation.values()), str), multiple=True, help='For filtering on labels. CHOICE: {}'.format(', '.join(FilterLocation.values())))
@@ -356,12 +352,14 @@ import networkx as nx
 @click.option('--edge-type', type=str)
 @click.option('--stop-after', type=int, help='Once this many edges are downloaded the application will finish')
 @click.option('--page-size', type=int, default=10_000, help='The size of pages to download for each batch')
+@click.option('--workers', type=int, default=1, help='The number of partitions to download concurrently')
+@click.option('--resume', is_flag=True, help='Resumes an interrupted download from its checkpoint, which is kept next to the output')
 # @click.option('--start', type=int, default=0)
 # @click.option('--end', type=int)
 @click.option('-o', '--output', type=click.Path(exists=False), required=True)
 @click.option('--output-type', type=click.Choice(get_file_types()))
 @pass_config
-def neo4j_download(config, page_size, stop_after, subject_label, object_label, edge_type, address, username, password, output, output_type):
+def neo4j_download(config, page_size, workers, resume, stop_after, subject_label, object_label, edge_type, address, username, password, output, output_type):
     if not is_writable(output):
         try:
             with open(output, 'w+') as f:
@@ -370,70 +368,27 @@ def neo4j_download(config, page_size, stop_after, subject_label, object_label, e
             error(f'Cannot write to {output}')
 
     output_transformer = get_transformer(get_type(output))()
-    G = output_transformer.graph
-
-    driver = http_gdb(address, username=username, password=password)
 
-    subject_label = ':`{}`'.format(subject_label) if isinstance(subject_label, str) else ''
-    object_label = ':`{}`'.format(object_label) if isinstance(object_label, str) else ''
-    edge_type = ':`{}`'.format(edge_type) if isinstance(edge_type, str) else ''
-
-    match = 'match (n{})-[e{}]->(m{})'.format(subject_label, edge_type, object_label)
+    neo_transformer = make_neo4j_transformer(address, username, password)
+    neo_transformer.graph = output_transformer.graph
 
-    results = driver.query('{} return count(*)'.format(match))
+    if subject_label is not None:
+        neo_transformer.set_filter('subject_category', subject_label)
+    if object_label is not None:
+        neo_transformer.set_filter('object_category', object_label)
+    if edge_type is not None:
+        neo_transformer.set_filter('edge_label', edge_type)
 
-    click.echo('Using cyper query: {} return n, e, m'.format(match))
+    click.echo('Using cypher query: {}'.format(neo_transformer.get_edge_query()))
 
-    for a, in results:
-        size = a
-        break
+    checkpoint = '{}.checkpoint.jsonl'.format(output)
+    neo_transformer.load(end=stop_after, page_size=page_size, workers=workers, checkpoint=checkpoint, resume=resume)
+    neo_transformer.close()
 
-    if size == 0:
+    if output_transformer.graph.number_of_edges() == 0:
         click.echo('No data available')
         quit()
 
-    page_size = 1_000
-
-    skip_flag = False
-
-    with click.progressbar(list(range(0, size, page_size)), label='Downloading {} many edges'.format(size)) as bar:
-        for i in bar:
-            q = '{} return n, e, m skip {} limit {}'.format(match, i, page_size)
-            results = driver.query(q)
-
-            for n, e, m in results:
-                subject_attr = n['data']
-                object_attr = m['data']
-                edge_attr = e['data']
-
-                if 'id' not in subject_attr or 'id' not in object_attr:
-                    if not skip_flag:
-                        click.echo('Skipping records that have no id attribute')
-                        skip_flag = True
-                    continue
-
-                s = subject_attr['id']
-                o = object_attr['id']
-
-                if 'edge_label' not in edge_attr:
-                    edge_attr['edge_label'] = e['metadata']['type']
-
-                if 'category' not in subject_attr:
-                    subject_attr['category'] = n['metadata']['labels']
-
-                if 'category' not in object_attr:
-                    object_attr['category'] = m['metadata']['labels']
-
-                if s not in G:
-                    G.add_node(s, **subject_attr)
-                if o not in G:
-                    G.add_node(o, **object_attr)
-
-                G.add_edge(s, o, key=edge_attr['edge_label'], **edge_attr)
-
-            if stop_after is not None and G.number_of_edges() > stop_after:
-                break
-
     output_transformer.save(output)
 
 
@@ -478,19 +433,26 @@ def make_neo4j_transformer(address, username, password):
 @cli.command(name='neo4j-upload')
 @click.option('--input-type', type=click.Choice(get_file_types()))
 @click.option('--use-unwind', is_flag=True, help='Loads using UNWIND, which is quicker')
+@click.option('--node-batch-size', type=int, default=10_000, help='The number of nodes to write per transaction, when using UNWIND')
+@click.option('--edge-batch-size', type=int, default=1_000, help='The number of edges to write per transaction, when using UNWIND')
+@click.option('--workers', type=int, default=1, help='The number of concurrent writers, when using UNWIND')
+@click.option('--fresh', is_flag=True, help='Creates, rather than merges, nodes and edges when using UNWIND. Only for loading into an empty database')
+@click.option('--edge-ids', is_flag=True, help='Gives edges without an id a stable identifier, hashed from their subject, edge label, object and qualifiers')
 @click.option('-a', '--address', type=str, required=True)
 @click.option('-u', '--username', type=str)
 @click.option('-p', '--password', type=str)
 @click.argument('inputs', nargs=-1, type=click.Path(exists=False), required=True)
 @pass_config
-def neo4j_upload(config, address, username, password, inputs, input_type, use_unwind):
+def neo4j_upload(config, address, username, password, inputs, input_type, use_unwind, node_batch_size, edge_batch_size, workers, fresh, edge_ids):
     t = load_transformer(inputs, input_type)
+    if edge_ids:
+        t.set_edge_ids()
 
     neo_transformer = make_neo4j_transformer(address, username, password)
     neo_transformer.graph = t.graph
 
     if use_unwind:
-        neo_transformer.save_with_unwind()
+        neo_transformer.save_with_unwind(node_batch_size=node_batch_size, edge_batch_size=edge_batch_size, workers=workers, fresh=fresh)
     else:
         neo_transformer.save()
 
@@ -499,10 +461,11 @@ def neo4j_upload(config, address, username, password, inputs, input_type, use_un
 @click.option('--output-type', type=click.Choice(get_file_types()))
 @click.option('--mapping', type=str)
 @click.option('--preserve', is_flag=True)
+@click.option('--edge-ids', is_flag=True, help='Gives edges without an id a stable identifier, hashed from their subject, edge label, object and qualifiers')
 @click.argument('inputs', nargs=-1, type=click.Path(exists=False), required=True)
 @click.option('-o', '--output', type=click.Path(exists=False), required=True)
 @pass_config
-def dump(config, inputs, output, input_type, output_type, mapping, preserve):
+def dump(config, inputs, output, input_type, output_type, mapping, preserve, edge_ids):
     """\b
     Transforms a knowledge graph from one representation to another
     """
@@ -516,6 +479,8 @@ def dump(config, inputs, output, input_type, output_type, mapping, preserve):
             d = pickle.load(f)
             click.echo('Performing mapping: ' + mapping)
             map_graph(G=t.graph, mapping=d, preserve=preserve)
+    if edge_ids:
+        t.set_edge_ids()
     transform_and_save(t, output, output_type)
 
 @cli.command(name='load-mapping')
@@ -0,0 +1,126 @@
+import time, argparse
+import networkx as nx
+from kgx import NeoTransformer
+from neo4jrestclient.client import GraphDatabase as http_gdb
+
+"""
+A script that benchmarks uploading to, and downloading from, a Neo4j database
+with NeoTransformer over Bolt, against the equivalent queries over HTTP.
+Uploads over Bolt are timed both with MERGE, and with the fresh load mode
+that creates nodes and edges, and only builds constraints afterwards.
+
+All nodes are created with the label given by --label, and are removed
+before each run. Do not point this script at a database that holds nodes
+with that label.
+"""
+
+parser = argparse.ArgumentParser(description='Benchmark Bolt against HTTP for Neo4j uploads and downloads')
+parser.add_argument('--host', help='host to connect with Neo4j', default='localhost')
+parser.add_argument('--bolt_port', help='Bolt port to connect with Neo4j', default='7687')
+parser.add_argument('--http_port', help='HTTP port to connect with Neo4j', default='7474')
+parser.add_argument('--username', help='username (default: neo4j)', default='neo4j')
+parser.add_argument('--password', help='password (default: demo)', default='demo')
+parser.add_argument('--nodes', help='number of nodes (default: 10000)', type=int, default=10_000)
+parser.add_argument('--edges', help='number of edges (default: 50000)', type=int, default=50_000)
+parser.add_argument('--label', help='label for benchmark nodes (default: kgx_benchmark)', default='kgx_benchmark')
+args = parser.parse_args()
+
+
+def make_graph(nodes: int, edges: int, label: str) -> nx.MultiDiGraph:
+    graph = nx.gnm_random_graph(nodes, edges, seed=0, directed=True)
+    g = nx.MultiDiGraph()
+    for n in graph.nodes():
+        g.add_node(f'BENCH:{n}', id=f'BENCH:{n}', name=f'node {n}', category=[label])
+    for s, o in graph.edges():
+        g.add_edge(f'BENCH:{s}', f'BENCH:{o}', subject=f'BENCH:{s}', object=f'BENCH:{o}', edge_label='related_to', relation='RO:0000000')
+    return g
+
+
+def clear(http_driver) -> None:
+    http_driver.query(f"MATCH (n:`{args.label}`) DETACH DELETE n")
+
+
+def drop_constraints(http_driver) -> None:
+    for label in [NeoTransformer.DEFAULT_NODE_LABEL, args.label]:
+        try:
+            # constraints are named as by NeoTransformer.create_constraints
+            http_driver.query(f"DROP CONSTRAINT `{label}_id` IF EXISTS")
+        except Exception:
+            pass
+
+
+def http_upload(http_driver, transformer: NeoTransformer) -> None:
+    # the queries and batches used by NeoTransformer.save_with_unwind before it moved to Bolt
+    nodes_by_category = {}
+    for n, data in transformer.graph.nodes(data=True):
+        nodes_by_category.setdefault(':'.join(data['category']), []).append(data)
+    for category, nodes in nodes_by_category.items():
+        query = f"""
+        UNWIND $nodes AS node
+        MERGE (n:`named_thing` {{id: node.id}})
+        ON CREATE SET n += node, n:{category}
+        """
+        http_driver.query(query, params={'nodes': nodes})
+    edges = [data for s, o, data in transformer.graph.edges(data=True)]
+    query = """
+    UNWIND $edges AS edge
+    MATCH (s:`named_thing` {id: edge.subject}), (o:`named_thing` {id: edge.object})
+    MERGE (s)-[r:`related_to`]->(o)
+    SET r += edge
+    """
+    for i in range(0, len(edges), 1000):
+        http_driver.query(query, params={'relationship': 'related_to', 'edges': edges[i:i + 1000]})
+
+
+def http_download(http_driver, page_size: int = 10_000) -> int:
+    # the SKIP/LIMIT pages used by NeoTransformer.load before it moved to Bolt
+    count = 0
+    for skip in range(0, args.edges, page_size):
+        results = http_driver.query(f"MATCH (s:`{args.label}`)-[p]->(o) RETURN s, p, o SKIP {skip} LIMIT {page_size}")
+        count += len(list(results))
+    return count
+
+
+graph = make_graph(args.nodes, args.edges, args.label)
+http_driver = http_gdb(f'http://{args.host}:{args.http_port}', username=args.username, password=args.password)
+bolt = NeoTransformer(graph, args.host, args.bolt_port, args.username, args.password)
+
+timings = {}
+clear(http_driver)
+bolt.create_constraints({args.label})
+start = time.time()
+http_upload(http_driver, bolt)
+timings['HTTP upload'] = time.time() - start
+
+start = time.time()
+http_download(http_driver)
+timings['HTTP download'] = time.time() - start
+
+clear(http_driver)
+start = time.time()
+bolt.save_with_unwind()
+timings['Bolt upload'] = time.time() - start
+
+download = NeoTransformer(None, args.host, args.bolt_port, args.username, args.password)
+download.set_filter('subject_category', args.label)
+start = time.time()
+download.load()
+timings['Bolt download'] = time.time() - start
+
+# the fresh load mode expects no nodes, and builds its own constraints
+clear(http_driver)
+drop_constraints(http_driver)
+start = time.time()
+bolt.save_with_unwind(fresh=True)
+timings['Bolt fresh upload'] = time.time() - start
+
+clear(http_driver)
+bolt.close()
+download.close()
+
+print(f'{args.nodes} nodes, {args.edges} edges')
+for name, seconds in timings.items():
+    print(f'{name:>20}: {seconds:8.2f} s')
+print(f"{'upload speedup':>20}: {timings['HTTP upload'] / timings['Bolt upload']:8.2f}x")
+print(f"{'fresh upload speedup':>20}: {timings['Bolt upload'] / timings['Bolt fresh upload']:8.2f}x")
+print(f"{'download speedup':>20}: {timings['HTTP download'] / timings['Bolt download']:8.2f}x")
@@ -0,0 +1,46 @@
+import time, argparse, os, resource
+import networkx as nx
+from kgx import ObanRdfTransformer
+
+"""
+A script that benchmarks saving a graph as OBAN-style RDF with
+ObanRdfTransformer, reporting the time taken, the rate at which edges are
+written, and the peak memory of the process.
+"""
+
+parser = argparse.ArgumentParser(description='Benchmark saving a graph as OBAN-style RDF')
+parser.add_argument('--nodes', help='number of nodes (default: 100000)', type=int, default=100_000)
+parser.add_argument('--edges', help='number of edges (default: 1000000)', type=int, default=1_000_000)
+parser.add_argument('--output', help='output file (default: benchmark.ttl)', default='benchmark.ttl')
+parser.add_argument('--output_format', help='output format (default: turtle)', default='turtle')
+args = parser.parse_args()
+
+
+def make_graph(nodes: int, edges: int) -> nx.MultiDiGraph:
+    graph = nx.gnm_random_graph(nodes, edges, seed=0, directed=True)
+    g = nx.MultiDiGraph()
+    for n in graph.nodes():
+        g.add_node(f'HGNC:{n}', id=f'HGNC:{n}', name=f'gene {n}', category=['gene'], provided_by=['benchmark'])
+    for i, (s, o) in enumerate(graph.edges()):
+        g.add_edge(
+            f'HGNC:{s}', f'HGNC:{o}', id=f'urn:uuid:00000000-0000-0000-0000-{i:012d}', subject=f'HGNC:{s}', object=f'HGNC:{o}',
+            edge_label='interacts_with', relation='RO:0002434', provided_by=['benchmark'], publications=[f'PMID:{i}']
+        )
+    return g
+
+
+start = time.time()
+graph = make_graph(args.nodes, args.edges)
+print(f'{args.nodes} nodes, {args.edges} edges, built in {time.time() - start:.2f} s')
+
+t = ObanRdfTransformer(graph)
+start = time.time()
+t.save(args.output, output_format=args.output_format)
+seconds = time.time() - start
+
+# ru_maxrss is in kilobytes on Linux
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(f"{'save':>12}: {seconds:8.2f} s")
+print(f"{'edges/s':>12}: {args.edges / seconds:8.0f}")
+print(f"{'file size':>12}: {os.path.getsize(args.output) / (1 << 20):8.1f} MiB")
+print(f"{'peak memory':>12}: {peak:8.1f} MiB")
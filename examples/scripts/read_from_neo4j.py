@@ -15,13 +15,13 @@ usage: read_from_neo4j.py --filter subject_category=molecular_entity
 parser = argparse.ArgumentParser(description='Read graph (or subgraph) from Neo4j')
 parser.add_argument('--filter', action='append', help='A filter that can be applied to node and/or edges')
 parser.add_argument('--host', help='host to connect with Neo4j', default='localhost')
-parser.add_argument('--http_port', help='HTTP port to connect with Neo4j', default='7474')
+parser.add_argument('--bolt_port', help='Bolt port to connect with Neo4j', default='7687')
 parser.add_argument('--username', help='username (default: neo4j)', default='neo4j')
 parser.add_argument('--password', help='password (default: demo)', default='demo')
 args = parser.parse_args()
 
 # Initialize NeoTransformer
-n = NeoTransformer(None, args.host, { 'http': args.http_port}, args.username, args.password)
+n = NeoTransformer(None, args.host, args.bolt_port, args.username, args.password)
 
 if args.filter is not None:
     if len(args.filter) > 0:
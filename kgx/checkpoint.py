@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import time
+from typing import Any, Iterable, Optional, Tuple
+
+import networkx as nx
+
+from kgx.utils import make_path
+
+
+class Checkpoint(object):
+    """
+    A checkpoint for a long-running download into a networkx.MultiDiGraph.
+
+    The checkpoint is a JSON Lines file. Its first line identifies the
+    download by a signature. Every following line is a segment, holding the
+    nodes and edges that were added or changed since the previous segment,
+    along with a cursor that tells the transformer where to pick up again.
+    Segments are appended at most every `interval` seconds, and whenever
+    the checkpoint is closed.
+
+    A checkpoint that was written for a different signature, or that is not
+    opened with `resume`, is discarded rather than resumed from.
+    """
+
+    def __init__(self, path: str, graph: nx.MultiDiGraph, signature: str, resume: bool = True, interval: float = 60):
+        self.path = path
+        self.graph = graph
+        self.signature = signature
+        self.resume = resume
+        self.interval = interval
+        self.cursor = None
+        self.nodes = set()
+        self.edges = set()
+        self.last_flush = time.time()
+        self.file = None
+
+    def restore(self) -> Optional[Any]:
+        """
+        Load all segments of the checkpoint into the graph, and open the
+        checkpoint for writing.
+
+        Returns
+        -------
+        Optional[Any]
+            The cursor of the last complete segment, or None if there is nothing to resume from
+
+        """
+        cursor = None
+        if self.resume and os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                header = self._read_line(f.readline())
+                if header is None or header.get('signature') != self.signature:
+                    logging.warning("Checkpoint {} is for a different download; starting over".format(self.path))
+                else:
+                    segments = 0
+                    for line in f:
+                        segment = self._read_line(line)
+                        if segment is None:
+                            # an incomplete segment, from a run that was interrupted while writing
+                            break
+                        for n, attributes in segment['nodes']:
+                            self.graph.add_node(n, **attributes)
+                        for s, o, key, attributes in segment['edges']:
+                            self.graph.add_edge(s, o, key=key, **attributes)
+                        cursor = segment['cursor']
+                        segments += 1
+                    logging.info("Resuming from {} segments in checkpoint {}".format(segments, self.path))
+        self.cursor = cursor
+        if cursor is None:
+            make_path(self.path)
+            self.file = open(self.path, 'w')
+            self.file.write(json.dumps({'signature': self.signature}) + '\n')
+            self.file.flush()
+        else:
+            # rewrite the checkpoint without any incomplete segment
+            self._compact()
+        return cursor
+
+    def update(self, cursor: Any, nodes: Iterable[str] = (), edges: Iterable[Tuple[str, str, str]] = ()) -> None:
+        """
+        Record that a page has been added to the graph.
+
+        Parameters
+        ----------
+        cursor: Any
+            A JSON serializable cursor, from which the download can resume after this page
+        nodes: Iterable[str]
+            The nodes that were added or changed
+        edges: Iterable[Tuple[str, str, str]]
+            The edges that were added or changed, as subject, object and key
+
+        """
+        self.cursor = cursor
+        self.nodes.update(nodes)
+        self.edges.update(edges)
+        if time.time() - self.last_flush >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Append a segment with all nodes and edges recorded since the previous segment.
+        """
+        if self.file is None or (not self.nodes and not self.edges):
+            return
+        for s, o, key in self.edges:
+            self.nodes.update((s, o))
+        segment = {
+            'cursor': self.cursor,
+            'nodes': [[n, self.graph.nodes[n]] for n in self.nodes if n in self.graph],
+            'edges': [[s, o, key, self.graph.edges[s, o, key]] for s, o, key in self.edges if self.graph.has_edge(s, o, key)],
+        }
+        self.file.write(json.dumps(segment, default=str) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.nodes.clear()
+        self.edges.clear()
+        self.last_flush = time.time()
+
+    def close(self) -> None:
+        """
+        Write any pending segment, and close the checkpoint.
+        """
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def complete(self) -> None:
+        """
+        Close the checkpoint, and remove it since the download has finished.
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _compact(self) -> None:
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps({'signature': self.signature}) + '\n')
+            segment = {
+                'cursor': self.cursor,
+                'nodes': [[n, data] for n, data in self.graph.nodes(data=True)],
+                'edges': [[s, o, key, data] for s, o, key, data in self.graph.edges(keys=True, data=True)],
+            }
+            f.write(json.dumps(segment, default=str) + '\n')
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, 'a')
+
+    @staticmethod
+    def _read_line(line: str) -> Optional[dict]:
+        if not line.endswith('\n'):
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
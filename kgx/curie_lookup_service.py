@@ -1,7 +1,15 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional
+
+import click
 import networkx as nx
-import rdflib
 from kgx import get_config
-from kgx.utils.kgx_utils import make_curie, generate_edge_key
+from kgx.ontology_index import OntologyIndex, get_prefix
+from kgx.ontology_registry import get_ontology_registry
+from kgx.utils.kgx_utils import generate_edge_key
 
 CURIE_MAP = {
     'BFO:0000054': 'realized_in',
@@ -9,44 +17,216 @@ CURIE_MAP = {
 }
 
 
+def get_index_directory() -> str:
+    """
+    Get the directory where ontology indexes are stored, as set by
+    `cache.ontology.directory` in the config.
+
+    Returns
+    -------
+    str
+        Path to the directory
+
+    """
+    config = get_config()
+    directory = config.get('cache', {}).get('ontology', {}).get('directory')
+    if not directory:
+        directory = os.path.join(click.get_app_dir('kgx'), 'ontologies')
+    return directory
+
+
 class CurieLookupService(object):
     """
     A service to lookup label for a given CURIE.
+
+    Each ontology is compiled, once per version, into an OntologyIndex on disk,
+    which is opened at startup instead of parsing the ontology on every run.
+    Indexes are opened once per process, and shared between instances.
+
+    Ontologies are keyed by the CURIE prefix they define, and are only loaded
+    once a CURIE with that prefix is looked up. Loading happens in a background
+    thread, such that callers can request ontologies ahead of time via `prefetch`.
+    CURIEs with a prefix that is not configured are looked up in all ontologies,
+    in the order of the config.
     """
     config = get_config()
-    ontologies = config['ontologies']
-    ontology_graph = None
+    ontologies = config.get('ontologies', {})
 
-    def __init__(self, curie_map: dict = None):
+    def __init__(self, curie_map: dict = None, ontologies: Dict[str, str] = None, directory: str = None):
         if curie_map:
             self.curie_map = CURIE_MAP
             self.curie_map.update(curie_map)
         else:
             self.curie_map = CURIE_MAP
-        self.ontology_graph = nx.MultiDiGraph()
-        self.load_ontologies()
-
-    def load_ontologies(self):
-        """
-        Load all required ontologies.
-        """
-        for ontology in self.ontologies.values():
-            rdfgraph = rdflib.Graph()
-            input_format = rdflib.util.guess_format(ontology)
-            rdfgraph.parse(ontology, format=input_format)
-            triples = rdfgraph.triples((None, rdflib.RDFS.subClassOf, None))
-            for s,p,o in triples:
-                subject_curie = make_curie(s)
-                object_curie = make_curie(o)
-                self.ontology_graph.add_node(subject_curie)
-                self.ontology_graph.add_node(object_curie)
-                key = generate_edge_key(subject_curie, 'subclass_of', object_curie)
-                self.ontology_graph.add_edge(subject_curie, object_curie, key, **{'edge_label': 'subclass_of', 'relation': 'rdfs:subClassOf'})
-
-            triples = rdfgraph.triples((None, rdflib.RDFS.label, None))
-            for s, p, o in triples:
-                key = make_curie(s)
-                value = o.value
-                value = value.replace(' ', '_')
-                self.curie_map[key] = value
-                self.ontology_graph.add_node(key, name=value)
+        if ontologies is not None:
+            self.ontologies = ontologies
+        self.directory = directory if directory else get_index_directory()
+        self.prefix_map = {k.upper(): k for k in self.ontologies.keys()}
+        self.indexes = {}
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ontology-loader')
+        self.pid = os.getpid()
+        self._ontology_graph = None
+        from kgx.utils.graph_utils import get_category_cache
+        signature = '|'.join('{}={}'.format(k, v) for k, v in sorted(self.ontologies.items()))
+        get_category_cache().set_signature(self, signature)
+
+    def load_ontologies(self) -> None:
+        """
+        Load indexes for all required ontologies, building them where needed.
+        """
+        for name in self.ontologies.keys():
+            self.get_ontology(name)
+
+    def prefetch(self, prefixes: Iterable[str]) -> None:
+        """
+        Start loading the ontologies for a set of CURIE prefixes in the background.
+
+        Parameters
+        ----------
+        prefixes: Iterable[str]
+            CURIE prefixes
+
+        """
+        for prefix in prefixes:
+            name = self.prefix_map.get(prefix.upper()) if prefix else None
+            if name is not None:
+                self._submit(name)
+
+    def wait(self) -> None:
+        """
+        Wait for all ontologies that are being loaded in the background.
+
+        This should be called before forking worker processes, which do not
+        inherit the background thread. Ontologies that failed to load only
+        raise an error once they are looked up.
+        """
+        with self.lock:
+            futures = list(self.futures.values())
+        wait(futures)
+
+    def get_ontology(self, name: str) -> OntologyIndex:
+        """
+        Get the index for an ontology, waiting for it to be loaded.
+
+        Parameters
+        ----------
+        name: str
+            The name of the ontology, as in the config
+
+        Returns
+        -------
+        OntologyIndex
+            The index for the ontology
+
+        """
+        if name not in self.indexes:
+            self.indexes[name] = self._submit(name).result()
+        return self.indexes[name]
+
+    def get_indexes(self, curie: str) -> List[OntologyIndex]:
+        """
+        Get the indexes that may define a CURIE.
+
+        This is the ontology for the prefix of the CURIE, if one is configured.
+        Otherwise, all ontologies that use the prefix are returned, in the order
+        of the config, which requires all ontologies to be loaded.
+
+        Parameters
+        ----------
+        curie: str
+            A CURIE
+
+        Returns
+        -------
+        List[OntologyIndex]
+            A list of indexes
+
+        """
+        prefix = get_prefix(curie)
+        if prefix is None:
+            return []
+        name = self.prefix_map.get(prefix.upper())
+        if name is not None:
+            return [self.get_ontology(name)]
+        indexes = [self.get_ontology(x) for x in self.ontologies.keys()]
+        return [x for x in indexes if prefix in x.prefixes]
+
+    def get_label(self, curie: str) -> Optional[str]:
+        """
+        Get the label for a CURIE.
+
+        Parameters
+        ----------
+        curie: str
+            A CURIE
+
+        Returns
+        -------
+        Optional[str]
+            The label, or None if the CURIE is unknown
+
+        """
+        if curie in self.curie_map:
+            return self.curie_map[curie]
+        for index in self.get_indexes(curie):
+            label = index.get_label(curie)
+            if label is not None:
+                return label
+        return None
+
+    def get_ancestors(self, curie: str) -> List[str]:
+        """
+        Get all superclasses of a CURIE, from the first ontology that defines
+        superclasses for the CURIE.
+
+        Parameters
+        ----------
+        curie: str
+            A CURIE
+
+        Returns
+        -------
+        List[str]
+            A list of ancestors
+
+        """
+        for index in self.get_indexes(curie):
+            ancestors = index.get_ancestors(curie)
+            if ancestors:
+                return ancestors
+        return []
+
+    def _submit(self, name: str) -> Future:
+        with self.lock:
+            if os.getpid() != self.pid:
+                # a forked process does not inherit the thread of the executor
+                self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ontology-loader')
+                self.futures = {k: v for k, v in self.futures.items() if v.done()}
+                self.pid = os.getpid()
+            if name not in self.futures:
+                logging.debug("Loading ontology {}".format(name))
+                # indexes are shared with other instances, through the ontology registry
+                self.futures[name] = self.executor.submit(get_ontology_registry().get_index, self.ontologies[name], self.directory, name)
+            return self.futures[name]
+
+    @property
+    def ontology_graph(self) -> nx.MultiDiGraph:
+        """
+        The subClassOf hierarchy of all ontologies as a networkx.MultiDiGraph.
+
+        The graph is only materialized from the indexes on first access,
+        which requires all ontologies to be loaded.
+        """
+        if self._ontology_graph is None:
+            self.load_ontologies()
+            graph = nx.MultiDiGraph()
+            for index in self.indexes.values():
+                for subject_curie, object_curie in index.edges():
+                    key = generate_edge_key(subject_curie, 'subclass_of', object_curie)
+                    graph.add_edge(subject_curie, object_curie, key, **{'edge_label': 'subclass_of', 'relation': 'rdfs:subClassOf'})
+                for key, value in index.labels():
+                    graph.add_node(key, name=value)
+            self._ontology_graph = graph
+        return self._ontology_graph
@@ -1,7 +1,7 @@
 import click
 import logging
 import pandas
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Tuple
 
 import networkx as nx
 from prefixcommons.curie_util import expand_uri
@@ -93,6 +93,12 @@ def relabel_nodes(graph: nx.MultiDiGraph, mapping: Dict) -> nx.MultiDiGraph:
     Performs the relabelling of nodes, and ensures that node attributes are
     copied over appropriately.
 
+    The relabelling is done in place, via `relabel_nodes_inplace`, and the
+    same graph instance is returned. Callers that need the original graph
+    must copy it first. The mapping is applied all at once, so chained
+    (a -> b, b -> c) and swapped (a <-> b) mappings are relabelled as by
+    networkx.relabel_nodes.
+
     Example:
         graph = nx.Graph()
 
@@ -113,19 +119,105 @@ def relabel_nodes(graph: nx.MultiDiGraph, mapping: Dict) -> nx.MultiDiGraph:
         b {'synonym': ['B', 'C']}
         d {'synonym': ['D']}
 
+    """
+    relabel_nodes_inplace(graph, mapping)
+    return graph
+
+
+def relabel_nodes_inplace(graph: nx.MultiDiGraph, mapping: Dict) -> Tuple[int, int]:
+    """
+    Relabel nodes of a graph in place, touching only the nodes in `mapping`
+    and their incident edges.
+
+    When the target node already exists, the attributes of the source node
+    are merged into it using `graceful_update`. The same applies to an edge
+    that collides with an existing edge (same subject, object and key).
+
+    Renames are applied one at a time, which is only correct when no node is
+    both renamed and the target of a rename. Otherwise, as in chained
+    (a -> b, b -> c) or swapped (a <-> b) mappings, the graph is relabelled
+    all at once into a copy, whose contents then replace those of `graph`.
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        A graph
+    mapping: dict
+        Dictionary containing node identifier mappings
+
+    Returns
+    -------
+    Tuple[int, int]
+        The number of nodes and the number of edges that were rewritten
+
     """
     logging.info("Relabeling {} nodes".format(len(mapping)))
-    g = nx.relabel_nodes(graph, mapping, copy=True)
-    logging.info("Merging node attributes")
-    with click.progressbar(graph.nodes(), label='Progress') as bar:
-        for n in bar:
-            if n in mapping:
-                graceful_update(g.nodes[mapping[n]], graph.nodes[n])
-            elif n in g:
-                graceful_update(g.nodes[n], graph.nodes[n])
+    multigraph = graph.is_multigraph()
+    edge_kwargs = {'data': True, 'keys': True} if multigraph else {'data': True}
+    node_count = 0
+    edge_count = 0
+    renamed = {old for old, new in mapping.items() if old != new and old in graph}
+    if not renamed.isdisjoint(mapping[old] for old in renamed):
+        return _relabel_nodes_copy(graph, {old: mapping[old] for old in renamed})
+    with click.progressbar(list(mapping.items()), label='Progress') as bar:
+        for old, new in bar:
+            if old == new or old not in graph:
+                continue
+            if new in graph:
+                graceful_update(graph.nodes[new], graph.nodes[old])
             else:
-                pass
-    return g
+                graph.add_node(new, **graph.nodes[old])
+
+            if graph.is_directed():
+                incident = list(graph.out_edges(old, **edge_kwargs))
+                incident += [x for x in graph.in_edges(old, **edge_kwargs) if x[0] != old]
+            else:
+                incident = list(graph.edges(old, **edge_kwargs))
+
+            for edge in incident:
+                u = new if edge[0] == old else edge[0]
+                v = new if edge[1] == old else edge[1]
+                data = edge[-1]
+                if multigraph:
+                    key = edge[2]
+                    existing = graph.get_edge_data(u, v, key=key)
+                else:
+                    existing = graph.get_edge_data(u, v)
+                if existing is not None:
+                    graceful_update(existing, data)
+                elif multigraph:
+                    graph.add_edge(u, v, key, **data)
+                else:
+                    graph.add_edge(u, v, **data)
+                edge_count += 1
+
+            graph.remove_node(old)
+            node_count += 1
+    logging.info("Rewrote {} nodes and {} edges".format(node_count, edge_count))
+    return node_count, edge_count
+
+
+def _relabel_nodes_copy(graph: nx.MultiDiGraph, mapping: Dict) -> Tuple[int, int]:
+    """
+    Relabel all nodes in `mapping` at once into a copy of `graph`, merging
+    node attributes with `graceful_update`, and replace the contents of
+    `graph` with those of the copy.
+    """
+    kwargs = {'keys': True} if graph.is_multigraph() else {}
+    if graph.is_directed():
+        incident = set(graph.out_edges(mapping, **kwargs)) | set(graph.in_edges(mapping, **kwargs))
+    else:
+        incident = set(graph.edges(mapping, **kwargs))
+    node_count, edge_count = len(mapping), len(incident)
+    g = nx.relabel_nodes(graph, mapping, copy=True)
+    for n in mapping:
+        graceful_update(g.nodes[mapping[n]], graph.nodes[n])
+    graph.clear()
+    graph.graph.update(g.graph)
+    graph.add_nodes_from(g.nodes(data=True))
+    graph.add_edges_from(g.edges(data=True, **kwargs))
+    logging.info("Rewrote {} nodes and {} edges".format(node_count, edge_count))
+    return node_count, edge_count
 
 
 def listify(o: object) -> Union[list, set, tuple]:
@@ -0,0 +1,277 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from typing import List, Optional, Iterator, Tuple
+
+import networkx as nx
+import rdflib
+import requests
+
+from kgx.utils import make_path
+from kgx.utils.kgx_utils import make_curie, generate_edge_key
+
+INDEX_FORMAT_VERSION = '1'
+ANCESTOR_DELIMITER = '\t'
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE labels (curie TEXT PRIMARY KEY, label TEXT);
+CREATE TABLE parents (curie TEXT, parent TEXT, position INTEGER);
+CREATE TABLE ancestors (curie TEXT PRIMARY KEY, ancestors TEXT);
+CREATE TABLE prefixes (prefix TEXT PRIMARY KEY);
+CREATE INDEX parents_curie ON parents (curie);
+"""
+
+
+def source_checksum(source: str) -> Optional[str]:
+    """
+    Get a checksum for an ontology source.
+
+    For a local file this is the SHA-256 of its contents. For a remote source
+    this is derived from the ETag, Last-Modified and Content-Length headers
+    of a HEAD request, so that the ontology itself need not be downloaded.
+
+    Parameters
+    ----------
+    source: str
+        A file path or URL
+
+    Returns
+    -------
+    Optional[str]
+        The checksum, or None if it could not be determined
+
+    """
+    if os.path.isfile(source):
+        h = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    try:
+        response = requests.head(source, allow_redirects=True, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logging.warning("Could not determine checksum for {}: {}".format(source, e))
+        return None
+    headers = [response.headers.get(x, '') for x in ['ETag', 'Last-Modified', 'Content-Length']]
+    if not any(headers):
+        return None
+    return hashlib.sha256('|'.join(headers).encode()).hexdigest()
+
+
+def get_prefix(curie: str) -> Optional[str]:
+    """
+    Get the prefix of a CURIE, or None if it is not a CURIE.
+    """
+    if ':' in curie:
+        return curie.split(':', 1)[0]
+    return None
+
+
+class OntologyIndex(object):
+    """
+    A compiled, on-disk index of an ontology, backed by SQLite.
+
+    The index holds the subClassOf parents, the labels, and the precomputed
+    ancestor closure of every class in the ontology. It is built once per
+    version of the ontology, and is opened read-only and memory-mapped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect('file:{}?mode=ro'.format(path), uri=True, check_same_thread=False)
+        self.connection.execute('PRAGMA mmap_size = {}'.format(1 << 30))
+        self.meta = dict(self.connection.execute('SELECT key, value FROM meta'))
+        self.prefixes = set(self.get_prefixes())
+
+    @classmethod
+    def load(cls, source: str, directory: str, name: str = None, refresh: bool = False) -> 'OntologyIndex':
+        """
+        Open the index for an ontology, (re)building it if it does not exist
+        or if it is out of date with respect to the source.
+
+        Parameters
+        ----------
+        source: str
+            A file path or URL to the ontology
+        directory: str
+            Directory where the indexes are stored
+        name: str
+            A name for the ontology, used in the index file name
+        refresh: bool
+            Whether to rebuild the index regardless of its freshness
+
+        Returns
+        -------
+        OntologyIndex
+            The index for the ontology
+
+        """
+        digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+        path = os.path.join(directory, '{}-{}.db'.format(name or 'ontology', digest))
+        checksum = source_checksum(source)
+        if os.path.exists(path) and not refresh:
+            index = cls(path)
+            if index.meta.get('format') == INDEX_FORMAT_VERSION and (checksum is None or index.meta.get('checksum') == checksum):
+                logging.debug("Using ontology index {} for {}".format(path, source))
+                return index
+            index.close()
+            logging.info("Ontology index {} is out of date with {}".format(path, source))
+        cls.build(source, path, checksum)
+        return cls(path)
+
+    @staticmethod
+    def build(source: str, path: str, checksum: str = None) -> None:
+        """
+        Write the index of an ontology to `path`. The ontology is taken from
+        the OntologyRegistry if it holds it already, and is otherwise parsed
+        for the index alone, such that it is not kept in memory once the
+        index is written.
+
+        Parameters
+        ----------
+        source: str
+            A file path or URL to the ontology
+        path: str
+            Path of the index to write
+        checksum: str
+            The checksum of the source, as returned by `source_checksum`
+
+        """
+        from kgx.ontology_registry import get_ontology_registry
+        from kgx.utils.graph_utils import SubclassClosure
+
+        logging.info("Building ontology index for {}".format(source))
+        rdfgraph = get_ontology_registry().get_graph(source, keep=False)
+
+        graph = nx.MultiDiGraph()
+        for s, o in rdfgraph.subject_objects(rdflib.RDFS.subClassOf):
+            if isinstance(s, rdflib.BNode) or isinstance(o, rdflib.BNode):
+                # anonymous classes cannot be referred to across runs
+                continue
+            subject_curie = make_curie(s)
+            object_curie = make_curie(o)
+            key = generate_edge_key(subject_curie, 'subclass_of', object_curie)
+            graph.add_edge(subject_curie, object_curie, key, edge_label='subclass_of')
+        labels = {}
+        for s, o in rdfgraph.subject_objects(rdflib.RDFS.label):
+            labels[make_curie(s)] = o.value.replace(' ', '_')
+        del rdfgraph
+
+        closure = SubclassClosure(graph, ['subclass_of'])
+        prefixes = {get_prefix(x) for x in graph.nodes()}
+        prefixes.update(get_prefix(x) for x in labels)
+        prefixes.discard(None)
+
+        make_path(path)
+        tmp_path = '{}.tmp'.format(path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        connection = sqlite3.connect(tmp_path)
+        connection.executescript(SCHEMA)
+        meta = {'source': source, 'checksum': checksum or '', 'format': INDEX_FORMAT_VERSION}
+        connection.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+        connection.executemany('INSERT INTO labels VALUES (?, ?)', labels.items())
+        connection.executemany(
+            'INSERT INTO parents VALUES (?, ?, ?)',
+            ((n, p, i) for n in graph.nodes() for i, p in enumerate(closure.get_parents(n)))
+        )
+        connection.executemany(
+            'INSERT INTO ancestors VALUES (?, ?)',
+            ((n, ANCESTOR_DELIMITER.join(closure.get_ancestors(n))) for n in graph.nodes())
+        )
+        connection.executemany('INSERT INTO prefixes VALUES (?)', ((x,) for x in prefixes))
+        connection.commit()
+        connection.close()
+        os.replace(tmp_path, path)
+        logging.info("Ontology index for {} written to {}".format(source, path))
+
+    def get_label(self, curie: str) -> Optional[str]:
+        """
+        Get the label for a CURIE.
+
+        Parameters
+        ----------
+        curie: str
+            A CURIE
+
+        Returns
+        -------
+        Optional[str]
+            The label, or None if the CURIE has no label
+
+        """
+        row = self.connection.execute('SELECT label FROM labels WHERE curie = ?', (curie,)).fetchone()
+        return row[0] if row else None
+
+    def get_parents(self, curie: str) -> List[str]:
+        """
+        Get the direct superclasses of a CURIE.
+
+        Parameters
+        ----------
+        curie: str
+            A CURIE
+
+        Returns
+        -------
+        List[str]
+            A list of parents
+
+        """
+        rows = self.connection.execute('SELECT parent FROM parents WHERE curie = ? ORDER BY position', (curie,))
+        return [x[0] for x in rows]
+
+    def get_ancestors(self, curie: str) -> List[str]:
+        """
+        Get all superclasses of a CURIE, in depth-first order.
+
+        Parameters
+        ----------
+        curie: str
+            A CURIE
+
+        Returns
+        -------
+        List[str]
+            A list of ancestors
+
+        """
+        row = self.connection.execute('SELECT ancestors FROM ancestors WHERE curie = ?', (curie,)).fetchone()
+        if not row or not row[0]:
+            return []
+        return row[0].split(ANCESTOR_DELIMITER)
+
+    def has_curie(self, curie: str) -> bool:
+        """
+        Check whether a CURIE is part of the ontology.
+        """
+        return self.connection.execute(
+            'SELECT 1 FROM ancestors WHERE curie = ? UNION SELECT 1 FROM labels WHERE curie = ?', (curie, curie)
+        ).fetchone() is not None
+
+    def get_prefixes(self) -> List[str]:
+        """
+        Get all CURIE prefixes that occur in the ontology.
+        """
+        return [x[0] for x in self.connection.execute('SELECT prefix FROM prefixes')]
+
+    def edges(self) -> Iterator[Tuple[str, str]]:
+        """
+        Iterate over all subClassOf edges in the ontology.
+        """
+        yield from self.connection.execute('SELECT curie, parent FROM parents')
+
+    def labels(self) -> Iterator[Tuple[str, str]]:
+        """
+        Iterate over all labels in the ontology.
+        """
+        yield from self.connection.execute('SELECT curie, label FROM labels')
+
+    def close(self) -> None:
+        """
+        Close the underlying connection.
+        """
+        self.connection.close()
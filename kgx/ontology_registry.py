@@ -0,0 +1,158 @@
+import hashlib
+import logging
+import os
+import pickle
+import threading
+from typing import Dict, Optional, Tuple
+
+import rdflib
+from rdflib.graph import ReadOnlyGraphAggregate
+
+from kgx.ontology_index import OntologyIndex, source_checksum
+from kgx.utils import make_path
+
+PICKLE_FORMAT_VERSION = '1'
+
+ontology_registry = None
+
+
+class OntologyRegistry(object):
+    """
+    A process-wide registry of ontologies, such that each ontology is parsed,
+    or its index opened, once per process rather than once per transformer
+    or CurieLookupService.
+
+    Parsed ontologies are handed out as read-only views of a shared
+    rdflib.Graph. If `pickled` is set, then each parsed ontology is also
+    stored in `directory` as a pickled rdflib.Graph, which loads several
+    times faster than parsing RDF/XML, and is reused for as long as the
+    source ontology does not change. Pickles are only ever read from
+    `directory`, which should not be writable by anyone else.
+    """
+
+    def __init__(self, directory: str = None, pickled: bool = False):
+        self.directory = directory
+        self.pickled = pickled
+        self.graphs: Dict[str, rdflib.Graph] = {}
+        self.indexes: Dict[Tuple[str, str, Optional[str]], OntologyIndex] = {}
+        self.lock = threading.Lock()
+        self.locks: Dict[object, threading.Lock] = {}
+
+    def get_graph(self, source: str, input_format: str = None, keep: bool = True) -> ReadOnlyGraphAggregate:
+        """
+        Get an ontology as a read-only rdflib.Graph, parsing it if it was not parsed before.
+
+        Parameters
+        ----------
+        source: str
+            A file path or URL to the ontology
+        input_format: str
+            The format of the ontology. If None, then the format is guessed from `source`
+        keep: bool
+            Whether an ontology that has to be parsed is kept by the registry. If False,
+            then it is only held for as long as the returned view is
+
+        Returns
+        -------
+        rdflib.graph.ReadOnlyGraphAggregate
+            A read-only view of the ontology
+
+        """
+        with self._get_lock(source):
+            if source in self.graphs:
+                graph = self.graphs[source]
+            else:
+                graph = self._load_graph(source, input_format)
+                if keep:
+                    self.graphs[source] = graph
+        return ReadOnlyGraphAggregate([graph])
+
+    def get_index(self, source: str, directory: str, name: str = None) -> OntologyIndex:
+        """
+        Get the index for an ontology, opening or building it if it was not opened before.
+
+        Parameters
+        ----------
+        source: str
+            A file path or URL to the ontology
+        directory: str
+            Directory where the indexes are stored
+        name: str
+            A name for the ontology, used in the index file name
+
+        Returns
+        -------
+        OntologyIndex
+            The index for the ontology
+
+        """
+        key = (source, directory, name)
+        with self._get_lock(key):
+            if key not in self.indexes:
+                self.indexes[key] = OntologyIndex.load(source, directory, name)
+        return self.indexes[key]
+
+    def clear(self) -> None:
+        """
+        Forget all ontologies, and close their indexes.
+        """
+        with self.lock:
+            for index in self.indexes.values():
+                index.close()
+            self.indexes.clear()
+            self.graphs.clear()
+
+    def _get_lock(self, key: object) -> threading.Lock:
+        with self.lock:
+            return self.locks.setdefault(key, threading.Lock())
+
+    def _load_graph(self, source: str, input_format: str = None) -> rdflib.Graph:
+        path = None
+        checksum = None
+        if self.pickled and self.directory:
+            digest = hashlib.sha1(source.encode()).hexdigest()[:12]
+            path = os.path.join(self.directory, 'ontology-{}.pickle'.format(digest))
+            checksum = source_checksum(source)
+            if os.path.exists(path) and checksum is not None:
+                with open(path, 'rb') as f:
+                    data = pickle.load(f)
+                if data.get('format') == PICKLE_FORMAT_VERSION and data.get('checksum') == checksum:
+                    logging.debug("Using pickled ontology {} for {}".format(path, source))
+                    return data['graph']
+                logging.info("Pickled ontology {} is out of date with {}".format(path, source))
+
+        graph = rdflib.Graph()
+        if input_format is None:
+            input_format = rdflib.util.guess_format(source)
+        logging.info("Parsing {}".format(source))
+        graph.parse(source, format=input_format)
+        logging.info("{} parsed with {} triples".format(source, len(graph)))
+
+        if path is not None and checksum is not None:
+            make_path(path)
+            tmp_path = '{}.tmp'.format(path)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'format': PICKLE_FORMAT_VERSION, 'checksum': checksum, 'graph': graph}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        return graph
+
+
+def get_ontology_registry() -> OntologyRegistry:
+    """
+    Get an instance of OntologyRegistry.
+    If there no instance defined, then one is instantiated, using the
+    `cache.ontology` section of the config, and returned.
+
+    Returns
+    -------
+    OntologyRegistry
+        an instance of OntologyRegistry
+
+    """
+    global ontology_registry
+    if ontology_registry is None:
+        from kgx import get_config
+        from kgx.curie_lookup_service import get_index_directory
+        cache_config = get_config().get('cache', {}).get('ontology', {})
+        ontology_registry = OntologyRegistry(get_index_directory(), pickled=bool(cache_config.get('pickle')))
+    return ontology_registry
@@ -71,7 +71,6 @@ class PrefixManager(object):
             uri = cu.expand_uri(curie, [self.prefix_map])
             if uri == curie and fallback:
                 uri = cu.expand_uri(curie)
-        print("CURIE {} to IRI {}".format(curie, uri))
         return uri
 
     def contract(self, uri: str, fallback: bool = True) -> str:
@@ -95,12 +94,10 @@ class PrefixManager(object):
         """
         # always prioritize non-CURIE shortform
         curie = None
-        print(uri)
         if uri in self.reverse_prefix_map:
             curie = self.reverse_prefix_map[uri]
         else:
             curie_list = cu.contract_uri(uri, [self.prefix_map])
-            print(curie_list)
             if len(curie_list) == 0 and fallback:
                 curie_list = cu.contract_uri(uri)
                 if len(curie_list) != 0:
@@ -0,0 +1,135 @@
+import gzip
+import re
+from typing import Dict, Iterable, Optional, TextIO, Tuple
+
+from rdflib import BNode, Literal, URIRef
+from rdflib.namespace import RDF, XSD
+
+from kgx.utils import make_path
+
+LOCAL_NAME_PATTERN = re.compile(r'[A-Za-z_][A-Za-z0-9_\-]*$')
+LITERAL_ESCAPES = [('\\', '\\\\'), ('"', '\\"'), ('\n', '\\n'), ('\r', '\\r')]
+
+Triple = Tuple[URIRef, URIRef, object]
+
+
+class RdfWriter(object):
+    """
+    Writes triples to a file as N-Triples or Turtle, as they are produced,
+    without holding them in an rdflib.Graph.
+
+    Consecutive triples with the same subject are written as one Turtle
+    statement. In Turtle, IRIs that start with the IRI of one of `prefixes`
+    are abbreviated where the remainder is a simple local name, and rdf:type
+    is written as `a` where it is the predicate.
+
+    The file is gzip compressed if `compression` is 'gz', or if the
+    filename ends with '.gz'.
+    """
+
+    def __init__(self, filename: str, output_format: str = 'nt', prefixes: Dict[str, str] = None, compression: Optional[str] = None):
+        if output_format not in ('nt', 'ntriples', 'turtle', 'ttl'):
+            raise ValueError("Unsupported output format for streaming: {}".format(output_format))
+        self.turtle = output_format in ('turtle', 'ttl')
+        self.prefixes = sorted(prefixes.items(), key=lambda x: -len(x[1])) if prefixes and self.turtle else []
+        make_path(filename)
+        if compression == 'gz' or filename.endswith('.gz'):
+            self.file: TextIO = gzip.open(filename, 'wt', encoding='utf-8')
+        else:
+            self.file = open(filename, 'w', encoding='utf-8')
+        self.subject = None
+        self.count = 0
+        # predicates come from a small vocabulary, so their serialization is kept
+        self.predicates = {RDF.type: 'a'} if self.turtle else {}
+        for prefix, iri in self.prefixes:
+            self.file.write('@prefix {}: <{}> .\n'.format(prefix, iri))
+        if self.prefixes:
+            self.file.write('\n')
+
+    def __enter__(self) -> 'RdfWriter':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def write(self, triples: Iterable[Triple]) -> int:
+        """
+        Write triples to the file.
+
+        Parameters
+        ----------
+        triples: Iterable[Tuple[URIRef, URIRef, object]]
+            Triples of rdflib terms
+
+        Returns
+        -------
+        int
+            The number of triples written so far
+
+        """
+        write = self.file.write
+        term = self.term
+        predicates = self.predicates
+        if not self.turtle:
+            for s, p, o in triples:
+                predicate = predicates.get(p) or predicates.setdefault(p, term(p))
+                write('{} {} {} .\n'.format(term(s), predicate, term(o)))
+                self.count += 1
+            return self.count
+        for s, p, o in triples:
+            predicate = predicates.get(p) or predicates.setdefault(p, term(p))
+            if s is not self.subject and s != self.subject:
+                if self.subject is not None:
+                    write(' .\n')
+                write('{}\n    {} {}'.format(term(s), predicate, term(o)))
+                self.subject = s
+            else:
+                write(' ;\n    {} {}'.format(predicate, term(o)))
+            self.count += 1
+        return self.count
+
+    def term(self, term) -> str:
+        """
+        Serialize an rdflib term.
+
+        Parameters
+        ----------
+        term: Union[rdflib.URIRef, rdflib.BNode, rdflib.Literal]
+            The term
+
+        Returns
+        -------
+        str
+            The term as in N-Triples or Turtle
+
+        """
+        if isinstance(term, URIRef):
+            if self.turtle:
+                iri = str(term)
+                for prefix, namespace in self.prefixes:
+                    if iri.startswith(namespace) and LOCAL_NAME_PATTERN.match(iri, len(namespace)):
+                        return '{}:{}'.format(prefix, iri[len(namespace):])
+            return '<{}>'.format(term)
+        if isinstance(term, BNode):
+            return '_:{}'.format(term)
+        if not isinstance(term, Literal):
+            term = Literal(term)
+        value = str(term)
+        for c, escaped in LITERAL_ESCAPES:
+            if c in value:
+                value = value.replace(c, escaped)
+        if term.language:
+            return '"{}"@{}'.format(value, term.language)
+        if term.datatype and term.datatype != XSD.string:
+            return '"{}"^^<{}>'.format(value, term.datatype)
+        return '"{}"'.format(value)
+
+    def close(self) -> None:
+        """
+        Finish the last statement, and close the file.
+        """
+        if self.file is not None:
+            if self.subject is not None:
+                self.file.write(' .\n')
+            self.file.close()
+            self.file = None
@@ -0,0 +1,424 @@
+import atexit
+import itertools
+import logging
+import re
+import shelve
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+SPARQL_RESULTS_JSON = 'application/sparql-results+json'
+SPARQL_RESULTS_TSV = 'text/tab-separated-values'
+SPARQL_QUERY = 'application/sparql-query'
+
+TSV_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', "'": "'", '\\': '\\'}
+TSV_ESCAPE_PATTERN = re.compile(r'\\(.)')
+
+node_property_cache = None
+
+
+def term_value(term: str) -> str:
+    """
+    Get the value of an RDF term, as serialized in SPARQL TSV results.
+
+    IRIs lose their angle brackets, and literals lose their quotes, escapes,
+    language tag and datatype. Blank nodes keep their `_:` prefix.
+
+    Parameters
+    ----------
+    term: str
+        An RDF term, as serialized in SPARQL TSV results
+
+    Returns
+    -------
+    str
+        The value of the term
+
+    """
+    if term.startswith('<'):
+        return term[1:-1]
+    if term.startswith('"'):
+        value = term[1:term.rindex('"')]
+        if '\\' in value:
+            value = TSV_ESCAPE_PATTERN.sub(lambda m: TSV_ESCAPES.get(m.group(1), m.group(1)), value)
+        return value
+    return term
+
+
+def term_type(term: str) -> Optional[str]:
+    """
+    Get the type of an RDF term, as serialized in SPARQL TSV results.
+
+    Parameters
+    ----------
+    term: str
+        An RDF term, as serialized in SPARQL TSV results
+
+    Returns
+    -------
+    Optional[str]
+        One of 'uri', 'bnode' or 'literal', or None for an unbound variable
+
+    """
+    if not term:
+        return None
+    if term.startswith('<'):
+        return 'uri'
+    if term.startswith('_:'):
+        return 'bnode'
+    return 'literal'
+
+
+def to_term(binding: Optional[Dict]) -> str:
+    """
+    Serialize a binding from SPARQL JSON results as in SPARQL TSV results.
+    """
+    if binding is None:
+        return ''
+    if binding['type'] == 'uri':
+        return '<{}>'.format(binding['value'])
+    if binding['type'] == 'bnode':
+        return '_:{}'.format(binding['value'])
+    value = binding['value']
+    for c, escaped in [('\\', '\\\\'), ('"', '\\"'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r')]:
+        value = value.replace(c, escaped)
+    if 'xml:lang' in binding:
+        return '"{}"@{}'.format(value, binding['xml:lang'])
+    if 'datatype' in binding:
+        return '"{}"^^<{}>'.format(value, binding['datatype'])
+    return '"{}"'.format(value)
+
+
+class SparqlClient(object):
+    """
+    A client for a SPARQL endpoint that runs queries on a bounded pool of
+    threads, over a pool of persistent HTTP connections.
+
+    Queries can be submitted ahead of time, such that the results of one
+    query can be processed while the following queries are in flight.
+
+    Results are either decoded from JSON by `query`, or streamed as rows of
+    TSV fields by `select`, which avoids building a dictionary per binding.
+    """
+
+    def __init__(self, url: str, workers: int = 4, timeout: int = 300):
+        self.url = url
+        self.workers = workers if workers and workers > 1 else 1
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sparql')
+
+    def query(self, query: str, post: bool = False) -> List[Dict]:
+        """
+        Run a SELECT query and wait for its results.
+
+        Parameters
+        ----------
+        query: str
+            The query string
+        post: bool
+            Whether to send the query as the body of a POST request, as is needed for long queries
+
+        Returns
+        -------
+        List[Dict]
+            The bindings of the query results
+
+        """
+        response = self._request(query, post, SPARQL_RESULTS_JSON)
+        bindings = response.json()['results']['bindings']
+        logging.debug("Rows fetched: {}".format(len(bindings)))
+        return bindings
+
+    def select(self, query: str, variables: List[str], post: bool = False) -> Iterator[List[str]]:
+        """
+        Run a SELECT query, and stream its results as TSV.
+
+        Each row is a list of the RDF terms bound to `variables`, in that order,
+        as serialized in SPARQL TSV results. Use `term_value` and `term_type`
+        to interpret them. Should the endpoint answer with JSON instead, then
+        the JSON results are converted to the same form.
+
+        Parameters
+        ----------
+        query: str
+            The query string
+        variables: List[str]
+            The variables to return, without '?'
+        post: bool
+            Whether to send the query as the body of a POST request
+
+        Returns
+        -------
+        Iterator[List[str]]
+            An iterator over rows of RDF terms
+
+        """
+        response = self._request(query, post, '{}, {};q=0.5'.format(SPARQL_RESULTS_TSV, SPARQL_RESULTS_JSON), stream=True)
+        try:
+            if 'json' in response.headers.get('Content-Type', ''):
+                for binding in response.json()['results']['bindings']:
+                    yield [to_term(binding.get(x)) for x in variables]
+                return
+            lines = self._iter_lines(response)
+            header = next(lines, None)
+            if not header:
+                return
+            columns = [x.lstrip('?$') for x in header.split('\t')]
+            indexes = [columns.index(x) for x in variables]
+            reorder = indexes != list(range(len(columns)))
+            for line in lines:
+                fields = line.split('\t')
+                yield [fields[i] for i in indexes] if reorder else fields
+        finally:
+            response.close()
+
+    def submit(self, query: str, post: bool = False, variables: List[str] = None) -> Future:
+        """
+        Submit a query to be run in the background.
+
+        Parameters
+        ----------
+        query: str
+            The query string
+        post: bool
+            Whether to send the query as the body of a POST request
+        variables: List[str]
+            If set, the results are fetched as by `select` rather than `query`
+
+        Returns
+        -------
+        concurrent.futures.Future
+            A future for the bindings of the query results
+
+        """
+        if variables is not None:
+            return self.executor.submit(lambda: list(self.select(query, variables, post)))
+        return self.executor.submit(self.query, query, post)
+
+    def imap(self, queries: Iterable[str], post: bool = False, variables: List[str] = None) -> Iterator[List]:
+        """
+        Run a sequence of queries concurrently, and iterate over their results in order.
+
+        The first queries are submitted right away. After that, one more query
+        is submitted for every result that is consumed, such that at most
+        `workers` queries are in flight at a time.
+
+        Parameters
+        ----------
+        queries: Iterable[str]
+            The query strings
+        post: bool
+            Whether to send the queries as the body of POST requests
+        variables: List[str]
+            If set, the results are fetched as by `select` rather than `query`
+
+        Returns
+        -------
+        Iterator[List]
+            An iterator over the bindings, or rows, of the query results
+
+        """
+        queries = iter(queries)
+        pending = deque(self.submit(x, post, variables) for x in itertools.islice(queries, self.workers))
+        return self._drain(pending, queries, post, variables)
+
+    def _request(self, query: str, post: bool, accept: str, stream: bool = False) -> requests.Response:
+        headers = {'Accept': accept}
+        if post:
+            headers['Content-Type'] = SPARQL_QUERY
+            response = self.session.post(self.url, data=query.encode('utf-8'), headers=headers, timeout=self.timeout, stream=stream)
+        else:
+            response = self.session.get(self.url, params={'query': query}, headers=headers, timeout=self.timeout, stream=stream)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _iter_lines(response: requests.Response, chunk_size: int = 1 << 16) -> Iterator[str]:
+        # literals have their line breaks escaped, so lines are only ever split on '\n'
+        tail = b''
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            lines = (tail + chunk).split(b'\n')
+            tail = lines.pop()
+            for line in lines:
+                yield line.rstrip(b'\r').decode('utf-8')
+        if tail:
+            yield tail.rstrip(b'\r').decode('utf-8')
+
+    def _drain(self, pending: Deque[Future], queries: Iterator[str], post: bool, variables: Optional[List[str]]) -> Iterator[List]:
+        try:
+            while pending:
+                future = pending.popleft()
+                for query in itertools.islice(queries, 1):
+                    pending.append(self.submit(query, post, variables))
+                yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self) -> None:
+        """
+        Stop the worker threads, and close all connections.
+        """
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+class NodePropertyCache(object):
+    """
+    A cache for the properties of nodes fetched from a SPARQL endpoint,
+    keyed by endpoint and node IRI.
+
+    The most recently used `max_entries` entries are held in memory. If
+    `path` is set, then all entries are also written to a persistent store
+    at `path`, such that an interrupted harvest can be restarted without
+    fetching the same nodes again.
+    """
+
+    def __init__(self, max_entries: int = 1_000_000, path: str = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.store = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persistent_hits = 0
+
+    def get(self, url: str, iri: str) -> Tuple[bool, Optional[Dict[str, str]]]:
+        """
+        Get the cached properties for a node.
+
+        Parameters
+        ----------
+        url: str
+            The URL of the SPARQL endpoint
+        iri: str
+            The IRI of the node
+
+        Returns
+        -------
+        Tuple[bool, Optional[Dict[str, str]]]
+            Whether the node was found, and its properties
+
+        """
+        key = (url, iri)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, self.entries[key]
+
+        store = self._get_store()
+        if store is not None:
+            store_key = self._store_key(url, iri)
+            if store_key in store:
+                value = store[store_key]
+                self._add(key, value)
+                self.hits += 1
+                self.persistent_hits += 1
+                return True, value
+
+        self.misses += 1
+        return False, None
+
+    def put(self, url: str, iri: str, value: Dict[str, str]) -> None:
+        """
+        Add the properties for a node to the cache.
+
+        Parameters
+        ----------
+        url: str
+            The URL of the SPARQL endpoint
+        iri: str
+            The IRI of the node
+        value: Dict[str, str]
+            The properties of the node
+
+        """
+        self._add((url, iri), value)
+        store = self._get_store()
+        if store is not None:
+            store[self._store_key(url, iri)] = value
+
+    def clear(self) -> None:
+        """
+        Discard all in-memory entries and reset statistics.
+        """
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = self.persistent_hits = 0
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get statistics for this cache.
+
+        Returns
+        -------
+        Dict[str, float]
+            A dictionary with hits, misses, evictions, persistent hits,
+            number of entries and the hit rate
+
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'persistent_hits': self.persistent_hits,
+            'entries': len(self.entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        """
+        Close the persistent store, if any.
+        """
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def _add(self, key: Tuple[str, str], value: Dict[str, str]) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _get_store(self) -> Optional[shelve.Shelf]:
+        if self.store is None and self.path:
+            self.store = shelve.open(self.path)
+            atexit.register(self.close)
+        return self.store
+
+    def _store_key(self, url: str, iri: str) -> str:
+        return '{}|{}'.format(url, iri)
+
+
+def get_node_property_cache() -> NodePropertyCache:
+    """
+    Get an instance of NodePropertyCache.
+    If there no instance defined, then one is instantiated, using the
+    `cache.node_properties` section of the config, and returned.
+
+    Returns
+    -------
+    NodePropertyCache
+        an instance of NodePropertyCache
+
+    """
+    global node_property_cache
+    if node_property_cache is None:
+        from kgx import get_config
+        cache_config = get_config().get('cache', {}).get('node_properties', {})
+        kwargs = {}
+        if cache_config.get('max_entries'):
+            kwargs['max_entries'] = cache_config['max_entries']
+        if cache_config.get('path'):
+            kwargs['path'] = cache_config['path']
+        node_property_cache = NodePropertyCache(**kwargs)
+    return node_property_cache
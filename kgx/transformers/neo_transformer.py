@@ -1,31 +1,196 @@
-import logging
 import itertools
+import logging
+import queue
+import threading
+import time
 import uuid
 import click
 import networkx as nx
-from typing import Tuple, List, Dict
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Tuple, List, Dict, Optional
 
+from kgx.checkpoint import Checkpoint
 from kgx.transformers.transformer import Transformer
 from kgx.utils.kgx_utils import generate_edge_key
-from neo4jrestclient.client import GraphDatabase as http_gdb, Node, Relationship
-from neo4jrestclient.query import CypherException
+from neo4j import Driver, GraphDatabase, Record, Transaction, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import Neo4jError, TransientError, ServiceUnavailable, SessionExpired
+from neo4j.graph import Node, Relationship
 
 
 class NeoTransformer(Transformer):
     """
     Transformer for reading from and writing to a Neo4j database.
+
+    All queries go over Bolt, through a driver that pools its connections,
+    and are run as parameterized queries in explicit read or write transactions.
+    An existing driver can be passed as `driver`, instead of connecting to `host` and `port`.
     """
 
-    def __init__(self, graph: nx.MultiDiGraph = None, host: str = None, port: str = None, username: str = None, password: str = None):
+    # number of times, and the base delay in seconds, to retry a batch that failed with a transient error
+    MAX_RETRIES = 3
+    RETRY_BACKOFF = 1.0
+
+    def __init__(self, graph: nx.MultiDiGraph = None, host: str = None, port: str = None, username: str = None, password: str = None, max_connection_pool_size: int = 50, driver: Driver = None):
         super(NeoTransformer, self).__init__(graph)
-        self.http_driver = None
-        http_uri = f'http://{host}:{port}'
-        self.http_driver = http_gdb(http_uri, username=username, password=password)
+        if isinstance(port, dict):
+            # ports as in the 'neo4j' section of the config
+            port = port.get('bolt', 7687)
+        self.uri = f'bolt://{host}:{port}'
+        if driver is None:
+            driver = GraphDatabase.driver(self.uri, auth=(username, password), max_connection_pool_size=max_connection_pool_size)
+        self.driver = driver
+
+    def close(self) -> None:
+        """
+        Close the driver, and all connections in its pool.
+        """
+        self.driver.close()
+
+    def read(self, query: str, **params) -> List[Record]:
+        """
+        Run a query in a read transaction.
+
+        Parameters
+        ----------
+        query: str
+            The cypher query
+        **params: dict
+            Parameters for the query
+
+        Returns
+        -------
+        List[neo4j.Record]
+            A list of records
 
-    def load(self, start: int = 0, end: int = None, is_directed: bool = True) -> None:
+        """
+        logging.debug("Query: {}".format(query))
+        try:
+            with self.driver.session(default_access_mode=READ_ACCESS) as session:
+                return session.execute_read(_fetch, query, params)
+        except Neo4jError as ne:
+            logging.error(ne)
+            return []
+
+    def write(self, query: str, **params) -> None:
+        """
+        Run a query in a write transaction.
+
+        Parameters
+        ----------
+        query: str
+            The cypher query
+        **params: dict
+            Parameters for the query
+
+        """
+        try:
+            with self.driver.session(default_access_mode=WRITE_ACCESS) as session:
+                session.execute_write(_consume, query, params)
+        except Neo4jError as ne:
+            logging.error(ne)
+
+    def write_batch(self, query: str, size: int, description: str, **params) -> Optional[List[Record]]:
+        """
+        Run a query for a batch of records in a write transaction,
+        retrying with exponential backoff if it fails with a transient error.
+
+        Parameters
+        ----------
+        query: str
+            The cypher query
+        size: int
+            The number of records in the batch
+        description: str
+            A description of the batch, for logging
+        **params: dict
+            Parameters for the query
+
+        Returns
+        -------
+        Optional[List[neo4j.Record]]
+            The records returned by the query, or None if the batch could not be written
+
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                time_start = self.current_time_in_millis()
+                with self.driver.session(default_access_mode=WRITE_ACCESS) as session:
+                    records = session.execute_write(_fetch, query, params)
+                elapsed = max(self.current_time_in_millis() - time_start, 1)
+                logging.debug("{}: {} records in {} ms ({:.0f} records/s)".format(description, size, elapsed, size * 1000 / elapsed))
+                return records
+            except (TransientError, ServiceUnavailable, SessionExpired) as e:
+                if attempt == self.MAX_RETRIES:
+                    logging.error("{}: giving up after {} attempts: {}".format(description, attempt + 1, e))
+                    return None
+                delay = self.RETRY_BACKOFF * 2 ** attempt
+                logging.warning("{}: {}; retrying in {} s".format(description, e, delay))
+                time.sleep(delay)
+            except Neo4jError as ne:
+                logging.error("{}: {}".format(description, ne))
+                return None
+
+    def write_partitions(self, partitions: List[List[Tuple[str, int, str, dict]]], workers: int = 1) -> List[Record]:
+        """
+        Write batches to Neo4j, with one writer per partition.
+
+        Batches within a partition are written one after another, while
+        partitions are written concurrently by a pool of `workers` threads.
+
+        Parameters
+        ----------
+        partitions: List[List[Tuple[str, int, str, dict]]]
+            A list of partitions, each of which is a list of batches
+            as (query, size, description, parameters)
+        workers: int
+            Number of concurrent writers
+
+        Returns
+        -------
+        List[neo4j.Record]
+            The records returned by all batches that were written
+
+        """
+        def write_partition(batches: List[Tuple[str, int, str, dict]]) -> Tuple[int, List[Record]]:
+            failed = 0
+            records = []
+            for query, size, description, params in batches:
+                result = self.write_batch(query, size, description, **params)
+                if result is None:
+                    failed += 1
+                else:
+                    records += result
+            return failed, records
+
+        time_start = self.current_time_in_millis()
+        size = sum(batch[1] for batches in partitions for batch in batches)
+        if workers and workers > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='neo4j-writer') as executor:
+                results = list(executor.map(write_partition, partitions))
+        else:
+            results = [write_partition(batches) for batches in partitions]
+        elapsed = max(self.current_time_in_millis() - time_start, 1)
+        logging.info("Wrote {} records in {} ms ({:.0f} records/s)".format(size, elapsed, size * 1000 / elapsed))
+        failed = sum(x[0] for x in results)
+        if failed:
+            logging.error("{} batches could not be written".format(failed))
+        return [record for x in results for record in x[1]]
+
+    def load(self, start: int = 0, end: int = None, is_directed: bool = True, page_size: int = 10_000, workers: int = None, checkpoint: str = None, resume: bool = False) -> None:
         """
         Read nodes and edges from a Neo4j database and create a networkx.MultiDiGraph
 
+        If `checkpoint` is set, then the edges loaded so far, along with the
+        number of records read from each partition and the identity of the
+        last of them, are periodically appended to a Checkpoint at that path.
+        With `resume`, a download with the same parameters picks up after the
+        last record in the checkpoint. Records are read in the order of their
+        identity, so records that were added to the database since are still
+        read if they come later in that order. The checkpoint is removed once
+        the download has finished.
+
         Parameters
         ----------
         start: int
@@ -34,9 +199,27 @@ class NeoTransformer(Transformer):
             End for pagination
         is_directed: bool
             Are edges directed or undirected (`True`, by default, since edges in most cases are directed)
+        page_size: int
+            Number of records to fetch from Neo4j at a time (`10000`, by default)
+        workers: int
+            Number of reader sessions to download with concurrently.
+            Only applies when downloading all records, i.e. when `start` is 0 and `end` is None.
+        checkpoint: str
+            Path of a checkpoint for the download
+        resume: bool
+            Whether to resume from the checkpoint, if there is one
 
         """
-        PAGE_SIZE = 10_000
+        concurrent = bool(workers and workers > 1 and start == 0 and end is None)
+        query = self.get_edge_query(is_directed=is_directed, limit=end is not None, cursor=True)
+        # the number of records read so far, and the identity of the last of them, per partition
+        progress = {}
+        if checkpoint is not None:
+            signature = '|'.join(str(x) for x in [self.uri, query, workers if concurrent else 1, start, end])
+            checkpoint = Checkpoint(checkpoint, self.graph, signature, resume=resume)
+            cursor = checkpoint.restore()
+            if cursor:
+                progress = {int(k): v for k, v in cursor.items()}
 
         if end is None:
             # get total number of records to be fetched from Neo4j
@@ -44,14 +227,182 @@ class NeoTransformer(Transformer):
         else:
             count = end - start
 
-        with click.progressbar(length=count, label='Getting {:,} records from Neo4j'.format(count)) as bar:
-            time_start = self.current_time_in_millis()
-            for page in self.get_pages(self.get_edges, start, end, page_size=PAGE_SIZE, **{'is_directed': is_directed}):
-                self.load_edges(page)
-                bar.update(PAGE_SIZE)
-            bar.update(count)
-            time_end = self.current_time_in_millis()
-            logging.debug("time taken to load edges: {} ms".format(time_end - time_start))
+        try:
+            with click.progressbar(length=count, label='Getting {:,} records from Neo4j'.format(count)) as bar:
+                bar.update(sum(x['count'] for x in progress.values()))
+                time_start = self.current_time_in_millis()
+                if concurrent:
+                    pages = self.get_pages_concurrently(is_directed=is_directed, page_size=page_size, workers=workers, progress=progress)
+                elif 0 in progress:
+                    remaining = end - start - progress[0]['count'] if end is not None else None
+                    pages = self.get_pages(query, 0, remaining, page_size=page_size, after=progress[0]['after'])
+                else:
+                    pages = self.get_pages(query, start, end, page_size=page_size)
+                for page in pages:
+                    edges = self.load_edges(page)
+                    if not concurrent:
+                        count = progress[0]['count'] if 0 in progress else 0
+                        progress[0] = {'count': count + len(page), 'after': self.get_cursor(page[-1])}
+                    if checkpoint is not None:
+                        checkpoint.update(dict(progress), edges=edges)
+                    bar.update(len(page))
+                time_end = self.current_time_in_millis()
+                logging.debug("time taken to load edges: {} ms".format(time_end - time_start))
+        finally:
+            if checkpoint is not None:
+                # pages loaded before a failure are kept, to resume from
+                checkpoint.close()
+        if checkpoint is not None:
+            checkpoint.complete()
+
+    def get_partitions(self, workers: int, is_directed: bool = True) -> List[Tuple[str, dict]]:
+        """
+        Split the edges to be fetched into partitions that can be fetched independently.
+
+        The relationships of each type, or of the type in the `edge_label`
+        filter, are split into at most `workers` partitions by disjoint ranges
+        of the id of their subject, which the unique constraint on the id of
+        `Transformer.DEFAULT_NODE_LABEL` indexes, such that each partition
+        is read with an index seek rather than a scan over all relationships,
+        and such that a type that makes up most of the graph is still read
+        in parallel. Relationships whose subject is not covered by that index
+        are fetched by one more partition per type, if there are any such subjects.
+
+        Parameters
+        ----------
+        workers: int
+            Number of workers that will fetch the partitions
+        is_directed: bool
+            Are edges directed or undirected (`True`, by default, since edges in most cases are directed)
+
+        Returns
+        -------
+        List[Tuple[str, dict]]
+            A list of queries, along with their parameters
+
+        """
+        if self.get_filter('edge_label'):
+            edge_labels = [None]
+        else:
+            edge_labels = [record[0] for record in self.read("CALL db.relationshipTypes()")] or [None]
+
+        indexed = f"s:`{self.DEFAULT_NODE_LABEL}` AND s.id >= $lower"
+        bounds = [''] + self.get_id_boundaries(workers)
+        # ids are strings, and any node that is not indexed by a string id is left to one more partition
+        unindexed = "NOT coalesce({0}:`{1}` AND {0}.id >= '', false)"
+        has_unindexed = bool(self.read(f"MATCH (n) WHERE {unindexed.format('n', self.DEFAULT_NODE_LABEL)} RETURN n LIMIT 1"))
+        partitions = []
+        for edge_label in edge_labels:
+            for i, lower in enumerate(bounds):
+                if i + 1 < len(bounds):
+                    query = self.get_edge_query(is_directed=is_directed, edge_label=edge_label, condition=f"{indexed} AND s.id < $upper", cursor=True)
+                    partitions.append((query, {'lower': lower, 'upper': bounds[i + 1]}))
+                else:
+                    query = self.get_edge_query(is_directed=is_directed, edge_label=edge_label, condition=indexed, cursor=True)
+                    partitions.append((query, {'lower': lower}))
+            if has_unindexed:
+                query = self.get_edge_query(is_directed=is_directed, edge_label=edge_label, condition=unindexed.format('s', self.DEFAULT_NODE_LABEL), cursor=True)
+                partitions.append((query, {}))
+        return partitions
+
+    def get_id_boundaries(self, workers: int) -> List[str]:
+        """
+        Get the ids that split the nodes of `Transformer.DEFAULT_NODE_LABEL`,
+        in the order of their id, into `workers` ranges of about equal size.
+
+        Parameters
+        ----------
+        workers: int
+            Number of ranges
+
+        Returns
+        -------
+        List[str]
+            The first id of every range but the first, in ascending order
+
+        """
+        label = self.DEFAULT_NODE_LABEL
+        results = self.read(f"MATCH (n:`{label}`) WHERE n.id >= '' RETURN COUNT(n) AS count")
+        count = results[0]['count'] if results else 0
+        query = f"MATCH (n:`{label}`) WHERE n.id >= '' RETURN n.id AS id ORDER BY n.id SKIP $skip LIMIT 1"
+        boundaries = []
+        for i in range(1, workers):
+            for record in self.read(query, skip=count * i // workers):
+                if not boundaries or record['id'] > boundaries[-1]:
+                    boundaries.append(record['id'])
+        return boundaries
+
+    def get_pages_concurrently(self, is_directed: bool = True, page_size: int = 10_000, workers: int = 4, progress: Dict[int, dict] = None) -> list:
+        """
+        Get pages of edges from Neo4j, fetching several partitions at once.
+
+        Each partition is streamed by its own reader session in a thread pool,
+        and all pages are handed to the calling thread through a single queue,
+        such that the graph is only ever written to from one thread.
+
+        Parameters
+        ----------
+        is_directed: bool
+            Are edges directed or undirected (`True`, by default, since edges in most cases are directed)
+        page_size: int
+            Size of each page (`10000`, by default)
+        workers: int
+            Number of reader sessions
+        progress: Dict[int, dict]
+            The number of records already read from each partition, as 'count', and the identity
+            of the last of them, as 'after', by the index of the partition. Partitions are read
+            from after these records, and the dictionary is updated as pages are returned.
+
+        Returns
+        -------
+        list
+            An iterator for a list of records from Neo4j. The size of the list is at most `page_size`
+
+        """
+        partitions = self.get_partitions(workers, is_directed=is_directed)
+        if progress is None:
+            progress = {}
+        logging.debug("Fetching {} partitions with {} workers".format(len(partitions), workers))
+        pages = queue.Queue(maxsize=workers * 2)
+        stopped = threading.Event()
+
+        def put(page: Optional[list]) -> None:
+            # readers give up once the consumer has stopped, rather than block on a full queue
+            while not stopped.is_set():
+                try:
+                    pages.put(page, timeout=1)
+                    return
+                except queue.Full:
+                    continue
+
+        def read_partition(index: int, query: str, params: dict) -> None:
+            try:
+                after = progress[index]['after'] if index in progress else None
+                for page in self.get_pages(query, page_size=page_size, after=after, **params):
+                    if stopped.is_set():
+                        return
+                    put((index, page))
+            finally:
+                # a sentinel marks the end of each partition
+                put(None)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='neo4j-reader') as executor:
+            futures = [executor.submit(read_partition, i, query, params) for i, (query, params) in enumerate(partitions)]
+            try:
+                remaining = len(futures)
+                while remaining:
+                    item = pages.get()
+                    if item is None:
+                        remaining -= 1
+                    else:
+                        index, page = item
+                        count = progress[index]['count'] if index in progress else 0
+                        progress[index] = {'count': count + len(page), 'after': self.get_cursor(page[-1])}
+                        yield page
+            finally:
+                stopped.set()
+            for future in futures:
+                future.result()
 
     def count(self, is_directed: bool = True) -> int:
         """
@@ -74,14 +425,9 @@ class NeoTransformer(Transformer):
         RETURN COUNT(*) AS count;
         """
 
-        logging.debug("Query: {}".format(query))
-        try:
-            query_result = self.http_driver.query(query)
-        except CypherException as ce:
-            logging.error(ce)
-
-        for result in query_result:
-            return result[0]
+        for result in self.read(query):
+            return result['count']
+        return 0
 
     def load_nodes(self, nodes: List[Node]) -> None:
         """
@@ -89,7 +435,7 @@ class NeoTransformer(Transformer):
 
         Parameters
         ----------
-        nodes: List[neo4jrestclient.client.Node]
+        nodes: List[neo4j.graph.Node]
             A list of node records
 
         """
@@ -101,20 +447,20 @@ class NeoTransformer(Transformer):
 
     def load_node(self, node: Node) -> None:
         """
-        Load node from neo4jrestclient.client.Node into networkx.MultiDiGraph
+        Load node from neo4j.graph.Node into networkx.MultiDiGraph
 
         Parameters
         ----------
-        node: neo4jrestclient.client.Node
+        node: neo4j.graph.Node
             A node
 
         """
 
         attributes = {}
-        for key, value in node.properties.items():
+        for key, value in node.items():
             attributes[key] = value
 
-        node_labels = [x._label for x in node.labels]
+        node_labels = sorted(node.labels)
 
         if 'category' not in attributes:
             attributes['category'] = node_labels
@@ -129,10 +475,10 @@ class NeoTransformer(Transformer):
         if Transformer.DEFAULT_NODE_LABEL not in attributes['category']:
             attributes['category'].append(Transformer.DEFAULT_NODE_LABEL)
 
-        node_id = node['id'] if 'id' in node else node.id
+        node_id = node['id'] if 'id' in node else node.element_id
         self.graph.add_node(node_id, **attributes)
 
-    def load_edges(self, edges: List) -> None:
+    def load_edges(self, edges: List) -> List[Tuple[str, str, str]]:
         """
         Load edges into networkx.MultiDiGraph
 
@@ -141,30 +487,42 @@ class NeoTransformer(Transformer):
         edges: List
             A list of edge records
 
+        Returns
+        -------
+        List[Tuple[str, str, str]]
+            The subject, object and key of each edge
+
         """
         start = self.current_time_in_millis()
+        keys = []
         for record in edges:
             edge = record[1]
-            self.load_edge(edge)
+            keys.append(self.load_edge(edge))
         end = self.current_time_in_millis()
         logging.debug("time taken to load edges: {} ms".format(end - start))
+        return keys
 
-    def load_edge(self, edge: Relationship) -> None:
+    def load_edge(self, edge: Relationship) -> Tuple[str, str, str]:
         """
-        Load an edge from neo4jrestclient.client.Relationship into networkx.MultiDiGraph
+        Load an edge from neo4j.graph.Relationship into networkx.MultiDiGraph
 
         Parameters
         ----------
-        edge: neo4jrestclient.client.Relationship
+        edge: neo4j.graph.Relationship
             An edge
 
+        Returns
+        -------
+        Tuple[str, str, str]
+            The subject, object and key of the edge
+
         """
-        edge_subject = edge.start
-        edge_predicate = edge.properties
-        edge_object = edge.end
+        edge_subject = edge.start_node
+        edge_predicate = dict(edge.items())
+        edge_object = edge.end_node
 
-        subject_id = edge_subject['id'] if 'id' in edge_subject else edge_subject.id
-        object_id = edge_object['id'] if 'id' in edge_object else edge_object.id
+        subject_id = edge_subject['id'] if 'id' in edge_subject else edge_subject.element_id
+        object_id = edge_object['id'] if 'id' in edge_object else edge_object.element_id
 
         attributes = {}
 
@@ -186,24 +544,38 @@ class NeoTransformer(Transformer):
 
         key = generate_edge_key(subject_id, attributes['edge_label'], object_id)
         self.graph.add_edge(subject_id, object_id, key, **attributes)
+        return subject_id, object_id, key
 
-    def get_pages(self, query_function, start: int = 0, end: int = None, page_size: int = 10_000, **kwargs) -> list:
+    def get_pages(self, query: str, start: int = 0, end: int = None, page_size: int = 10_000, after: list = None, **params) -> list:
         """
         Get pages of size `page_size` from Neo4j.
-        Returns an iterator of pages where number of pages is (`end` - `start`)/`page_size`
+
+        The query is run once, in a single read transaction, and its result is
+        streamed from the server `page_size` records at a time, such that the
+        whole result is read in one pass rather than by re-running, and
+        re-sorting, the query for every chunk. Errors are raised, such that a
+        download is never silently truncated; an interrupted download is
+        resumed with `after`.
+
+        With `after`, the identity of the last record of a previous download,
+        as from `get_cursor`, records are read from the record after that one,
+        and `start` and `end` count from there.
 
         Parameters
         ----------
-        query_function: func
-            The function to use to fetch records. Usually this is `self.get_nodes` or `self.get_edges`
+        query: str
+            The query to run. This is from `self.get_edge_query`, with `cursor` set,
+            and with `limit` set if and only if `end` is
         start: int
             Start for pagination
         end: int
             End for pagination
         page_size: int
             Size of each page (`10000`, by default)
-        **kwargs: dict
-            Any additional arguments that might be relevant for `query_function`
+        after: list
+            The identity of the record to read after
+        **params: dict
+            Any additional parameters for `query`
 
         Returns
         -------
@@ -211,28 +583,111 @@ class NeoTransformer(Transformer):
             An iterator for a list of records from Neo4j. The size of the list is `page_size`
 
         """
+        params = dict(params, skip=start, after=after)
+        if end is not None:
+            params['limit'] = end - start
+        logging.debug("Query: {}".format(query))
+        with self.driver.session(default_access_mode=READ_ACCESS, fetch_size=page_size) as session:
+            with session.begin_transaction() as tx:
+                records = iter(tx.run(query, params))
+                while True:
+                    page = list(itertools.islice(records, page_size))
+                    if not page:
+                        return
+                    yield page
+
+    @staticmethod
+    def get_cursor(record: Record) -> list:
+        """
+        Get the identity of a record from a query by `get_edge_query`, by which records are ordered.
 
-        # itertools.count(0) starts counting from zero, and would run indefinitely without a return statement.
-        # it's distinguished from applying a while loop via providing an index which is formative with the for statement
-        for i in itertools.count(0):
-            # First halt condition: page pointer exceeds the number of values allowed to be returned in total
-            skip = start + (page_size * i)
-            limit = page_size if end is None or skip + page_size <= end else end - skip
-            if limit <= 0:
-                return
-            # execute query_function to get records
-            records = query_function(skip=skip, limit=limit, **kwargs)
-
-            # Second halt condition: no more data available
-            if records:
-                """
-                * Yield halts execution until next call
-                * Thus, the function continues execution upon next call
-                * Therefore, a new page is calculated before record is instantiated again
-                """
-                yield records
-            else:
-                return
+        Parameters
+        ----------
+        record: neo4j.Record
+            A record with a subject `s` and a relationship `p`
+
+        Returns
+        -------
+        list
+            The id of the subject, and the element ids of the subject and of the relationship
+
+        """
+        return [record['s'].get('id'), record['s'].element_id, record['p'].element_id]
+
+    def get_node_query(self, limit: bool = False) -> str:
+        """
+        Get the query for fetching nodes, with respect to `self.filters`.
+
+        Parameters
+        ----------
+        limit: bool
+            Whether the query takes a `$limit` parameter, in addition to `$skip`
+
+        Returns
+        -------
+        str
+            The cypher query
+
+        """
+        labels = [self.get_filter(x) for x in ['subject_category', 'object_category']]
+        conditions = [f"n{x}" for x in labels if x]
+        query = f"""
+        MATCH (n)
+        {'WHERE ' + ' OR '.join(conditions) if conditions else ''}
+        RETURN n
+        SKIP $skip
+        """
+        if limit:
+            query += " LIMIT $limit"
+        return query
+
+    def get_edge_query(self, is_directed: bool = True, limit: bool = False, edge_label: Optional[str] = None, condition: Optional[str] = None, cursor: bool = False) -> str:
+        """
+        Get the query for fetching edges, with respect to `self.filters`.
+
+        Parameters
+        ----------
+        is_directed: bool
+            Are edges directed or undirected (`True`, by default, since edges in most cases are directed)
+        limit: bool
+            Whether the query takes a `$limit` parameter, in addition to `$skip`
+        edge_label: Optional[str]
+            An edge label that takes the place of the `edge_label` filter
+        condition: Optional[str]
+            A condition on the subject `s`, relationship `p` and object `o`, that edges have to satisfy
+        cursor: bool
+            Whether the query is ordered by the identity of each record, and only fetches the
+            records after the identity in `$after`, if that is not null (see `get_cursor`).
+            Records are ordered by the id of their subject first, which is indexed for
+            `Transformer.DEFAULT_NODE_LABEL`, such that resuming seeks rather than scans
+
+        Returns
+        -------
+        str
+            The cypher query
+
+        """
+        direction = '->' if is_directed else '-'
+        edge_filter = f":`{edge_label}`" if edge_label else self.get_filter('edge_label')
+        conditions = []
+        if condition:
+            conditions.append(f'({condition})')
+        if cursor:
+            # an undirected edge is matched once from each of its nodes, so the subject is part of the identity
+            conditions.append(
+                '($after IS NULL OR s.id > $after[0] OR (s.id = $after[0] AND '
+                '(elementId(s) > $after[1] OR (elementId(s) = $after[1] AND elementId(p) > $after[2]))))'
+            )
+        query = f"""
+        MATCH (s{self.get_filter('subject_category')})-[p{edge_filter}]{direction}(o{self.get_filter('object_category')})
+        {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+        RETURN s, p, o
+        {'ORDER BY s.id, elementId(s), elementId(p)' if cursor else ''}
+        SKIP $skip
+        """
+        if limit:
+            query += " LIMIT $limit"
+        return query
 
     def get_nodes(self, skip: int = 0, limit: int = 0) -> List[Node]:
         """
@@ -248,35 +703,11 @@ class NeoTransformer(Transformer):
         Returns
         -------
         list
-            A list of neo4jrestclient.client.Node records
+            A list of neo4j.graph.Node records
 
         """
-
-        if limit == 0 or limit is None:
-            query = f"""
-            MATCH (n)
-            WHERE n{self.get_filter('subject_category')} OR n{self.get_filter('object_category')}
-            RETURN n
-            SKIP {skip}
-            """
-        else:
-            query = f"""
-             MATCH (n)
-             WHERE n{self.get_filter('subject_category')} OR n{self.get_filter('object_category')}
-             RETURN n
-             SKIP {skip} LIMIT {limit}
-             """
-
-        logging.debug(query)
-
-        # Filter out all the associated metadata to ensure the results are clean
-        try:
-            results = self.http_driver.query(query, returns=Node)
-        except CypherException as ce:
-            logging.error(ce)
-        logging.debug("Results: {}".format(results))
-        nodes = [node for node in results]
-        logging.debug("Tidied results: {}".format(nodes))
+        results = self.read(self.get_node_query(limit=bool(limit)), skip=skip, limit=limit)
+        nodes = [record['n'] for record in results]
         return nodes
 
     def get_edges(self, skip: int = 0, limit: int = 0, is_directed: bool = True) -> List[Tuple[Node, Relationship, Node]]:
@@ -295,29 +726,10 @@ class NeoTransformer(Transformer):
         Returns
         -------
         list
-            A list of 3-tuples of the form (neo4jrestclient.client.Node, neo4jrestclient.client.Relationship, neo4jrestclient.client.Node)
+            A list of records of the form (neo4j.graph.Node, neo4j.graph.Relationship, neo4j.graph.Node)
 
         """
-
-        direction = '->' if is_directed else '-'
-        query = f"""
-        MATCH (s{self.get_filter('subject_category')})-[p{self.get_filter('edge_label')}]{direction}(o{self.get_filter('object_category')})
-        RETURN s, p, o
-        SKIP {skip}
-        """
-
-        if limit:
-            query += f" LIMIT {limit}"
-
-        if skip < limit:
-            logging.debug(query)
-            try:
-                results = self.http_driver.query(query, returns=(Node, Relationship, Node))
-            except CypherException as ce:
-                logging.error(ce)
-            edge_triples = [x for x in results]
-            return edge_triples
-        return []
+        return self.read(self.get_edge_query(is_directed=is_directed, limit=bool(limit)), skip=skip, limit=limit)
 
     def save_node(self, obj: dict) -> None:
         """
@@ -338,93 +750,207 @@ class NeoTransformer(Transformer):
         properties = ', '.join('n.{0}=${0}'.format(k) for k in obj.keys())
         query = f"MERGE (n:`{category}` {{id: $id}}) SET {properties}"
         logging.debug(query)
-        try:
-            self.http_driver.query(query, params=obj)
-        except CypherException as ce:
-            logging.error(ce)
+        self.write(query, **obj)
 
-    def save_node_unwind(self, nodes_by_category: Dict[str, list]) -> None:
+    def save_node_unwind(self, nodes_by_category: Dict[str, list], batch_size: int = 10_000, workers: int = 1, use_apoc: bool = False, fresh: bool = False) -> None:
         """
         Save all nodes into Neo4j using the UNWIND cypher clause.
 
+        All nodes are merged through the same statement, regardless of their category,
+        such that Neo4j only has to plan a single query. Labels for categories are
+        then set either by APOC in the same statement, or in a second phase with
+        one statement per distinct label. As with properties, labels are only set
+        on nodes that are created; nodes that already exist are left as they are.
+
+        Nodes are written in batches of at most `batch_size`, and batches are
+        written by `workers` concurrent writers. Since every node is only part
+        of one batch, the batches do not contend for locks.
+
+        With `fresh`, nodes are created without first looking them up by id, so
+        the input must not have duplicate ids, and no node may already exist.
+        The unique constraint on the id of `Transformer.DEFAULT_NODE_LABEL` is
+        then only built once all nodes are created, before labels are set.
+
         Parameters
         ----------
         nodes_by_category: Dict[str, list]
             A dictionary where node category is the key and the value is a list of nodes of that category
+        batch_size: int
+            Maximum number of nodes per transaction
+        workers: int
+            Number of concurrent writers
+        use_apoc: bool
+            Whether to set labels with APOC, which has to be installed in Neo4j
+        fresh: bool
+            Whether to create nodes, instead of merging them, for a load into an empty database
 
         """
+        workers = workers if workers and workers > 1 else 1
+        query = self.generate_unwind_node_query(use_apoc, fresh)
+        batches = []
         for category in nodes_by_category.keys():
-            logging.debug("Generating UNWIND for category: {}".format(category))
-            query = self.generate_unwind_node_query(category)
-            logging.info(query)
-            try:
-                self.http_driver.query(query, params={'nodes': nodes_by_category[category]})
-            except CypherException as ce:
-                logging.error(ce)
-
-    def generate_unwind_node_query(self, category: str) -> str:
+            nodes = nodes_by_category[category]
+            for i in range(0, len(nodes), batch_size):
+                subset = nodes[i:i + batch_size]
+                description = "nodes {}-{} for category {}".format(i, i + len(subset), category)
+                batches.append((query, len(subset), description, {'nodes': subset}))
+        records = self.write_partitions([batches[i::workers] for i in range(workers)], workers)
+        # the ids of the nodes that were created, rather than matched, by the merge
+        created = None if fresh else {record['id'] for record in records}
+        if fresh:
+            # the id index is built once, over all nodes, rather than maintained on every write
+            self.create_constraints(set())
+            self.await_indexes()
+
+        if not use_apoc:
+            # nodes are partitioned by a hash of their id, such that
+            # no two writers set labels on the same node at the same time
+            ids_by_label = [defaultdict(list) for i in range(workers)]
+            for category, nodes in nodes_by_category.items():
+                for label in category.split(':'):
+                    if label == self.DEFAULT_NODE_LABEL:
+                        continue
+                    for node in nodes:
+                        if created is None or node['id'] in created:
+                            ids_by_label[hash(node['id']) % workers][label].append(node['id'])
+            partitions = []
+            for partition, labels in enumerate(ids_by_label):
+                batches = []
+                for label, ids in labels.items():
+                    label_query = self.generate_unwind_label_query(label)
+                    for i in range(0, len(ids), batch_size):
+                        subset = ids[i:i + batch_size]
+                        description = "labels {}-{} of partition {} for {}".format(i, i + len(subset), partition, label)
+                        batches.append((label_query, len(subset), description, {'ids': subset}))
+                partitions.append(batches)
+            self.write_partitions(partitions, workers)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def generate_unwind_node_query(use_apoc: bool = False, fresh: bool = False) -> str:
         """
         Generate UNWIND cypher query for saving nodes into Neo4j.
 
-        There should be a CONSTRAINT in Neo4j for `self.DEFAULT_NODE_LABEL`.
-        The query uses `self.DEFAULT_NODE_LABEL` as the node label to increase speed for adding nodes.
-        The query also sets label to `self.DEFAULT_NODE_LABEL` for any node to make sure that the CONSTRAINT applies.
+        There should be a CONSTRAINT in Neo4j for `Transformer.DEFAULT_NODE_LABEL`.
+        The query uses `Transformer.DEFAULT_NODE_LABEL` as the node label to increase speed for adding nodes.
+        The query also sets label to `Transformer.DEFAULT_NODE_LABEL` for any node to make sure that the CONSTRAINT applies.
 
         Parameters
         ----------
-        category: str
-            Node category
+        use_apoc: bool
+            Whether the query also sets a label for each category, using APOC
+        fresh: bool
+            Whether the query creates nodes without checking for existing ones
 
         Returns
         -------
         str
-            The UNWIND cypher query
+            The UNWIND cypher query. Unless `fresh` or `use_apoc` is set, the query
+            returns the id of each node that it created, as `id`
 
         """
-        query = f"""
+        if fresh:
+            query = f"""
+        UNWIND $nodes AS node
+        CREATE (n:`{Transformer.DEFAULT_NODE_LABEL}`)
+        SET n = node
+        WITH n, node
+        """
+        else:
+            query = f"""
         UNWIND $nodes AS node
-        MERGE (n:`{self.DEFAULT_NODE_LABEL}` {{id: node.id}})
-        ON CREATE SET n += node, n:{category}
+        OPTIONAL MATCH (existing:`{Transformer.DEFAULT_NODE_LABEL}` {{id: node.id}})
+        WITH node, existing IS NULL AS created
+        MERGE (n:`{Transformer.DEFAULT_NODE_LABEL}` {{id: node.id}})
+        ON CREATE SET n += node
+        WITH n, node, created WHERE created
+        """
+        if use_apoc:
+            query += """
+        CALL apoc.create.addLabels(n, node.category) YIELD node AS labelled
+        RETURN COUNT(*)
         """
+        elif not fresh:
+            query += """
+        RETURN node.id AS id
+        """
+        return query
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def generate_unwind_label_query(label: str) -> str:
+        """
+        Generate UNWIND cypher query for setting a label on nodes in Neo4j.
+
+        Parameters
+        ----------
+        label: str
+            The label to set
+
+        Returns
+        -------
+        str
+            The UNWIND cypher query
 
+        """
+        query = f"""
+        UNWIND $ids AS id
+        MATCH (n:`{Transformer.DEFAULT_NODE_LABEL}` {{id: id}})
+        SET n:`{label}`
+        """
         return query
 
-    def save_edge_unwind(self, edges_by_edge_label: Dict[str, list]) -> None:
+    def save_edge_unwind(self, edges_by_edge_label: Dict[str, list], batch_size: int = 1_000, workers: int = 1, fresh: bool = False) -> None:
         """
         Save all edges into Neo4j using the UNWIND cypher clause.
 
+        Edges are partitioned by a hash of their subject, and each partition is
+        written by one of `workers` concurrent writers, such that no two writers
+        create relationships on the same subject node at the same time.
+
+        With `fresh`, relationships are created without first looking them up,
+        so the input must not have more than one edge per subject, edge label and object.
+
         Parameters
         ----------
         edges_by_edge_label: dict
             A dictionary where edge label is the key and the value is a list of edges with that edge label
+        batch_size: int
+            Maximum number of edges per transaction
+        workers: int
+            Number of concurrent writers
+        fresh: bool
+            Whether to create relationships, instead of merging them, for a load into an empty database
 
         """
+        workers = workers if workers and workers > 1 else 1
+        partitions = [[] for i in range(workers)]
         for predicate in edges_by_edge_label:
-            query = self.generate_unwind_edge_query(predicate)
-            logging.info(query)
-            edges = edges_by_edge_label[predicate]
-            for i in range(0, len(edges), 1000):
-                end = i + 1000
-                subset = edges[i:end]
-                logging.info("edges subset: {}-{} for predicate {}".format(i, end, predicate))
-                time_start = self.current_time_in_millis()
-                try:
-                    self.http_driver.query(query, params={"relationship": predicate, "edges": subset})
-                except CypherException as ce:
-                    logging.error(ce)
-                time_end = self.current_time_in_millis()
-                logging.debug("time taken to load edges: {} ms".format(time_end - time_start))
-
-    def generate_unwind_edge_query(self, edge_label: str) -> str:
+            query = self.generate_unwind_edge_query(predicate, fresh)
+            edges_by_partition = [[] for i in range(workers)]
+            for edge in edges_by_edge_label[predicate]:
+                edges_by_partition[hash(edge['subject']) % workers].append(edge)
+            for partition, edges in enumerate(edges_by_partition):
+                for i in range(0, len(edges), batch_size):
+                    subset = edges[i:i + batch_size]
+                    description = "edges {}-{} of partition {} for predicate {}".format(i, i + len(subset), partition, predicate)
+                    partitions[partition].append((query, len(subset), description, {'relationship': predicate, 'edges': subset}))
+        self.write_partitions(partitions, workers)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def generate_unwind_edge_query(edge_label: str, fresh: bool = False) -> str:
         """
         Generate UNWIND cypher query for saving edges into Neo4j.
 
-        Query uses `self.DEFAULT_NODE_LABEL` to quickly lookup the required subject and object node.
+        Query uses `Transformer.DEFAULT_NODE_LABEL` to quickly lookup the required subject and object node.
 
         Parameters
         ----------
         edge_label: str
             Edge label as string
+        fresh: bool
+            Whether the query creates relationships without checking for existing ones
 
         Returns
         -------
@@ -433,9 +959,17 @@ class NeoTransformer(Transformer):
 
         """
 
-        query = f"""
+        if fresh:
+            query = f"""
         UNWIND $edges AS edge
-        MATCH (s:`{self.DEFAULT_NODE_LABEL}` {{id: edge.subject}}), (o:`{self.DEFAULT_NODE_LABEL}` {{id: edge.object}})
+        MATCH (s:`{Transformer.DEFAULT_NODE_LABEL}` {{id: edge.subject}}), (o:`{Transformer.DEFAULT_NODE_LABEL}` {{id: edge.object}})
+        CREATE (s)-[r:`{edge_label}`]->(o)
+        SET r = edge
+        """
+        else:
+            query = f"""
+        UNWIND $edges AS edge
+        MATCH (s:`{Transformer.DEFAULT_NODE_LABEL}` {{id: edge.subject}}), (o:`{Transformer.DEFAULT_NODE_LABEL}` {{id: edge.object}})
         MERGE (s)-[r:`{edge_label}`]->(o)
         SET r += edge
         """
@@ -465,46 +999,81 @@ class NeoTransformer(Transformer):
         SET {properties}
         """
 
-        try:
-            self.http_driver.query(q, params=obj)
-        except CypherException as ce:
-            logging.error(ce)
+        self.write(q, **obj)
 
-    def save_with_unwind(self) -> None:
+    def save_with_unwind(self, node_batch_size: int = 10_000, edge_batch_size: int = 1_000, workers: int = 1, use_apoc: bool = False, fresh: bool = False) -> None:
         """
         Save all nodes and edges from networkx.MultiDiGraph into Neo4j using the UNWIND cypher clause.
 
+        All nodes are written before any of the edges.
+
+        With `fresh`, which is meant for loading into an empty database, nodes and
+        edges are deduplicated up front and then created rather than merged.
+        Constraints are created after the load instead of before, except for
+        the id index that edges are matched through, which is built once all
+        nodes exist.
+
+        Parameters
+        ----------
+        node_batch_size: int
+            Maximum number of nodes per transaction
+        edge_batch_size: int
+            Maximum number of edges per transaction
+        workers: int
+            Number of concurrent writers
+        use_apoc: bool
+            Whether to set node labels with APOC, which has to be installed in Neo4j
+        fresh: bool
+            Whether to create nodes and edges, instead of merging them, for a load into an empty database
+
         """
         nodes_by_category = {}
+        seen = set()
 
         for n, node_data in self.graph.nodes(data=True):
             if 'id' not in node_data:
                 node_data['id'] = n
+            if fresh:
+                # as with MERGE ... ON CREATE, the first node with a given id wins
+                if node_data['id'] in seen:
+                    continue
+                seen.add(node_data['id'])
             node_data = self.validate_node(node_data)
             category = ':'.join(node_data['category'])
-            logging.info("Category: {}".format(category))
             if category not in nodes_by_category:
                 nodes_by_category[category] = [node_data]
             else:
                 nodes_by_category[category].append(node_data)
 
         edges_by_edge_label = {}
+        unique_edges = {}
         for n, nbrs in self.graph.adjacency():
             for nbr, eattr in nbrs.items():
                 for entry, adjitem in eattr.items():
                     edge = self.validate_edge(adjitem)
+                    if fresh:
+                        # as with MERGE ... SET r += edge, properties of duplicate edges are combined
+                        key = (edge['subject'], edge['edge_label'], edge['object'])
+                        if key in unique_edges:
+                            unique_edges[key].update(edge)
+                            continue
+                        edge = unique_edges[key] = dict(edge)
                     if adjitem['edge_label'] not in edges_by_edge_label:
                         edges_by_edge_label[edge['edge_label']] = [edge]
                     else:
                         edges_by_edge_label[edge['edge_label']].append(edge)
 
-        # create indexes
-        print(set(nodes_by_category.keys()))
-        self.create_constraints(set(nodes_by_category.keys()))
+        if not fresh:
+            # create indexes
+            self.create_constraints(set(nodes_by_category.keys()))
         # save all nodes
-        self.save_node_unwind(nodes_by_category)
+        self.save_node_unwind(nodes_by_category, batch_size=node_batch_size, workers=workers, use_apoc=use_apoc, fresh=fresh)
         # save all edges
-        self.save_edge_unwind(edges_by_edge_label)
+        self.save_edge_unwind(edges_by_edge_label, batch_size=edge_batch_size, workers=workers, fresh=fresh)
+        if fresh:
+            # create the remaining indexes
+            self.create_constraints(set(nodes_by_category.keys()), include_default=False)
+            self.await_indexes()
 
     def save(self) -> None:
         """
@@ -537,33 +1106,26 @@ class NeoTransformer(Transformer):
         Give a summary on the number of nodes and edges in the Neo4j database.
 
         """
-        try:
-            node_results = self.http_driver.query("MATCH (n) RETURN COUNT(*)")
-        except CypherException as ce:
-            logging.error(ce)
-
-        for r in node_results:
+        for r in self.read("MATCH (n) RETURN COUNT(*)"):
             logging.info("Number of Nodes: {}".format(r[0]))
 
-        try:
-            edge_results = self.http_driver.query("MATCH (s)-->(o) RETURN COUNT(*)")
-        except CypherException as ce:
-            logging.error(ce)
-
-        for r in edge_results:
+        for r in self.read("MATCH (s)-->(o) RETURN COUNT(*)"):
             logging.info("Number of Edges: {}".format(r[0]))
 
-    def create_constraints(self, categories: set) -> None:
+    def create_constraints(self, categories: set, include_default: bool = True) -> None:
         """
-        Create a unique constraint on node 'id' for all `categories` in Neo4j.
+        Create a unique constraint on node 'id' for all `categories` in Neo4j,
+        named `<label>_id`, unless an equivalent constraint already exists.
 
         Parameters
         ----------
         categories: set
             Set of categories
+        include_default: bool
+            Whether to also create the constraint for `Transformer.DEFAULT_NODE_LABEL`
 
         """
-        query = "CREATE CONSTRAINT ON (n:`{}`) ASSERT n.id IS UNIQUE"
+        query = "CREATE CONSTRAINT `{0}_id` IF NOT EXISTS FOR (n:`{0}`) REQUIRE n.id IS UNIQUE"
         label_set = {Transformer.DEFAULT_NODE_LABEL}
 
         for label in categories:
@@ -573,12 +1135,23 @@ class NeoTransformer(Transformer):
                     label_set.add(sublabel)
             else:
                 label_set.add(label)
+        if not include_default:
+            label_set.discard(Transformer.DEFAULT_NODE_LABEL)
 
         for label in label_set:
-            try:
-                self.http_driver.query(query.format(label))
-            except CypherException as ce:
-                logging.error(ce)
+            self.write(query.format(label))
+
+    def await_indexes(self, timeout: int = 3600) -> None:
+        """
+        Wait for all indexes in Neo4j to come online.
+
+        Parameters
+        ----------
+        timeout: int
+            Maximum number of seconds to wait
+
+        """
+        self.write("CALL db.awaitIndexes($timeout)", timeout=timeout)
 
     def get_filter(self, key: str) -> str:
         """
@@ -599,3 +1172,17 @@ class NeoTransformer(Transformer):
         if key in self.filters and len(self.filters[key]) != 0:
             value = f":`{self.filters[key]}`"
         return value
+
+
+def _fetch(tx: Transaction, query: str, params: dict) -> List[Record]:
+    """
+    Transaction function that runs a query and fetches all of its records.
+    """
+    return list(tx.run(query, params))
+
+
+def _consume(tx: Transaction, query: str, params: dict) -> None:
+    """
+    Transaction function that runs a query and discards its records.
+    """
+    tx.run(query, params).consume()
@@ -1,16 +1,31 @@
 import re
+import os
+import csv
 import pandas as pd
 import numpy as np
 import logging, tarfile
+import hashlib
+from collections import defaultdict
 from tempfile import TemporaryFile
 from kgx.utils import make_path
 from kgx.utils.kgx_utils import generate_edge_key
 from kgx.transformers.transformer import Transformer
 
-from typing import List, Dict
+from typing import List, Dict, Tuple, Any, Iterable
 
 LIST_DELIMITER = '|'
 
+# array delimiter for neo4j-admin import, i.e. --array-delimiter=";"
+NEO4J_ARRAY_DELIMITER = ';'
+
+# neo4j-admin import header types, for python types
+_neo4j_types = {
+    bool: 'boolean',
+    int: 'long',
+    float: 'double',
+    str: 'string',
+}
+
 _column_types = {
     'publications': list,
     'qualifiers': list,
@@ -45,8 +60,6 @@ class PandasTransformer(Transformer):
     Transformer that parses a pandas.DataFrame, and loads nodes and edges into a networkx.MultiDiGraph
     """
 
-    # TODO: Support parsing and export of neo4j-import tool compatible CSVs with appropriate headers
-
     def parse(self, filename: str, input_format: str = 'csv', provided_by: str = None, **kwargs) -> None:
         """
         Parse a CSV/TSV (or plain text) file.
@@ -257,6 +270,216 @@ class PandasTransformer(Transformer):
 
         return filename
 
+    def save_neo4j_import(self, directory: str, extension: str = 'csv') -> List[str]:
+        """
+        Write the nodes and edges of a networkx.MultiDiGraph as CSVs for `neo4j-admin import`.
+
+        Nodes are sharded into one file per set of categories, and edges into
+        one file per edge label. Each file starts with a header that gives the
+        type of every column, where multi-valued properties are written as
+        arrays delimited by `NEO4J_ARRAY_DELIMITER`. As neo4j-admin import has
+        no way to escape the delimiter, values of arrays may not contain it.
+
+        Rows are written as they are read from the graph, one shard at a time,
+        without building intermediate DataFrames.
+
+        Parameters
+        ----------
+        directory: str
+            Directory to write the files to
+        extension: str
+            The output file format (csv, by default)
+
+        Returns
+        -------
+        List[str]
+            The files that were written; node files before edge files
+
+        """
+        if extension not in _extension_types:
+            raise Exception('Unsupported extension: ' + extension)
+        delimiter = _extension_types[extension]
+        os.makedirs(directory, exist_ok=True)
+
+        node_shards = defaultdict(list)
+        node_columns = defaultdict(dict)
+        for n, data in self.graph.nodes(data=True):
+            data = self.validate_node(data)
+            labels = sorted(set(data['category']) | {self.DEFAULT_NODE_LABEL})
+            shard = PandasTransformer._neo4j_value(labels, 'string[]')
+            node_shards[shard].append(n)
+            PandasTransformer._update_neo4j_columns(node_columns[shard], data, ['id'])
+
+        edge_shards = defaultdict(list)
+        edge_columns = defaultdict(dict)
+        for s, o, key in self.graph.edges(keys=True):
+            data = self.validate_edge(self.graph.edges[s, o, key])
+            edge_shards[data['edge_label']].append((s, o, key))
+            PandasTransformer._update_neo4j_columns(edge_columns[data['edge_label']], data, [])
+
+        filenames = []
+        shard_names = PandasTransformer._shard_names(node_shards)
+        for shard, nodes in node_shards.items():
+            columns = node_columns[shard]
+            filename = os.path.join(directory, 'nodes_{}.{}'.format(shard_names[shard], extension))
+            with open(filename, 'w', newline='') as f:
+                writer = csv.writer(f, delimiter=delimiter)
+                writer.writerow(['id:ID', ':LABEL'] + [PandasTransformer._neo4j_header(k, t) for k, t in columns.items()])
+                for n in nodes:
+                    data = self.graph.nodes[n]
+                    row = [n, shard] + [PandasTransformer._neo4j_value(data.get(k), t) for k, t in columns.items()]
+                    writer.writerow(row)
+            filenames.append(filename)
+
+        shard_names = PandasTransformer._shard_names(edge_shards)
+        for edge_label, edges in edge_shards.items():
+            columns = edge_columns[edge_label]
+            filename = os.path.join(directory, 'edges_{}.{}'.format(shard_names[edge_label], extension))
+            with open(filename, 'w', newline='') as f:
+                writer = csv.writer(f, delimiter=delimiter)
+                writer.writerow([':START_ID', ':END_ID', ':TYPE'] + [PandasTransformer._neo4j_header(k, t) for k, t in columns.items()])
+                for s, o, key in edges:
+                    data = self.graph.edges[s, o, key]
+                    row = [s, o, edge_label] + [PandasTransformer._neo4j_value(data.get(k), t) for k, t in columns.items()]
+                    writer.writerow(row)
+            filenames.append(filename)
+        return filenames
+
+    def parse_neo4j_import(self, filenames: List[str], extension: str = 'csv') -> None:
+        """
+        Parse CSVs in the layout written by `save_neo4j_import`, or any other
+        CSVs with headers for `neo4j-admin import`, where the header is the
+        first row of each file.
+
+        Parameters
+        ----------
+        filenames: List[str]
+            Files to read from. Files with a `:START_ID` column are read as edges,
+            and all other files are read as nodes
+        extension: str
+            The input file format (csv, by default)
+
+        """
+        delimiter = _extension_types[extension]
+        for filename in filenames:
+            with open(filename, newline='') as f:
+                reader = csv.reader(f, delimiter=delimiter)
+                columns = [PandasTransformer._parse_neo4j_header(x) for x in next(reader)]
+                is_edge = any(t == 'START_ID' for k, t in columns)
+                for row in reader:
+                    record = {}
+                    for (key, column_type), value in zip(columns, row):
+                        if value == '':
+                            continue
+                        if column_type == 'ID':
+                            record[key or 'id'] = value
+                        elif column_type == 'LABEL':
+                            record.setdefault('category', value.split(NEO4J_ARRAY_DELIMITER))
+                        elif column_type == 'START_ID':
+                            record['subject'] = value
+                        elif column_type == 'END_ID':
+                            record['object'] = value
+                        elif column_type == 'TYPE':
+                            record.setdefault('edge_label', value)
+                        elif key:
+                            record[key] = PandasTransformer._parse_neo4j_value(value, column_type)
+                    if is_edge:
+                        self.load_edge(record)
+                    else:
+                        self.load_node(record)
+
+    @staticmethod
+    def _update_neo4j_columns(columns: Dict[str, str], data: Dict, exclude: List[str]) -> None:
+        """
+        Update the neo4j-admin import types of columns with the values of a record.
+        A column that holds values of different types is typed as string.
+        """
+        for key, value in data.items():
+            if key in exclude or value is None or value is np.nan:
+                continue
+            if key in _column_types:
+                t = 'string[]' if _column_types[key] == list else _neo4j_types.get(_column_types[key], 'string')
+            elif isinstance(value, (list, set, tuple)):
+                t = 'string[]'
+            else:
+                t = _neo4j_types.get(type(value), 'string')
+            if key in columns and columns[key] != t:
+                t = 'string[]' if t.endswith('[]') or columns[key].endswith('[]') else 'string'
+            columns[key] = t
+
+    @staticmethod
+    def _neo4j_header(key: str, column_type: str) -> str:
+        return '{}:{}'.format(key, column_type)
+
+    @staticmethod
+    def _neo4j_value(value: Any, column_type: str) -> str:
+        """
+        Format a value for a column of a given neo4j-admin import type.
+        """
+        if value is None or value is np.nan:
+            return ''
+        if column_type.endswith('[]'):
+            values = [str(x) for x in (value if isinstance(value, (list, set, tuple)) else [value])]
+            for x in values:
+                if NEO4J_ARRAY_DELIMITER in x:
+                    raise Exception("Value {!r} of an array contains the array delimiter {!r}".format(x, NEO4J_ARRAY_DELIMITER))
+            return NEO4J_ARRAY_DELIMITER.join(x.replace('\n', '\\n') for x in values)
+        if column_type == 'boolean':
+            return 'true' if value else 'false'
+        return str(value).replace('\n', '\\n')
+
+    @staticmethod
+    def _parse_neo4j_header(header: str) -> Tuple[str, str]:
+        """
+        Split a neo4j-admin import header into a property name and a type.
+        The ID space in `:ID(space)` and its variants is ignored.
+        """
+        if ':' in header:
+            key, column_type = header.rsplit(':', 1)
+        else:
+            key, column_type = header, 'string'
+        column_type = re.sub(r'\(.*\)$', '', column_type)
+        return key, column_type
+
+    @staticmethod
+    def _parse_neo4j_value(value: str, column_type: str) -> Any:
+        """
+        Parse a value from a column of a given neo4j-admin import type.
+        """
+        if column_type.endswith('[]'):
+            return [PandasTransformer._parse_neo4j_value(x, column_type[:-2]) for x in value.split(NEO4J_ARRAY_DELIMITER)]
+        column_type = column_type.lower()
+        if column_type == 'boolean':
+            return value.lower() == 'true'
+        if column_type in ['int', 'long', 'short', 'byte']:
+            return int(value)
+        if column_type in ['float', 'double']:
+            return float(value)
+        return value.replace('\\n', '\n')
+
+    @staticmethod
+    def _shard_name(label: str) -> str:
+        """
+        A file name safe version of a label.
+        """
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', label)
+
+    @staticmethod
+    def _shard_names(labels: Iterable[str]) -> Dict[str, str]:
+        """
+        File name safe versions of labels, where a label whose name collides
+        with that of an earlier label, ignoring case, gets a short hash suffix.
+        """
+        names = {}
+        taken = set()
+        for label in labels:
+            name = PandasTransformer._shard_name(label)
+            if name.lower() in taken:
+                name = '{}_{}'.format(name, hashlib.sha1(label.encode()).hexdigest()[:8])
+            taken.add(name.lower())
+            names[label] = name
+        return names
+
     @staticmethod
     def _build_kwargs(data: Dict) -> Dict:
         """
@@ -1,12 +1,13 @@
 import logging
 import networkx as nx
-from typing import List, Set, Dict, Tuple, Union
+from typing import List, Set, Dict, Tuple, Union, Optional, Iterable
 import rdflib
 from rdflib import URIRef, Namespace
 
+from kgx.mapper import get_prefix
 from kgx.utils.graph_utils import curie_lookup
 from kgx.utils.rdf_utils import property_mapping, process_iri, make_curie, is_property_multivalued
-from kgx.utils.kgx_utils import generate_edge_key
+from kgx.utils.kgx_utils import generate_edge_key, get_curie_lookup_service
 from prefixcommons.curie_util import read_remote_jsonld_context
 from kgx.validator import is_curie
 
@@ -21,6 +22,8 @@ class RdfGraphMixin(object):
         - add_node_attribute(): method to add a node attribute from a RDF form to property graph form
         - add_edge(): method to add an edge from a RDF form to property graph form
         - add_edge_attribute(): method to add an edge attribute from an RDF form to property graph form
+        - add_edge_attributes(): method to add all attributes of an edge, that was added with add_edge()
+        - prefetch_ontologies(): method to start loading the ontologies that add_edge() looks up edge labels in
 
     """
 
@@ -69,6 +72,22 @@ class RdfGraphMixin(object):
         """
         raise NotImplementedError("Method not implemented.")
 
+    def prefetch_ontologies(self, predicates: Iterable[URIRef]) -> None:
+        """
+        Start loading, in the background, the ontologies in which `add_edge`
+        looks up the edge labels for a set of predicates.
+
+        Parameters
+        ----------
+        predicates: Iterable[rdflib.URIRef]
+            Predicate IRIs
+
+        """
+        edge_labels = {process_iri(x) for x in predicates}
+        prefixes = {get_prefix(x) for x in edge_labels if is_curie(x)}
+        if prefixes:
+            get_curie_lookup_service().prefetch(prefixes)
+
     def add_node(self, iri: URIRef) -> str:
         """
         This method should be used by all derived classes when adding a node to
@@ -180,13 +199,7 @@ class RdfGraphMixin(object):
             The value of the attribute
 
         """
-        if key.lower() in is_property_multivalued:
-            key = key.lower()
-        else:
-            if not isinstance(key, URIRef):
-                key = URIRef(key)
-            key = property_mapping.get(key)
-
+        key = self._get_property_name(key)
         if key is not None:
             n = self.add_node(iri)
             attr_dict = self.graph.nodes[n]
@@ -222,13 +235,7 @@ class RdfGraphMixin(object):
             The value of the attribute
 
         """
-        if key.lower() in is_property_multivalued:
-            key = key.lower()
-        else:
-            if not isinstance(key, URIRef):
-                key = URIRef(key)
-            key = property_mapping.get(key)
-
+        key = self._get_property_name(key)
         if key is not None:
             subject_curie = make_curie(subject_iri)
             object_curie = make_curie(object_iri)
@@ -239,6 +246,46 @@ class RdfGraphMixin(object):
             attr_dict = self.graph.get_edge_data(subject_curie, object_curie, key=edge_key)
             self._add_attribute(attr_dict, key, value)
 
+    def add_edge_attributes(self, subject: str, object: str, edge_label: str, attributes: Dict[str, List[str]]) -> None:
+        """
+        Adds attributes to an edge that was added with `add_edge`, in one go,
+        while taking into account whether each attribute should be multi-valued.
+
+        Unlike `add_edge_attribute`, the edge is given by the subject, object and
+        edge_label that `add_edge` returned, such that the edge is only resolved once
+        for all of its attributes.
+
+        Parameters
+        ----------
+        subject: str
+            The CURIE of the subject node of the edge
+        object: str
+            The CURIE of the object node of the edge
+        edge_label: str
+            The edge_label of the edge
+        attributes: Dict[str, List[str]]
+            The values for each attribute, keyed by the name of the attribute. Can be a rdflib.URIRef or URI string
+
+        """
+        attr_dict = self.graph.edges[subject, object, generate_edge_key(subject, edge_label, object)]
+        for key, values in attributes.items():
+            key = self._get_property_name(key)
+            if key is not None:
+                for value in values:
+                    self._add_attribute(attr_dict, key, value)
+
+    def _get_property_name(self, key: Union[URIRef, str]) -> Optional[str]:
+        """
+        Get the property name for a key, which may be a property name,
+        or a rdflib.URIRef or URI string that maps onto a property name as
+        defined in `rdf_utils.property_mapping`.
+        """
+        if key.lower() in is_property_multivalued:
+            return key.lower()
+        if not isinstance(key, URIRef):
+            key = URIRef(key)
+        return property_mapping.get(key)
+
     def _add_attribute(self, attr_dict: Dict, key: str, value: str) -> None:
         """
         Adds an attribute to the attribute dictionary, respecting whether or not
@@ -1,16 +1,21 @@
-import click, rdflib, logging, os, uuid
+import click, gzip, multiprocessing, rdflib, logging, os, shutil, zlib
 import networkx as nx
-from typing import Tuple, Union, Set, List, Dict
+from typing import Tuple, Union, Set, List, Dict, Iterator, Optional, Callable, Any
 from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, RDFS, OWL
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from prefixcommons.curie_util import read_remote_jsonld_context
 
+from kgx.ontology_registry import get_ontology_registry
 from kgx.prefix_manager import PrefixManager
+from kgx.rdf_writer import RdfWriter
 from kgx.transformers.transformer import Transformer
 from kgx.transformers.rdf_graph_mixin import RdfGraphMixin
-from kgx.utils.rdf_utils import property_mapping, make_curie, infer_category
-from kgx.utils.kgx_utils import get_toolkit
+from kgx.utils.rdf_utils import property_mapping, is_property_multivalued, make_curie, infer_category, get_category_index
+from kgx.utils import make_path
+from kgx.utils.kgx_utils import get_toolkit, generate_edge_identifier
 
 biolink_prefix_map = read_remote_jsonld_context('https://biolink.github.io/biolink-model/context.jsonld')
 
@@ -20,6 +25,17 @@ OBAN = Namespace(biolink_prefix_map['OBAN'])
 PMID = Namespace(biolink_prefix_map['PMID'])
 BIOLINK = Namespace(biolink_prefix_map['@vocab'])
 DEFAULT_EDGE_LABEL = 'related_to'
+STREAMING_FORMATS = {'nt', 'ntriples', 'turtle', 'ttl'}
+
+# <http://purl.obolibrary.org/obo/RO_0002558> is currently stored as OBO:RO_0002558 rather than RO:0002558
+# because of the bug in rdflib. See https://github.com/RDFLib/rdflib/issues/632
+PREFIXES = {'OBAN': str(OBAN), 'OBO': str(OBO), 'biolink': str(BIOLINK)}
+
+# the transformer whose shards are written by worker processes, see ObanRdfTransformer.save_shards
+sharded_transformer = None
+
+# typed, such that 1 and True do not share a literal
+cached_literal = lru_cache(maxsize=100_000, typed=True)(rdflib.term.Literal)
 
 class RdfTransformer(RdfGraphMixin, Transformer):
     """
@@ -74,20 +90,20 @@ class RdfTransformer(RdfGraphMixin, Transformer):
             elif hasattr(filename, 'name'):
                 self.graph_metadata['provided_by'] = [filename.name]
 
+        self.prefetch_ontologies(set(rdfgraph.predicates()))
         self.load_networkx_graph(rdfgraph, predicates)
         self.load_node_attributes(rdfgraph)
         self.report()
 
     def add_ontology(self, file: str) -> None:
         """
-        Load an ontology OWL into a Rdflib.Graph
+        Add an ontology OWL, as a read-only rdflib.Graph that is shared with
+        all other transformers in this process that add the same ontology.
         # TODO: is there better way of pre-loading required ontologies?
         """
-        ont = rdflib.Graph()
-        logging.info("Parsing {}".format(file))
-        ont.parse(file, format=rdflib.util.guess_format(file))
+        ont = get_ontology_registry().get_graph(file)
         self.ontologies.append(ont)
-        logging.info("{} parsed with {} triples".format(file, len(ont)))
+        logging.info("{} added with {} triples".format(file, len(ont)))
 
     def load_networkx_graph(self, rdfgraph: rdflib.Graph = None, predicates: Set[URIRef] = None, **kwargs) -> None:
         """
@@ -153,6 +169,7 @@ class RdfTransformer(RdfGraphMixin, Transformer):
 
         """
         logging.info("Loading node attributes from rdflib.Graph into networkx.MultiDiGraph")
+        category_index = get_category_index(rdfgraph)
         with click.progressbar(self.graph.nodes(data=True), label='Progress') as bar:
             for n, data in bar:
                 if 'id' not in data:
@@ -177,7 +194,7 @@ class RdfTransformer(RdfGraphMixin, Transformer):
                         # i.e. predicate corresponds to a property on subject
                         self.add_node_attribute(uriref, key=p, value=o.value)
 
-                categories = infer_category(uriref, rdfgraph)
+                categories = infer_category(uriref, rdfgraph, category_index)
                 logging.debug("Inferred '{}' as category for node '{}'".format(categories, uriref))
                 for category in categories:
                     self.add_node_attribute(uriref, key='category', value=category)
@@ -192,6 +209,11 @@ class ObanRdfTransformer(RdfTransformer):
 
     """
 
+    def __init__(self, source_graph: nx.MultiDiGraph = None):
+        super().__init__(source_graph)
+        self.property_plans = {}
+        self.namespaces = {}
+
     def load_networkx_graph(self, rdfgraph: rdflib.Graph = None, predicates: Set[URIRef] = None, **kwargs) -> None:
         """
         Walk through the rdflib.Graph and load all triples into networkx.MultiDiGraph
@@ -217,11 +239,15 @@ class ObanRdfTransformer(RdfTransformer):
                     if not (isinstance(s, rdflib.term.BNode) and isinstance(o, rdflib.term.BNode)):
                         self.add_edge(s, o, p)
 
-        # get all OBAN.associations
-        associations = rdfgraph.subjects(RDF.type, OBAN.association)
+        # get all OBAN.associations, and their triples in a single scan of the graph
+        associations = set(rdfgraph.subjects(RDF.type, OBAN.association))
+        triples_by_association = defaultdict(list)
+        for s, p, o in rdfgraph:
+            if s in associations:
+                triples_by_association[s].append((p, o))
         logging.info("Loading from rdflib.Graph into networkx.MultiDiGraph")
-        with click.progressbar(list(associations), label='Progress') as bar:
-            for association in bar:
+        with click.progressbar(list(triples_by_association.items()), label='Progress') as bar:
+            for association, triples in bar:
                 edge_attr = defaultdict(list)
                 edge_attr['id'].append(str(association))
 
@@ -230,8 +256,7 @@ class ObanRdfTransformer(RdfTransformer):
                 object = None
                 predicate = None
 
-                # get all triples for association
-                for s, p, o in rdfgraph.triples((association, None, None)):
+                for p, o in triples:
                     if o.startswith(PMID):
                         edge_attr['publications'].append(o)
                     if p in property_mapping or isinstance(o, rdflib.term.Literal):
@@ -250,15 +275,17 @@ class ObanRdfTransformer(RdfTransformer):
                     predicate = DEFAULT_EDGE_LABEL
 
                 if subject and object:
-                    self.add_edge(subject, object, predicate)
-                    for key, values in edge_attr.items():
-                        for value in values:
-                            self.add_edge_attribute(subject, object, predicate, key=key, value=value)
+                    # the CURIEs and edge_label are resolved once, and used for all attributes
+                    s, o, edge_label = self.add_edge(subject, object, predicate)
+                    self.add_edge_attributes(s, o, edge_label, edge_attr)
 
     def uriref(self, identifier: str) -> URIRef:
         """
         Generate a rdflib.URIRef for a given string.
 
+        The namespace for each CURIE prefix is looked up once, and reused
+        for all CURIEs with that prefix.
+
         Parameters
         ----------
         identifier: str
@@ -271,17 +298,94 @@ class ObanRdfTransformer(RdfTransformer):
 
         """
         if identifier in property_mapping:
-            uri = property_mapping[identifier]
-        else:
-            uri = self.prefix_manager.expand(identifier)
-        return URIRef(uri)
+            return URIRef(property_mapping[identifier])
+        if ':' not in identifier or identifier in self.prefix_manager.prefix_map:
+            return URIRef(self.prefix_manager.expand(identifier))
+        prefix, local_id = identifier.split(':', 1)
+        if prefix not in self.namespaces:
+            namespace = self.prefix_manager.expand('{}:'.format(prefix))
+            self.namespaces[prefix] = None if namespace == '{}:'.format(prefix) else namespace
+        namespace = self.namespaces[prefix]
+        if namespace is None:
+            return URIRef(identifier)
+        return URIRef('{}{}'.format(namespace, local_id))
+
+    def get_property_plan(self, key: str) -> Optional[Tuple[URIRef, Callable[[Any], rdflib.term.Literal], bool]]:
+        """
+        Get how a node or edge attribute is serialized, as resolved from the
+        biolink model the first time that `key` is seen.
+
+        Parameters
+        ----------
+        key: str
+            The name of the attribute
+
+        Returns
+        -------
+        Optional[Tuple[rdflib.URIRef, Callable[[Any], rdflib.term.Literal], bool]]
+            The predicate, a function that turns a value into a literal, and whether
+            the property is multivalued; or None if the attribute is not serialized
+
+        """
+        if key in self.property_plans:
+            return self.property_plans[key]
+        plan = None
+        element = self.toolkit.get_element(key)
+        if element is not None and (element.is_a == 'association slot' or element.is_a == 'node property'):
+            if key in property_mapping:
+                predicate = property_mapping[key]
+            else:
+                predicate = URIRef('{}{}'.format(BIOLINK, element.name.replace(' ', '_')))
+            coerce = self.iri_type_literal if element.range == 'iri type' else self.literal
+            multivalued = bool(element.multivalued) or is_property_multivalued.get(key, False)
+            plan = (predicate, coerce, multivalued)
+        self.property_plans[key] = plan
+        return plan
+
+    @staticmethod
+    def literal(value: Any) -> rdflib.term.Literal:
+        """
+        Turn a value into a literal, reusing the literals for recently seen values.
+
+        Parameters
+        ----------
+        value: Any
+            The value
+
+        Returns
+        -------
+        rdflib.term.Literal
+            The literal
+
+        """
+        try:
+            return cached_literal(value)
+        except TypeError:
+            return rdflib.term.Literal(value)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def iri_type_literal(value: str) -> rdflib.term.Literal:
+        """
+        Turn a value of an 'iri type' property, like a category, into a literal for its biolink IRI.
+
+        Parameters
+        ----------
+        value: str
+            The value
+
+        Returns
+        -------
+        rdflib.term.Literal
+            The literal
+
+        """
+        return rdflib.term.Literal(URIRef('{}{}'.format(BIOLINK, ''.join(value.title().split(' ')))))
 
     def save_attribute(self, rdfgraph: rdflib.Graph, object_iri: URIRef, key: str, value: Union[List[str], str]) -> None:
         """
         Saves a node or edge attributes from networkx.MultiDiGraph into rdflib.Graph
 
-        Intended to be used within `ObanRdfTransformer.save()`.
-
         Parameters
         ----------
         rdfgraph: rdflib.Graph
@@ -294,49 +398,89 @@ class ObanRdfTransformer(RdfTransformer):
             The value of the attribute; Can be either a List or just a string
 
         """
-        element = self.toolkit.get_element(key)
-        if element is None:
+        for triple in self.attribute_triples(object_iri, key, value):
+            rdfgraph.add(triple)
+
+    def attribute_triples(self, object_iri: URIRef, key: str, value: Union[List[str], str]) -> Iterator[Tuple[URIRef, URIRef, rdflib.term.Literal]]:
+        """
+        Generate triples for a node or edge attribute from networkx.MultiDiGraph
+
+        Parameters
+        ----------
+        object_iri: rdflib.URIRef
+            IRI of an object in the graph
+        key: str
+            The name of the attribute
+        value: Union[List[str], str]
+            The value of the attribute; Can be either a List or just a string
+
+        Returns
+        -------
+        Iterator[Tuple[rdflib.URIRef, rdflib.URIRef, rdflib.term.Literal]]
+            An iterator over triples
+
+        """
+        plan = self.get_property_plan(key)
+        if plan is None:
             return
-        if element.is_a == 'association slot' or element.is_a == 'node property':
-            if key in property_mapping:
-                key = property_mapping[key]
-            else:
-                key = URIRef('{}{}'.format(BIOLINK, element.name.replace(' ', '_')))
-            if not isinstance(value, (list, tuple, set)):
-                value = [value]
-            for value in value:
-                if element.range == 'iri type':
-                    value = URIRef('{}{}'.format(BIOLINK, ''.join(value.title().split(' '))))
-                rdfgraph.add((object_iri, key, rdflib.term.Literal(value)))
+        predicate, coerce, multivalued = plan
+        if not isinstance(value, (list, tuple, set)):
+            yield object_iri, predicate, coerce(value)
+            return
+        if multivalued and all(isinstance(v, str) for v in value):
+            # a graph holds each triple once, which is not enforced when triples are streamed
+            value = dict.fromkeys(value)
+        for v in value:
+            yield object_iri, predicate, coerce(v)
 
-    def save(self, filename: str = None, output_format: str = "turtle", **kwargs) -> None:
+    def association_id(self, u: str, v: str, data: Dict) -> URIRef:
         """
-        Transform networkx.MultiDiGraph into rdflib.Graph that follow OBAN-style reification and export
-        this graph as a file (TTL, by default).
+        Get the IRI of the association that reifies an edge.
+
+        Edges without an `id` get the identifier from `generate_edge_identifier`,
+        such that the same graph is always saved with the same association IRIs.
 
         Parameters
         ----------
-        filename: str
-            Filename to write to
-        output_format: str
-            The output format; default: 'turtle'
-        kwargs: dict
-            Any additional arguments
+        u: str
+            Subject of the edge
+        v: str
+            Object of the edge
+        data: Dict
+            Attributes of the edge
+
+        Returns
+        -------
+        rdflib.URIRef
+            The IRI of the association
 
         """
-        # Make a new rdflib.Graph() instance to generate RDF triples
-        rdfgraph = rdflib.Graph()
+        if 'id' in data and data['id'] is not None:
+            return URIRef(data['id'])
+        return URIRef(generate_edge_identifier(u, data.get('edge_label'), v, data))
+
+    def triples(self, shard: int = 0, shards: int = 1) -> Iterator[Tuple[URIRef, URIRef, Union[URIRef, rdflib.term.Literal]]]:
+        """
+        Generate triples that follow OBAN-style reification from networkx.MultiDiGraph,
+        one node or edge at a time.
 
-        # Register OBAN URL prefix (http://purl.org/oban/) as `OBAN` in the namespace.
-        rdfgraph.bind('OBAN', str(OBAN))
+        Parameters
+        ----------
+        shard: int
+            The shard to generate triples for
+        shards: int
+            The number of shards that nodes and edges are split into, by a hash of their subject
 
-        # <http://purl.obolibrary.org/obo/RO_0002558> is currently stored as OBO:RO_0002558 rather than RO:0002558
-        # because of the bug in rdflib. See https://github.com/RDFLib/rdflib/issues/632
-        rdfgraph.bind('OBO', str(OBO))
-        rdfgraph.bind('biolink', str(BIOLINK))
+        Returns
+        -------
+        Iterator[Tuple[rdflib.URIRef, rdflib.URIRef, Union[rdflib.URIRef, rdflib.term.Literal]]]
+            An iterator over triples, where all triples of a node or an association are consecutive
 
+        """
         # saving all nodes
         for n, data in self.graph.nodes(data=True):
+            if shards > 1 and get_shard(n, shards) != shard:
+                continue
             if 'iri' not in n:
                 uriRef = self.uriref(n)
             else:
@@ -344,30 +488,216 @@ class ObanRdfTransformer(RdfTransformer):
 
             for key, value in data.items():
                 if key not in ['id', 'iri']:
-                    self.save_attribute(rdfgraph, uriRef, key=key, value=value)
+                    yield from self.attribute_triples(uriRef, key=key, value=value)
 
         # saving all edges
+        association = OBAN.association
+        has_subject, has_predicate, has_object = OBAN.association_has_subject, OBAN.association_has_predicate, OBAN.association_has_object
         for u, v, data in self.graph.edges(data=True):
+            if shards > 1 and get_shard(u, shards) != shard:
+                continue
             if 'relation' not in data:
                 raise Exception('Relation is a required edge property in the biolink model, edge {} --> {}'.format(u, v))
 
-            if 'id' in data and data['id'] is not None:
-                assoc_id = URIRef(data['id'])
-            else:
-                # generating a UUID for association
-                assoc_id = URIRef('urn:uuid:{}'.format(uuid.uuid4()))
+            assoc_id = self.association_id(u, v, data)
 
-            rdfgraph.add((assoc_id, RDF.type, OBAN.association))
-            rdfgraph.add((assoc_id, OBAN.association_has_subject, self.uriref(u)))
-            rdfgraph.add((assoc_id, OBAN.association_has_predicate, self.uriref(data['relation'])))
-            rdfgraph.add((assoc_id, OBAN.association_has_object, self.uriref(v)))
+            yield assoc_id, RDF.type, association
+            yield assoc_id, has_subject, self.uriref(u)
+            yield assoc_id, has_predicate, self.uriref(data['relation'])
+            yield assoc_id, has_object, self.uriref(v)
 
             for key, value in data.items():
                 if key not in ['subject', 'relation', 'object']:
-                    self.save_attribute(rdfgraph, assoc_id, key=key, value=value)
+                    yield from self.attribute_triples(assoc_id, key=key, value=value)
+
+    def save(self, filename: str = None, output_format: str = "turtle", compression: str = None, shards: int = None, workers: int = None, concatenate: bool = True, **kwargs) -> None:
+        """
+        Transform networkx.MultiDiGraph into triples that follow OBAN-style reification and export
+        them as a file (TTL, by default).
+
+        N-Triples ('nt') and Turtle ('turtle') are written as the triples are generated,
+        such that memory use does not grow with the size of the graph. Any other format
+        supported by rdflib is serialized from an rdflib.Graph.
+
+        If `shards` is more than one, then nodes and edges are split into that many
+        shards by a hash of their subject, and each shard is written to its own file
+        by a pool of worker processes. See `save_shards`.
+
+        Parameters
+        ----------
+        filename: str
+            Filename to write to
+        output_format: str
+            The output format; default: 'turtle'
+        compression: str
+            The compression type; 'gz' for gzip. Implied if `filename` ends with '.gz'
+        shards: int
+            The number of shards to write in parallel, for N-Triples and Turtle
+        workers: int
+            The number of worker processes; defaults to `shards`
+        concatenate: bool
+            Whether to concatenate the shards into `filename`, rather than keep a file per shard
+        kwargs: dict
+            Any additional arguments
+
+        """
+        if shards and shards > 1:
+            self.save_shards(filename, output_format, compression, shards, workers, concatenate)
+            return
+
+        if output_format in STREAMING_FORMATS:
+            with RdfWriter(filename, output_format, prefixes=PREFIXES, compression=compression) as writer:
+                count = writer.write(self.triples())
+            logging.info("Wrote {} triples to {}".format(count, filename))
+            return
+
+        # Make a new rdflib.Graph() instance to generate RDF triples
+        rdfgraph = rdflib.Graph()
+        for prefix, iri in PREFIXES.items():
+            rdfgraph.bind(prefix, iri)
+        for triple in self.triples():
+            rdfgraph.add(triple)
 
         # Serialize the graph into the file.
-        rdfgraph.serialize(destination=filename, format=output_format)
+        if compression == 'gz' or filename.endswith('.gz'):
+            with gzip.open(filename, 'wb') as f:
+                rdfgraph.serialize(destination=f, format=output_format)
+        else:
+            rdfgraph.serialize(destination=filename, format=output_format)
+
+    def save_shards(self, filename: str, output_format: str = 'nt', compression: str = None, shards: int = 4, workers: int = None, concatenate: bool = True) -> List[str]:
+        """
+        Export networkx.MultiDiGraph as OBAN-style triples, split into shards
+        that are written in parallel.
+
+        Nodes are assigned to shards by a hash of their id, and edges by a hash
+        of their subject. Each shard is written to its own file by one of
+        `workers` processes, which share the graph by being forked. Where
+        processes cannot be forked, the shards are written one at a time.
+
+        Parameters
+        ----------
+        filename: str
+            Filename to write to
+        output_format: str
+            The output format; either 'nt' or 'turtle'
+        compression: str
+            The compression type; 'gz' for gzip. Implied if `filename` ends with '.gz'
+        shards: int
+            The number of shards
+        workers: int
+            The number of worker processes; defaults to `shards`
+        concatenate: bool
+            Whether to concatenate the shards into `filename`, and remove the files for each shard
+
+        Returns
+        -------
+        List[str]
+            The files written
+
+        """
+        if output_format not in STREAMING_FORMATS:
+            raise ValueError("Only N-Triples and Turtle can be saved in shards, not {}".format(output_format))
+        if compression is None and filename.endswith('.gz'):
+            compression = 'gz'
+        filenames = [get_shard_filename(filename, i) for i in range(shards)]
+        args = [(i, shards, filenames[i], output_format, compression) for i in range(shards)]
+
+        global sharded_transformer
+        sharded_transformer = self
+        try:
+            if 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+                with ProcessPoolExecutor(max_workers=workers or shards, mp_context=context) as executor:
+                    counts = list(executor.map(save_shard, *zip(*args)))
+            else:
+                logging.warning("Cannot fork worker processes; writing {} shards one at a time".format(shards))
+                counts = [save_shard(*x) for x in args]
+        finally:
+            sharded_transformer = None
+        logging.info("Wrote {} triples to {} shards".format(sum(counts), shards))
+
+        if not concatenate:
+            return filenames
+        # gzip members, N-Triples lines and Turtle documents can each be concatenated as they are
+        make_path(filename)
+        with open(filename, 'wb') as output:
+            for shard_filename in filenames:
+                with open(shard_filename, 'rb') as f:
+                    shutil.copyfileobj(f, output)
+                os.remove(shard_filename)
+        return [filename]
+
+
+def get_shard(identifier: str, shards: int) -> int:
+    """
+    Get the shard for an identifier, by a hash that is the same in every process and run.
+
+    Parameters
+    ----------
+    identifier: str
+        The identifier
+    shards: int
+        The number of shards
+
+    Returns
+    -------
+    int
+        The shard, from 0 to `shards` - 1
+
+    """
+    return zlib.crc32(identifier.encode('utf-8')) % shards
+
+
+def get_shard_filename(filename: str, shard: int) -> str:
+    """
+    Get the filename for a shard, by adding the shard number before the file extension.
+
+    Parameters
+    ----------
+    filename: str
+        The filename for all shards
+    shard: int
+        The shard
+
+    Returns
+    -------
+    str
+        The filename for the shard
+
+    """
+    root, extension = os.path.splitext(filename)
+    if extension == '.gz':
+        root, inner_extension = os.path.splitext(root)
+        extension = inner_extension + extension
+    return '{}.part{:03d}{}'.format(root, shard, extension)
+
+
+def save_shard(shard: int, shards: int, filename: str, output_format: str, compression: str) -> int:
+    """
+    Write one shard of `sharded_transformer`, from within a worker process.
+
+    Parameters
+    ----------
+    shard: int
+        The shard
+    shards: int
+        The number of shards
+    filename: str
+        Filename to write the shard to
+    output_format: str
+        The output format; either 'nt' or 'turtle'
+    compression: str
+        The compression type; 'gz' for gzip
+
+    Returns
+    -------
+    int
+        The number of triples written
+
+    """
+    with RdfWriter(filename, output_format, prefixes=PREFIXES, compression=compression) as writer:
+        return writer.write(sharded_transformer.triples(shard, shards))
 
 
 class RdfOwlTransformer(RdfTransformer):
@@ -388,29 +718,31 @@ class RdfOwlTransformer(RdfTransformer):
         kwargs: dict
             Any additional arguments
         """
-        triples = rdfgraph.triples((None, RDFS.subClassOf, None))
+        class_expressions = self.index_class_expressions(rdfgraph)
+
         logging.info("Loading from rdflib.Graph to networkx.MultiDiGraph")
-        with click.progressbar(list(triples), label='Progress') as bar:
-            for s, p, o in bar:
+        with click.progressbar(rdfgraph.subject_objects(RDFS.subClassOf), label='Progress') as bar:
+            for s, o in bar:
                 # ignoring blank nodes
                 if isinstance(s, rdflib.term.BNode):
                     continue
-                pred = None
-                parent = None
-                # TODO: does this block load all relevant bits from an OWL?
                 if isinstance(o, rdflib.term.BNode):
-                    # C SubClassOf R some D
-                    for x in rdfgraph.objects(o, OWL.onProperty):
-                        pred = x
-                    for x in rdfgraph.objects(o, OWL.someValuesFrom):
-                        parent = x
-                    if pred is None or parent is None:
+                    # C SubClassOf R some D, or C SubClassOf (D and R some E)
+                    edges = class_expressions.get(o)
+                    if not edges:
                         logging.warning("Do not know how to handle BNode: {}".format(o))
                         continue
                 else:
                     # C SubClassOf D (C and D are named classes)
-                    pred = p
-                    parent = o
+                    edges = [(RDFS.subClassOf, o)]
+                for pred, parent in edges:
+                    self.add_edge(s, parent, pred)
+
+        # C EquivalentTo (D and R some E) implies C SubClassOf D, and C SubClassOf R some E
+        for s, o in rdfgraph.subject_objects(OWL.equivalentClass):
+            if isinstance(s, rdflib.term.BNode) or not isinstance(o, rdflib.term.BNode):
+                continue
+            for pred, parent in class_expressions.get(o, []):
                 self.add_edge(s, parent, pred)
 
         relations = rdfgraph.subjects(RDF.type, OWL.ObjectProperty)
@@ -423,3 +755,52 @@ class RdfOwlTransformer(RdfTransformer):
                     else:
                         self.add_node_attribute(relation, key=p, value=o)
                 self.add_node_attribute(relation, key='category', value='relation')
+
+    @staticmethod
+    def index_class_expressions(rdfgraph: rdflib.Graph) -> Dict[rdflib.term.BNode, List[Tuple[URIRef, URIRef]]]:
+        """
+        Index the anonymous class expressions in an ontology, with one scan for each
+        of the OWL and RDF predicates involved, rather than queries for every class.
+
+        An existential restriction, R some D, is indexed as the edge (R, D).
+        An intersection, like D and R some E, is indexed as the edges for each of its
+        operands, where a named class D is the edge (rdfs:subClassOf, D). Class
+        expressions of any other kind are not indexed.
+
+        Parameters
+        ----------
+        rdfgraph: rdflib.Graph
+            Graph containing an ontology
+
+        Returns
+        -------
+        Dict[rdflib.term.BNode, List[Tuple[rdflib.URIRef, rdflib.URIRef]]]
+            The predicate and parent of the edges for each blank node that is a class expression
+
+        """
+        on_property = {s: o for s, o in rdfgraph.subject_objects(OWL.onProperty) if isinstance(s, rdflib.term.BNode)}
+        index = {}
+        for s, o in rdfgraph.subject_objects(OWL.someValuesFrom):
+            if s in on_property:
+                index[s] = [(on_property[s], o)]
+
+        first = dict(rdfgraph.subject_objects(RDF.first))
+        rest = dict(rdfgraph.subject_objects(RDF.rest))
+        for s, o in rdfgraph.subject_objects(OWL.intersectionOf):
+            if not isinstance(s, rdflib.term.BNode):
+                continue
+            edges = []
+            seen = set()
+            # walk the RDF list of operands
+            while o in first and o not in seen:
+                seen.add(o)
+                operand = first[o]
+                if not isinstance(operand, rdflib.term.BNode):
+                    edges.append((RDFS.subClassOf, operand))
+                elif operand in index:
+                    edges.extend(index[operand])
+                else:
+                    logging.debug("Ignoring operand {} of intersection {}".format(operand, s))
+                o = rest.get(o)
+            index[s] = edges
+        return index
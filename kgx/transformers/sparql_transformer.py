@@ -4,19 +4,24 @@ import rdflib
 from rdflib import URIRef
 from requests import HTTPError
 import networkx as nx
-from typing import Set, List, Dict, Generator
+from typing import Set, List, Dict, Generator, Iterator
 
 from pystache import render
-from SPARQLWrapper import SPARQLWrapper, JSON, POSTDIRECTLY
 from itertools import zip_longest
+from kgx.checkpoint import Checkpoint
+from kgx.sparql_client import SparqlClient, NodePropertyCache, get_node_property_cache, term_value, term_type
 from kgx.transformers.transformer import Transformer
 from kgx.transformers.rdf_graph_mixin import RdfGraphMixin
+from kgx.utils.kgx_utils import generate_edge_key
 
 
 class SparqlTransformer(RdfGraphMixin, Transformer):
     """
     Transformer for communicating with a SPARQL endpoint.
 
+    Queries are run by a SparqlClient, with at most `workers` queries
+    to the endpoint in flight at a time.
+
     """
 
     # TODO: fix query
@@ -43,10 +48,21 @@ class SparqlTransformer(RdfGraphMixin, Transformer):
 
     """
 
-    def __init__(self, source_graph: nx.MultiDiGraph = None, url: str = None):
+    def __init__(self, source_graph: nx.MultiDiGraph = None, url: str = None, workers: int = 4):
         super().__init__(source_graph)
         # set the URL for SPARQL endpoint
         self.url = url
+        self.workers = workers
+        self._client = None
+
+    @property
+    def client(self) -> SparqlClient:
+        """
+        The client for the SPARQL endpoint, which is created on first use.
+        """
+        if self._client is None or self._client.url != self.url:
+            self._client = SparqlClient(self.url, workers=self.workers)
+        return self._client
 
     def load_networkx_graph(self, rdfgraph: rdflib.Graph = None, predicates: Set[URIRef] = None, **kwargs) -> None:
         """
@@ -65,15 +81,12 @@ class SparqlTransformer(RdfGraphMixin, Transformer):
         for predicate in predicates:
             predicate = '<{}>'.format(predicate)
             q = render(self.edge_query, {'predicate': predicate})
-            results = self.query(q)
-            for r in results:
-                s = r['subject']['value']
-                p = r['predicate']['value']
-                o = r['object']['value']
-                if r['object']['type'] == 'literal':
-                    self.add_node_attribute(s, key=p, value=o)
+            logging.info("Query: {}".format(q))
+            for s, p, o in self.client.select(q, ['subject', 'predicate', 'object']):
+                if term_type(o) == 'literal':
+                    self.add_node_attribute(term_value(s), key=term_value(p), value=term_value(o))
                 else:
-                    self.add_edge(s, o, p)
+                    self.add_edge(term_value(s), term_value(o), term_value(p))
 
     def query(self, q: str) -> Dict:
         """
@@ -90,12 +103,8 @@ class SparqlTransformer(RdfGraphMixin, Transformer):
             A dictionary containing results from the query
 
         """
-        sparql = SPARQLWrapper(self.url)
-        sparql.setQuery(q)
-        sparql.setReturnFormat(JSON)
         logging.info("Query: {}".format(q))
-        results = sparql.query().convert()
-        bindings = results['results']['bindings']
+        bindings = self.client.query(q)
         logging.info("Rows fetched: {}".format(len(bindings)))
         return bindings
 
@@ -149,6 +158,9 @@ class MonarchSparqlTransformer(SparqlTransformer):
 class RedSparqlTransformer(SparqlTransformer):
     """
     Transformer for communicating with Data2Services Knowledge Graph, a.k.a. Translator Red KG.
+
+    Properties of nodes are only fetched once per node, and are kept in a
+    NodePropertyCache, which defaults to the one from `get_node_property_cache()`.
     """
 
     count_query = """
@@ -228,14 +240,28 @@ class RedSparqlTransformer(SparqlTransformer):
 
     IS_DEFINED_BY = "Team Red"
 
-    def __init__(self, source_graph: nx.MultiDiGraph = None, url: str ='http://graphdb.dumontierlab.com/repositories/ncats-red-kg'):
-        super().__init__(source_graph, url)
+    # number of triples per page, and of nodes per query for node properties
+    PAGE_SIZE = 1000
+    NODE_BATCH_SIZE = 10000
+
+    def __init__(self, source_graph: nx.MultiDiGraph = None, url: str ='http://graphdb.dumontierlab.com/repositories/ncats-red-kg', workers: int = 4, node_cache: NodePropertyCache = None):
+        super().__init__(source_graph, url, workers)
         self.rdfgraph = rdflib.Graph()
+        self.node_cache = node_cache if node_cache is not None else get_node_property_cache()
 
     def load_networkx_graph(self, rdfgraph: rdflib.Graph = None, predicates: Set[URIRef] = None, **kwargs: Dict) -> None:
         """
         Fetch all triples using the specified predicates and add them to networkx.MultiDiGraph.
 
+        Pages of triples are fetched concurrently, and the properties for the nodes
+        of one page are fetched while the triples of that page are being added.
+
+        If a 'checkpoint' argument is given, then the nodes and edges loaded so
+        far, and the next offset for each predicate, are periodically appended
+        to a Checkpoint at that path. With a 'resume' argument that is True, a
+        load with the same predicates picks up where the checkpoint left off.
+        The checkpoint is removed once all predicates have been loaded.
+
         Parameters
         ----------
         rdfgraph: rdflib.Graph
@@ -247,42 +273,74 @@ class RedSparqlTransformer(SparqlTransformer):
             Ex: specifying 'limit' argument will limit the number of triples fetched.
 
         """
-        for predicate in predicates:
-            sparql = SPARQLWrapper(self.url)
-            association = '<{}>'.format(predicate)
-            query = render(self.count_query, {'association': association})
-            logging.debug(query)
-            sparql.setQuery(query)
-            sparql.setReturnFormat(JSON)
-            results = sparql.query().convert()
-            count = int(results['results']['bindings'][0]['triples']['value'])
-            logging.info("Expected triples for query: {}".format(count))
-            step = 1000
-            start = 0
-            for i in range(step, count + step, step):
-                end = i
-                query = render(self.edge_query, {'association': association, 'offset': start, 'limit':step})
-                sparql.setQuery(query)
-                logging.debug("Fetching triples with predicate {}".format(predicate))
-                results = sparql.query().convert()
-                node_list = set()
-                for r in results['results']['bindings']:
-                    node_list.add("<{}>".format(r['subject']['value']))
-                    node_list.add("<{}>".format(r['object']['value']))
-                start = end
-                self.load_nodes(node_list)
-                for r in results['results']['bindings']:
-                    s = r['subject']['value']
-                    p = r['predicate']['value']
-                    o = r['object']['value']
-                    self.add_edge(s, o, p)
-                    # TODO: preserve edge properties
-
-                if 'limit' in kwargs and i > kwargs['limit']:
-                    break
-
+        # the next offset for each predicate
+        offsets_by_predicate = {}
+        checkpoint = None
+        if kwargs.get('checkpoint'):
+            signature = '|'.join(str(x) for x in [self.url, sorted(str(x) for x in predicates), self.PAGE_SIZE, kwargs.get('limit')])
+            checkpoint = Checkpoint(kwargs['checkpoint'], self.graph, signature, resume=kwargs.get('resume', False))
+            offsets_by_predicate = checkpoint.restore() or {}
+
+        self.prefetch_ontologies(predicates)
+        try:
+            for predicate in predicates:
+                self.load_predicate(predicate, offsets_by_predicate, checkpoint, kwargs.get('limit'))
+        finally:
+            if checkpoint is not None:
+                # pages loaded before a failure are kept, to resume from
+                checkpoint.close()
+        if checkpoint is not None:
+            checkpoint.complete()
+
+        stats = self.node_cache.stats()
+        logging.info("Node property cache: {} hits, {} misses ({:.1%} hit rate)".format(stats['hits'], stats['misses'], stats['hit_rate']))
         self.categorize()
 
+    def load_predicate(self, predicate: URIRef, offsets_by_predicate: Dict[str, int], checkpoint: Checkpoint = None, limit: int = None) -> None:
+        """
+        Fetch all triples for one predicate, page by page, and add them to networkx.MultiDiGraph.
+
+        Parameters
+        ----------
+        predicate: rdflib.URIRef
+            A predicate
+        offsets_by_predicate: Dict[str, int]
+            The offset of the next page for each predicate, which is updated as pages are added
+        checkpoint: Checkpoint
+            A checkpoint to record added pages with
+        limit: int
+            Stop after the page that goes past this many triples
+
+        """
+        association = '<{}>'.format(predicate)
+        query = render(self.count_query, {'association': association})
+        logging.debug(query)
+        results = list(self.client.select(query, ['triples']))
+        count = int(term_value(results[0][0]))
+        logging.info("Expected triples for query: {}".format(count))
+        offsets = range(offsets_by_predicate.get(str(predicate), 0), count, self.PAGE_SIZE)
+        if limit is not None:
+            offsets = [x for x in offsets if x <= limit]
+        queries = (render(self.edge_query, {'association': association, 'offset': x, 'limit': self.PAGE_SIZE}) for x in offsets)
+        logging.debug("Fetching triples with predicate {}".format(predicate))
+        for offset, rows in zip(offsets, self.client.imap(queries, variables=['subject', 'predicate', 'object'])):
+            node_list = set()
+            for s, p, o in rows:
+                # subjects and objects are IRIs, as serialized in TSV
+                node_list.add(s)
+                node_list.add(o)
+            node_results = self.fetch_nodes(node_list)
+            edges = set()
+            for s, p, o in rows:
+                subject_curie, object_curie, edge_label = self.add_edge(term_value(s), term_value(o), term_value(p))
+                edges.add((subject_curie, object_curie, generate_edge_key(subject_curie, edge_label, object_curie)))
+                # TODO: preserve edge properties
+            for properties in node_results:
+                self.add_node_properties(properties)
+            offsets_by_predicate[str(predicate)] = offset + self.PAGE_SIZE
+            if checkpoint is not None:
+                checkpoint.update(dict(offsets_by_predicate), edges=edges)
+
     def categorize(self) -> None:
         """
         Checks for a node's category property and assigns a category from BioLink Model.
@@ -305,37 +363,82 @@ class RedSparqlTransformer(SparqlTransformer):
             A list of node CURIEs
 
         """
-        node_generator = self._grouper(node_set, 10000)
-        nodes = next(node_generator, None)
-        while nodes is not None:
-            logging.info("Fetching properties for {} nodes".format(len(nodes)))
-            nodes = filter(None, nodes)
-            # TODO: is there a better way to fetch node properties?
-            query = self.get_node_properties_query.format(curie_list=' '.join(nodes))
-            logging.info(query)
-            sparql = SPARQLWrapper(self.url)
-            sparql.setRequestMethod(POSTDIRECTLY)
-            sparql.setMethod("POST")
-            sparql.setQuery(query)
-            sparql.setReturnFormat(JSON)
-            node_results = sparql.query().convert()
-            d = {}
-            for r in node_results['results']['bindings']:
-                if r['object']['type'] != 'bnode':
-                    subject = r['subject']['value']
-                    object = r['object']['value']
-                    predicate = r['predicate']['value']
-                    if predicate.startswith('bl:'):
-                        predicate = predicate.split(':')[1]
-                    if subject not in d:
-                        d[subject] = {}
-                    d[subject][predicate] = object
-
-            for node, attr_dict in d.items():
-                for key, value in attr_dict.items():
-                    self.add_node_attribute(node, key=key, value=value)
-            d.clear()
-            nodes = next(node_generator, None)
+        for properties in self.fetch_nodes(node_set):
+            self.add_node_properties(properties)
+
+    def fetch_nodes(self, node_set: Set) -> Iterator[Dict[str, Dict[str, str]]]:
+        """
+        Start fetching the properties for a set of nodes.
+
+        Nodes that are in the node cache are not fetched again. All other
+        nodes are fetched in groups of `NODE_BATCH_SIZE` nodes, that are
+        fetched concurrently, and their properties are added to the node cache.
+
+        Parameters
+        ----------
+        node_set: list
+            A list of node CURIEs
+
+        Returns
+        -------
+        Iterator[Dict[str, Dict[str, str]]]
+            An iterator over dictionaries, from node IRI to properties, for groups of nodes
+
+        """
+        cached = {}
+        missing = []
+        for node in node_set:
+            if term_type(node) != 'uri':
+                continue
+            found, properties = self.node_cache.get(self.url, node[1:-1])
+            if found:
+                cached[node[1:-1]] = properties
+            else:
+                missing.append(node)
+        groups = [[x for x in nodes if x] for nodes in self._grouper(missing, self.NODE_BATCH_SIZE)]
+
+        def queries():
+            for nodes in groups:
+                logging.info("Fetching properties for {} nodes".format(len(nodes)))
+                # TODO: is there a better way to fetch node properties?
+                query = self.get_node_properties_query.format(curie_list=' '.join(nodes))
+                logging.debug(query)
+                yield query
+        results = self.client.imap(queries(), post=True, variables=['subject', 'predicate', 'object'])
+
+        def properties():
+            if cached:
+                yield cached
+            for nodes, rows in zip(groups, results):
+                d = {x[1:-1]: {} for x in nodes}
+                for s, p, o in rows:
+                    if term_type(o) != 'bnode':
+                        subject = term_value(s)
+                        object = term_value(o)
+                        predicate = term_value(p)
+                        if predicate.startswith('bl:'):
+                            predicate = predicate.split(':')[1]
+                        if subject not in d:
+                            d[subject] = {}
+                        d[subject][predicate] = object
+                for iri, attr_dict in d.items():
+                    self.node_cache.put(self.url, iri, attr_dict)
+                yield d
+        return properties()
+
+    def add_node_properties(self, properties: Dict[str, Dict[str, str]]) -> None:
+        """
+        Add node properties to networkx.MultiDiGraph.
+
+        Parameters
+        ----------
+        properties: Dict[str, Dict[str, str]]
+            A dictionary from node IRI to the properties of the node
+
+        """
+        for node, attr_dict in properties.items():
+            for key, value in attr_dict.items():
+                self.add_node_attribute(node, key=key, value=value)
 
     @staticmethod
     def _grouper(iterable: Set, n, fillvalue: str = None) -> Generator:
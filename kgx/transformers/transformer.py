@@ -1,12 +1,13 @@
 import networkx as nx
-import json, time, click, logging
-from typing import Union, List, Dict, Tuple
+import json, time, click, logging, multiprocessing
+from typing import Union, List, Dict, Tuple, Set
 from networkx.readwrite import json_graph
 
-from kgx.utils.graph_utils import get_category_via_superclass
-from kgx.utils.kgx_utils import get_toolkit, get_biolink_mapping, sentencecase_to_snakecase
+from kgx.utils.graph_utils import get_category_via_superclass, get_closure, frozen_graph
+from kgx.utils.kgx_utils import get_toolkit, get_biolink_mapping, sentencecase_to_snakecase, generate_edge_identifier, get_curie_lookup_service
+from kgx.validator import is_curie
 
-from kgx.mapper import clique_merge
+from kgx.mapper import clique_merge, get_prefix
 
 SimpleValue = Union[List[str], str]
 
@@ -22,6 +23,59 @@ ADDITIONAL_LABELS = {
     'past_medical_history': 'phenotypic_feature'
 }
 
+CATEGORY = 'category'
+SUPERCLASS = 'superclass'
+
+_categorize_graph = None
+
+
+def resolve_category(graph: nx.MultiDiGraph, kind: str, value: str) -> Set[str]:
+    """
+    Resolve a category value, or a superclass of a node, to BioLink Model categories.
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        The graph that value belongs to
+    kind: str
+        Either `CATEGORY`, when value is the category of a node, or `SUPERCLASS`,
+        when value is the superclass of a node that has no category
+    value: str
+        The value to resolve
+
+    Returns
+    -------
+    Set[str]
+        A set of categories
+
+    """
+    if kind == SUPERCLASS:
+        return get_category_via_superclass(graph, value)
+
+    element = get_biolink_mapping(value)
+    if element is not None:
+        # there is a direct mapping to a BioLink Model class
+        logging.debug("Category: {} has a direct mapping to BioLink Model class {}".format(value, element['name']))
+        return {element['name']}
+    if value in ADDITIONAL_LABELS:
+        element = get_biolink_mapping(ADDITIONAL_LABELS[value])
+        if element is not None:
+            # take a look at an additional list of mappings
+            logging.debug("Category: {} mapped over to {} has a direct mapping to BioLink Model class {}".format(value, ADDITIONAL_LABELS[value], element['name']))
+            return {element['name']}
+        return set()
+    # subClassOf traversal required
+    # assuming that the graph contains subClassOf edges
+    # and the node subClassOf x
+    return get_category_via_superclass(graph, value)
+
+
+def _resolve_shard(tasks: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Set[str]]:
+    """
+    Resolve a shard of tasks against the graph inherited from the parent process.
+    """
+    return {task: resolve_category(_categorize_graph, *task) for task in tasks}
+
 
 class Transformer(object):
     """
@@ -77,57 +131,92 @@ class Transformer(object):
         """
         self.filters[key] = value
 
-    def categorize(self):
+    def categorize(self, workers: int = None) -> None:
         """
         Find and validate category for every node in self.graph
+
+        Each distinct category value, and each distinct superclass of nodes
+        without a category, is resolved only once. The results are then
+        written back to all nodes in a single pass.
+
+        Parameters
+        ----------
+        workers: int
+            Number of worker processes to use for resolving categories.
+            Resolution is done in the current process if this is not greater than 1,
+            or if the platform does not support forking worker processes.
+
         """
-        node_to_categories = {}
-        preserve = {}
+        categories = set()
+        superclasses = set()
+        with frozen_graph(self.graph):
+            closure = get_closure(self.graph, ['subclass_of'])
+            for n, data in self.graph.nodes(data=True):
+                if 'category' in data:
+                    categories.update(data['category'])
+                else:
+                    superclasses.update(closure.get_parents(n))
+            logging.info("Resolving {} distinct categories and {} distinct superclasses".format(len(categories), len(superclasses)))
+
+            # ontologies are only consulted for CURIEs without superclasses in the graph
+            roots = {x for x in categories | superclasses if is_curie(x) and not closure.get_parents(x)}
+            if roots:
+                get_curie_lookup_service().prefetch({get_prefix(x) for x in roots})
+
+            tasks = [(CATEGORY, x) for x in categories] + [(SUPERCLASS, x) for x in superclasses]
+            resolved = self._resolve_categories(tasks, workers)
+
         for n, data in self.graph.nodes(data=True):
-            logging.info("Processing node {}".format(n))
             new_categories = set()
             if 'category' in data:
-                categories = data['category']
-                preserve[n] = data['category']
-                for category in categories:
-                    element = get_biolink_mapping(category)
-                    if element is not None:
-                        # there is a direct mapping to a BioLink Model class
-                        mapped_category = element['name']
-                        logging.debug("Category: {} has a direct mapping to BioLink Model class {}".format(category, mapped_category))
-                        new_categories.update([mapped_category])
-                    else:
-                        if category in ADDITIONAL_LABELS:
-                            element = get_biolink_mapping(ADDITIONAL_LABELS[category])
-                            if element is not None:
-                                # take a look at an additional list of mappings
-                                mapped_category = element['name']
-                                logging.debug("Category: {} mapped over to {} has a direct mapping to BioLink Model class {}".format(category, ADDITIONAL_LABELS[category], mapped_category))
-                                new_categories.update([mapped_category])
-                        else:
-                            # subClassOf traversal required
-                            # assuming that the graph contains subClassOf edges
-                            # and the node subClassOf x
-                            new_categories.update(get_category_via_superclass(self.graph, category))
+                for category in data['category']:
+                    new_categories.update(resolved[(CATEGORY, category)])
+                data['_old_category'] = data['category']
             else:
                 # try via subClassOf
-                # subClassOf traversal required
                 # assuming that the graph contains subClassOf edges
                 # and the node subClassOf x
-                logging.info("node doesn't have a category field; trying to infer category via subclass_of axiom")
-                for u, v, edge_data in self.graph.edges(n, data=True):
-                    logging.info("u: {} v: {} data: {}".format(u, v, edge_data))
-                    if edge_data['edge_label'] == 'subclass_of':
-                        curie = v
-                        new_categories.update(get_category_via_superclass(self.graph, curie))
+                for curie in closure.get_parents(n):
+                    new_categories.update(resolved[(SUPERCLASS, curie)])
 
             new_categories = [sentencecase_to_snakecase(x) for x in new_categories]
             if len(new_categories) == 0:
                 new_categories.append('named_thing')
-            logging.debug("Output categories: {}".format(new_categories))
-            node_to_categories[n] = new_categories
-        nx.set_node_attributes(self.graph, node_to_categories, 'category')
-        nx.set_node_attributes(self.graph, preserve, '_old_category')
+            data['category'] = new_categories
+
+    def _resolve_categories(self, tasks: List[Tuple[str, str]], workers: int = None) -> Dict[Tuple[str, str], Set[str]]:
+        """
+        Resolve a list of category values and superclasses to BioLink Model categories.
+
+        Parameters
+        ----------
+        tasks: List[Tuple[str, str]]
+            A list of tuples, where the first element is either `CATEGORY` or `SUPERCLASS`
+            and the second element is the value to resolve
+        workers: int
+            Number of worker processes to use
+
+        Returns
+        -------
+        Dict[Tuple[str, str], Set[str]]
+            A dictionary of each task to its categories
+
+        """
+        global _categorize_graph
+        if workers and workers > 1 and len(tasks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            # ontologies that are being prefetched would not be available to the workers
+            get_curie_lookup_service().wait()
+            shards = [tasks[i::workers] for i in range(workers)]
+            _categorize_graph = self.graph
+            try:
+                with multiprocessing.get_context('fork').Pool(workers) as pool:
+                    resolved = {}
+                    for shard in pool.map(_resolve_shard, shards):
+                        resolved.update(shard)
+            finally:
+                _categorize_graph = None
+            return resolved
+        return {task: resolve_category(self.graph, *task) for task in tasks}
 
     def merge_graphs(self, graphs: List[nx.MultiDiGraph]) -> None:
         """
@@ -267,6 +356,33 @@ class Transformer(object):
                 mapping[edge_key] = edge_data[old_property]
         nx.set_edge_attributes(self.graph, values=mapping, name=old_property)
 
+    def set_edge_ids(self, overwrite: bool = False) -> int:
+        """
+        Set the 'id' of edges to a stable identifier, from a hash of their subject,
+        edge_label, object and identifying qualifiers.
+
+        Saving a graph after setting edge ids gives the same identifiers in every
+        run, such that consecutive releases can be compared, and loaders can
+        skip associations that have not changed.
+
+        Parameters
+        ----------
+        overwrite: bool
+            Whether to replace the 'id' of edges that already have one
+
+        Returns
+        -------
+        int
+            The number of edges whose 'id' was set
+
+        """
+        count = 0
+        for u, v, data in self.graph.edges(data=True):
+            if overwrite or data.get('id') is None:
+                data['id'] = generate_edge_identifier(u, data.get('edge_label'), v, data)
+                count += 1
+        return count
+
     @staticmethod
     def dump(g: nx.MultiDiGraph) -> Dict:
         """
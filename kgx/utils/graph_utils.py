@@ -1,15 +1,313 @@
+import atexit
+import itertools
 import logging
-from typing import List, Set
+import shelve
+import sys
+import weakref
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import List, Set, Tuple, Dict, Optional, Hashable, Callable, Iterator
 import networkx as nx
 import stringcase
-from cachetools import cached
 
 from kgx.mapper import get_prefix
-from kgx.utils.kgx_utils import get_toolkit, get_cache, get_curie_lookup_service
+from kgx.utils.kgx_utils import get_toolkit, get_curie_lookup_service
 from kgx.validator import is_curie
 
 ONTOLOGY_PREFIX_MAP = {}
 ONTOLOGY_GRAPH_CACHE = {}
+CLOSURE_CACHE = weakref.WeakKeyDictionary()
+FROZEN_FINGERPRINTS = weakref.WeakKeyDictionary()
+GRAPH_VERSIONS = weakref.WeakKeyDictionary()
+category_cache = None
+
+
+class SubclassClosure(object):
+    """
+    Memoized ancestor closure over a graph, restricted to a set of relations.
+
+    A parent index (node -> list of parents) is built once, in a single scan
+    over all edges of the graph. Ancestors are then computed bottom-up, where
+    the closure of a node is assembled from the memoized closures of its
+    parents, such that shared ancestors are only ever traversed once.
+
+    Nodes that are part of a cycle are resolved by a plain traversal instead.
+
+    Only a weak reference to the graph is held, such that a closure kept in
+    `CLOSURE_CACHE` does not keep its graph alive.
+    """
+
+    def __init__(self, graph: nx.MultiDiGraph, relations: List[str] = None):
+        self._graph = weakref.ref(graph)
+        self.relations = set(relations) if relations is not None else None
+        self.fingerprint = None
+        self.parents = {}
+        self.closures = {}
+        self.cyclic = set()
+        self.build()
+
+    @property
+    def graph(self) -> Optional[nx.MultiDiGraph]:
+        """
+        The graph for this closure, or None if it was garbage collected.
+        """
+        return self._graph()
+
+    def build(self) -> None:
+        """
+        Build the parent index for self.graph
+        """
+        parents = {}
+        for u, v, data in self.graph.edges(data=True):
+            if self.relations is None or data.get('edge_label') in self.relations:
+                p = parents.setdefault(u, {})
+                # keep the last occurrence of a duplicate parent, which is
+                # the one that is visited first in a depth-first traversal
+                p.pop(v, None)
+                p[v] = None
+        self.parents = {k: list(v) for k, v in parents.items()}
+        self.closures = {}
+        self.cyclic = set()
+        self.fingerprint = graph_fingerprint(self.graph)
+
+    def is_stale(self) -> bool:
+        """
+        Check whether self.graph has changed since the index was built.
+
+        Returns
+        -------
+        bool
+            Whether the index is stale
+
+        """
+        return self.fingerprint != graph_fingerprint(self.graph)
+
+    def get_parents(self, node: str) -> List[str]:
+        """
+        Return all direct parents of a node.
+
+        Parameters
+        ----------
+        node: str
+            node identifier
+
+        Returns
+        -------
+        List[str]
+            A list of parent node(s)
+
+        """
+        return self.parents.get(node, [])
+
+    def get_ancestors(self, node: str) -> List[str]:
+        """
+        Return all ancestors of a node, in depth-first order.
+
+        Parameters
+        ----------
+        node: str
+            node identifier
+
+        Returns
+        -------
+        List[str]
+            A list of ancestor nodes
+
+        """
+        if node in self.closures:
+            return self.closures[node]
+        if node in self.cyclic:
+            self.closures[node] = self._traverse(node)
+            return self.closures[node]
+
+        # iterative post-order traversal; a node is resolved only after all of its parents
+        path = []
+        on_path = {}
+        stack = [node]
+        while stack:
+            n = stack[-1]
+            if n in self.closures or (n in self.cyclic and n not in on_path):
+                stack.pop()
+                continue
+            if n not in on_path:
+                on_path[n] = len(path)
+                path.append(n)
+                pending = [x for x in self.get_parents(n) if x not in self.closures and x not in self.cyclic]
+                back_edges = [on_path[x] for x in pending if x in on_path]
+                if back_edges:
+                    self.cyclic.update(path[min(back_edges):])
+                pending = [x for x in pending if x not in on_path]
+                if pending:
+                    stack.extend(pending)
+                    continue
+            stack.pop()
+            path.pop()
+            del on_path[n]
+            if n not in self.cyclic:
+                self.closures[n] = self._merge(n)
+        return self.get_ancestors(node)
+
+    def _merge(self, node: str) -> List[str]:
+        """
+        Assemble the closure of a node from the closures of its parents.
+
+        Parameters
+        ----------
+        node: str
+            node identifier
+
+        Returns
+        -------
+        List[str]
+            A list of ancestor nodes
+
+        """
+        seen = {node}
+        ancestors = []
+        for parent in reversed(self.get_parents(node)):
+            if parent in seen:
+                continue
+            seen.add(parent)
+            ancestors.append(parent)
+            for x in self.get_ancestors(parent):
+                if x == node:
+                    # node is part of a cycle that goes through an already resolved parent
+                    self.cyclic.add(node)
+                    return self._traverse(node)
+                if x not in seen:
+                    seen.add(x)
+                    ancestors.append(x)
+        return ancestors
+
+    def _traverse(self, node: str) -> List[str]:
+        """
+        Compute the closure of a node by walking the parent index.
+
+        Parameters
+        ----------
+        node: str
+            node identifier
+
+        Returns
+        -------
+        List[str]
+            A list of ancestor nodes
+
+        """
+        seen = {node}
+        ancestors = []
+        nextnodes = list(self.get_parents(node))
+        while len(nextnodes) > 0:
+            nn = nextnodes.pop()
+            if nn not in seen:
+                seen.add(nn)
+                ancestors.append(nn)
+                nextnodes += self.get_parents(nn)
+        return ancestors
+
+
+def graph_fingerprint(graph: nx.MultiDiGraph) -> Tuple[int, int]:
+    """
+    A fingerprint of a graph, used to detect that a graph has changed.
+
+    The number of nodes is taken into account, along with the number of times
+    `invalidate_closure` was called for the graph. Both take constant time,
+    such that a lookup for a single node never scans the graph. Edges added
+    between existing nodes, and changes to node or edge properties, are not
+    detected; they should be followed by a call to `invalidate_closure`.
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        A graph
+
+    Returns
+    -------
+    Tuple[int, int]
+        The number of nodes in the graph, and its version
+
+    """
+    if graph in FROZEN_FINGERPRINTS:
+        return FROZEN_FINGERPRINTS[graph]
+    return graph.number_of_nodes(), GRAPH_VERSIONS.get(graph, 0)
+
+
+@contextmanager
+def frozen_graph(graph: nx.MultiDiGraph) -> Iterator[nx.MultiDiGraph]:
+    """
+    A context in which a graph is assumed not to change, such that its
+    fingerprint is fixed and no lookup rebuilds a closure or discards cached
+    categories midway. Bulk lookups, like those in `Transformer.categorize`,
+    should be done in this context.
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        A graph
+
+    Returns
+    -------
+    Iterator[networkx.MultiDiGraph]
+        The graph
+
+    """
+    if graph in FROZEN_FINGERPRINTS:
+        yield graph
+        return
+    FROZEN_FINGERPRINTS[graph] = graph_fingerprint(graph)
+    try:
+        yield graph
+    finally:
+        FROZEN_FINGERPRINTS.pop(graph, None)
+
+
+def invalidate_closure(graph: nx.MultiDiGraph) -> None:
+    """
+    Discard all SubclassClosure instances, and any cached categories, for a graph.
+    This should follow any change to a graph that does not change its number of
+    nodes, like edges added between existing nodes (see `graph_fingerprint`).
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        A graph
+
+    """
+    GRAPH_VERSIONS[graph] = GRAPH_VERSIONS.get(graph, 0) + 1
+    CLOSURE_CACHE.pop(graph, None)
+    if category_cache is not None:
+        category_cache.invalidate(graph)
+
+
+def get_closure(graph: nx.MultiDiGraph, relations: List[str] = None) -> SubclassClosure:
+    """
+    Get a SubclassClosure for a graph and a set of relations.
+
+    Instances are kept for as long as the graph is alive, and are
+    rebuilt when the graph has changed.
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        Graph to traverse
+    relations: List[str]
+       list of relations
+
+    Returns
+    -------
+    SubclassClosure
+        The closure for the given graph and relations
+
+    """
+    key = frozenset(relations) if relations is not None else None
+    closures = CLOSURE_CACHE.setdefault(graph, {})
+    closure = closures.get(key)
+    if closure is None:
+        closure = SubclassClosure(graph, relations)
+        closures[key] = closure
+    elif closure.is_stale():
+        closure.build()
+    return closure
 
 
 def get_parents(graph: nx.MultiDiGraph, node: str, relations: List[str] = None) -> List[str]:
@@ -31,14 +329,7 @@ def get_parents(graph: nx.MultiDiGraph, node: str, relations: List[str] = None)
         A list of parent node(s)
 
     """
-    parents = []
-    if node in graph:
-        out_edges = [x for x in graph.out_edges(node, data=True)]
-        if relations is None:
-            parents = [x[1] for x in out_edges]
-        else:
-            parents = [x[1] for x in out_edges if x[2]['edge_label'] in relations]
-    return parents
+    return list(get_closure(graph, relations).get_parents(node))
 
 
 def get_ancestors(graph: nx.MultiDiGraph, node: str, relations: List[str] = None) -> List[str]:
@@ -60,22 +351,281 @@ def get_ancestors(graph: nx.MultiDiGraph, node: str, relations: List[str] = None
         A list of ancestor nodes
 
     """
-    seen = []
-    nextnodes = [node]
-    while len(nextnodes) > 0:
-        nn = nextnodes.pop()
-        if nn not in seen:
-            seen.append(nn)
-            nextnodes += get_parents(graph, nn, relations=relations)
-    seen.remove(node)
-    return seen
-
-@cached(get_cache())
+    return list(get_closure(graph, relations).get_ancestors(node))
+
+class CategoryCache(object):
+    """
+    A cache for categories inferred via `get_category_via_superclass`.
+
+    Entries are scoped per graph, and all entries for a graph are discarded
+    once the graph is garbage collected or when its fingerprint (see
+    `graph_fingerprint`) changes, which covers added nodes. Edges added
+    between existing nodes, and changes to node properties, like names or
+    categories, are not detected; they should be followed by a call to
+    `invalidate`, or to `invalidate_closure`.
+    The cache is bounded by an estimate of the memory held by its entries,
+    evicting the least recently used entries first.
+
+    If `path` is set, then entries for graphs that have been registered with
+    a signature (see `set_signature`) are also written to a persistent store
+    at `path`, such that subsequent runs over the same graph can reuse them.
+    """
+
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, path: str = None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.store = None
+        self.entries = OrderedDict()
+        self.scope_keys = defaultdict(set)
+        self.scopes = weakref.WeakKeyDictionary()
+        self.signatures = weakref.WeakKeyDictionary()
+        self.scope_counter = itertools.count()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persistent_hits = 0
+
+    def set_signature(self, graph: nx.MultiDiGraph, signature: str) -> None:
+        """
+        Register a signature for a graph, which identifies the contents of
+        the graph across processes. Only graphs with a signature are persisted.
+
+        Parameters
+        ----------
+        graph: networkx.MultiDiGraph
+            A graph
+        signature: str
+            A string that changes whenever the contents of the graph change
+
+        """
+        self.signatures[graph] = signature
+
+    def get(self, graph: nx.MultiDiGraph, key: Hashable) -> Tuple[bool, Optional[Set[str]]]:
+        """
+        Get the cached value for a key, in the scope of a graph.
+
+        Parameters
+        ----------
+        graph: networkx.MultiDiGraph
+            A graph
+        key: Hashable
+            The key to look up
+
+        Returns
+        -------
+        Tuple[bool, Optional[Set[str]]]
+            Whether the key was found, and the cached value
+
+        """
+        scope = self._get_scope(graph)
+        entry_key = (scope, key)
+        if entry_key in self.entries:
+            self.entries.move_to_end(entry_key)
+            self.hits += 1
+            return True, self.entries[entry_key][0]
+
+        store = self._get_store()
+        if store is not None and graph in self.signatures:
+            store_key = self._store_key(graph, key)
+            if store_key in store:
+                value = store[store_key]
+                self._add(scope, key, value)
+                self.hits += 1
+                self.persistent_hits += 1
+                return True, value
+
+        self.misses += 1
+        return False, None
+
+    def put(self, graph: nx.MultiDiGraph, key: Hashable, value: Set[str]) -> None:
+        """
+        Add a value to the cache, in the scope of a graph.
+
+        Parameters
+        ----------
+        graph: networkx.MultiDiGraph
+            A graph
+        key: Hashable
+            The key
+        value: Set[str]
+            The value
+
+        """
+        scope = self._get_scope(graph)
+        self._add(scope, key, value)
+        store = self._get_store()
+        if store is not None and graph in self.signatures:
+            store[self._store_key(graph, key)] = value
+
+    def invalidate(self, graph: nx.MultiDiGraph) -> None:
+        """
+        Discard all entries for a graph, such as after changing the names or
+        categories of its nodes.
+
+        Parameters
+        ----------
+        graph: networkx.MultiDiGraph
+            A graph
+
+        """
+        if graph in self.scopes:
+            scope, _ = self.scopes[graph]
+            self._drop_scope(scope)
+
+    def clear(self) -> None:
+        """
+        Discard all in-memory entries and reset statistics.
+        """
+        self.entries.clear()
+        self.scope_keys.clear()
+        self.size = 0
+        self.hits = self.misses = self.evictions = self.persistent_hits = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get statistics for this cache.
+
+        Returns
+        -------
+        Dict[str, int]
+            A dictionary with hits, misses, evictions, persistent hits,
+            number of entries and the estimated size in bytes
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'persistent_hits': self.persistent_hits,
+            'entries': len(self.entries),
+            'bytes': self.size,
+        }
+
+    def close(self) -> None:
+        """
+        Close the persistent store, if any.
+        """
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def _get_scope(self, graph: nx.MultiDiGraph) -> int:
+        # other objects, like CurieLookupService, may act as a scope and are assumed to be immutable
+        fingerprint = graph_fingerprint(graph) if isinstance(graph, nx.Graph) else None
+        if graph in self.scopes:
+            scope, previous = self.scopes[graph]
+            if previous != fingerprint:
+                logging.debug("Graph has changed; discarding cached categories")
+                self._drop_scope(scope)
+                self.scopes[graph] = (scope, fingerprint)
+            return scope
+        # a graph keeps its scope for as long as it is alive, so that only one finalizer is registered per graph
+        scope = next(self.scope_counter)
+        self.scopes[graph] = (scope, fingerprint)
+        weakref.finalize(graph, self._drop_scope, scope)
+        return scope
+
+    def _add(self, scope: int, key: Hashable, value: Set[str]) -> None:
+        entry_key = (scope, key)
+        if entry_key in self.entries:
+            self.size -= self.entries.pop(entry_key)[1]
+        nbytes = self._sizeof(key, value)
+        self.entries[entry_key] = (value, nbytes)
+        self.scope_keys[scope].add(key)
+        self.size += nbytes
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            (old_scope, old_key), (_, old_nbytes) = self.entries.popitem(last=False)
+            self.scope_keys[old_scope].discard(old_key)
+            self.size -= old_nbytes
+            self.evictions += 1
+
+    def _drop_scope(self, scope: int) -> None:
+        for key in self.scope_keys.pop(scope, set()):
+            entry = self.entries.pop((scope, key), None)
+            if entry is not None:
+                self.size -= entry[1]
+
+    def _get_store(self) -> Optional[shelve.Shelf]:
+        if self.store is None and self.path:
+            self.store = shelve.open(self.path)
+            atexit.register(self.close)
+        return self.store
+
+    def _store_key(self, graph: nx.MultiDiGraph, key: Hashable) -> str:
+        return '{}|{}'.format(self.signatures[graph], repr(key))
+
+    def _sizeof(self, key: Hashable, value: Set[str]) -> int:
+        nbytes = self.ENTRY_OVERHEAD + sys.getsizeof(value)
+        if isinstance(key, tuple):
+            nbytes += sum(sys.getsizeof(x) for x in key)
+        else:
+            nbytes += sys.getsizeof(key)
+        return nbytes + sum(sys.getsizeof(x) for x in value)
+
+
+def get_category_cache() -> CategoryCache:
+    """
+    Get an instance of CategoryCache.
+    If there no instance defined, then one is instantiated, using the
+    `cache.category` section of the config, and returned.
+
+    Returns
+    -------
+    CategoryCache
+        an instance of CategoryCache
+
+    """
+    global category_cache
+    if category_cache is None:
+        from kgx import get_config
+        cache_config = get_config().get('cache', {}).get('category', {})
+        kwargs = {}
+        if 'max_bytes' in cache_config:
+            kwargs['max_bytes'] = cache_config['max_bytes']
+        if cache_config.get('path'):
+            kwargs['path'] = cache_config['path']
+        category_cache = CategoryCache(**kwargs)
+    return category_cache
+
+
 def get_category_via_superclass(graph: nx.MultiDiGraph, curie: str, load_ontology: bool = True) -> Set[str]:
     """
     Get category for a given CURIE by tracing its superclass, via subclass_of hierarchy,
     and getting the most appropriate category based on the superclass.
 
+    Results are cached per graph, via `get_category_cache()`.
+
+    Parameters
+    ----------
+    graph: networkx.MultiDiGraph
+        Graph to traverse
+    curie: str
+        Input CURIE
+    load_ontology: bool
+        Determines whether to load ontology, based on CURIE prefix, or to simply
+        rely on subclass_of hierarchy from graph
+
+    Returns
+    -------
+    Set[str]
+        A set containing one (or more) category for the given CURIE
+
+    """
+    cache = get_category_cache()
+    found, categories = cache.get(graph, (curie, load_ontology))
+    if not found:
+        categories = _get_category_via_superclass(graph, curie, load_ontology)
+        cache.put(graph, (curie, load_ontology), categories)
+    return set(categories)
+
+
+def _get_category_via_superclass(graph: nx.MultiDiGraph, curie: str, load_ontology: bool = True) -> Set[str]:
+    """
+    Get category for a given CURIE by tracing its superclass, without any caching.
+
     Parameters
     ----------
     graph: networkx.MultiDiGraph
@@ -94,27 +644,78 @@ def get_category_via_superclass(graph: nx.MultiDiGraph, curie: str, load_ontolog
     """
     logging.debug("curie: {}".format(curie))
     new_categories = []
-    toolkit = get_toolkit()
     if is_curie(curie):
         ancestors = get_ancestors(graph, curie, relations=['subclass_of'])
         if len(ancestors) == 0 and load_ontology:
-            cls = get_curie_lookup_service()
-            ontology_graph = cls.ontology_graph
-            new_categories += [x for x in get_category_via_superclass(ontology_graph, curie, False)]
+            new_categories += [x for x in get_category_via_ontology(curie)]
         logging.debug("Ancestors for CURIE {} via subClassOf: {}".format(curie, ancestors))
-        seen = []
-        for anc in ancestors:
-            mapping = toolkit.get_by_mapping(anc)
-            seen.append(anc)
-            if mapping:
-                # there is direct mapping to BioLink Model
-                logging.debug("Ancestor {} mapped to {}".format(anc, mapping))
-                seen_labels = [graph.nodes[x]['name'] for x in seen if 'name' in graph.nodes[x]]
-                new_categories += [x for x in seen_labels]
-                new_categories += [x for x in toolkit.ancestors(mapping)]
-                break
+        new_categories += _get_category_via_ancestors(ancestors, lambda x: graph.nodes[x].get('name'))
     return set(new_categories)
 
+
+def get_category_via_ontology(curie: str) -> Set[str]:
+    """
+    Get category for a given CURIE by tracing its superclass in the ontologies
+    indexed by CurieLookupService.
+
+    Parameters
+    ----------
+    curie: str
+        Input CURIE
+
+    Returns
+    -------
+    Set[str]
+        A set containing one (or more) category for the given CURIE
+
+    """
+    cls = get_curie_lookup_service()
+    cache = get_category_cache()
+    # the checksums of the relevant ontologies are part of the key, such that
+    # persisted categories are not reused once an ontology has been updated
+    key = (curie,) + tuple(x.meta.get('checksum') for x in cls.get_indexes(curie))
+    found, categories = cache.get(cls, key)
+    if not found:
+        ancestors = cls.get_ancestors(curie) if is_curie(curie) else []
+        logging.debug("Ancestors for CURIE {} via ontologies: {}".format(curie, ancestors))
+        categories = set(_get_category_via_ancestors(ancestors, cls.get_label))
+        cache.put(cls, key, categories)
+    return set(categories)
+
+
+def _get_category_via_ancestors(ancestors: List[str], get_label: Callable[[str], Optional[str]]) -> List[str]:
+    """
+    Get categories from the first ancestor that maps to the Biolink Model,
+    along with the labels of all ancestors up to that ancestor.
+
+    Parameters
+    ----------
+    ancestors: List[str]
+        A list of ancestors, nearest first
+    get_label: Callable[[str], Optional[str]]
+        A function that returns the label for a CURIE, if any
+
+    Returns
+    -------
+    List[str]
+        A list of categories
+
+    """
+    toolkit = get_toolkit()
+    new_categories = []
+    seen = []
+    for anc in ancestors:
+        mapping = toolkit.get_by_mapping(anc)
+        seen.append(anc)
+        if mapping:
+            # there is direct mapping to BioLink Model
+            logging.debug("Ancestor {} mapped to {}".format(anc, mapping))
+            seen_labels = [get_label(x) for x in seen]
+            new_categories += [x for x in seen_labels if x is not None]
+            new_categories += [x for x in toolkit.ancestors(mapping)]
+            break
+    return new_categories
+
 def curie_lookup(curie: str) -> str:
     """
     Given a CURIE, find its label.
@@ -139,8 +740,6 @@ def curie_lookup(curie: str) -> str:
     prefix = get_prefix(curie)
     if prefix in ['OIO', 'OWL', 'owl', 'OBO', 'rdfs']:
         name = stringcase.snakecase(curie.split(':', 1)[1])
-    elif curie in cls.curie_map:
-        name = cls.curie_map[curie]
-    elif curie in cls.ontology_graph:
-        name = g.nodes[curie]['name']
+    else:
+        name = cls.get_label(curie)
     return name
@@ -1,3 +1,8 @@
+import hashlib
+import uuid
+from functools import lru_cache
+from typing import Dict
+
 import stringcase
 from bmt import Toolkit
 from cachetools import LRUCache
@@ -21,6 +26,12 @@ cmaps = [
             }
         ] + default_curie_maps
 
+# edge properties that, along with subject, edge_label and object, identify an association
+EDGE_IDENTIFYING_PROPERTIES = [
+    'relation', 'negated', 'qualifiers', 'frequency_qualifier', 'severity_qualifier',
+    'onset_qualifier', 'sex_qualifier', 'stage_qualifier', 'quantifier_qualifier',
+]
+
 
 def camelcase_to_sentencecase(s: str) -> str:
     """
@@ -78,7 +89,12 @@ def contract(uri) -> str:
     """
     We sort the curies to ensure that we take the same item every time
     """
-    curies = contract_uri(str(uri), cmaps=cmaps)
+    return _contract(str(uri))
+
+@lru_cache(maxsize=100_000)
+def _contract(uri: str) -> str:
+    # contract_uri scans every prefix map, so each IRI is only contracted once
+    curies = contract_uri(uri, cmaps=cmaps)
     if len(curies) > 0:
         curies.sort()
         return curies[0]
@@ -143,8 +159,50 @@ def generate_edge_key(s: str, edge_label: str, o: str) -> str:
     """
     return '{}-{}-{}'.format(s, edge_label, o)
 
+def generate_edge_identifier(s: str, edge_label: str, o: str, attributes: Dict = None) -> str:
+    """
+    Generates a stable identifier for an edge, from a hash of its subject,
+    edge_label, object and the identifying properties among its `attributes`,
+    as listed in `EDGE_IDENTIFYING_PROPERTIES`.
+
+    The same association always gets the same identifier, whichever writer
+    saves it and however often it is saved. Other properties, like
+    provided_by or publications, do not change the identifier.
+
+    Parameters
+    ----------
+    s: str
+        Subject
+    edge_label: str
+        Edge label
+    o: str
+        Object
+    attributes: Dict
+        Edge properties
+
+    Returns
+    -------
+    str
+        Edge identifier, as a URN for a UUID
+
+    """
+    parts = [s, edge_label or '', o]
+    if attributes:
+        for key in EDGE_IDENTIFYING_PROPERTIES:
+            value = attributes.get(key)
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = '|'.join(sorted(str(x) for x in value))
+            parts.append('{}={}'.format(key, value))
+    digest = bytearray(hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).digest())
+    # mark the UUID as version 8, for UUIDs in a custom format
+    digest[6] = (digest[6] & 0x0f) | 0x80
+    digest[8] = (digest[8] & 0x3f) | 0x80
+    return 'urn:uuid:{}'.format(uuid.UUID(bytes=bytes(digest)))
+
 def get_biolink_mapping(category):
-    global toolkit
+    toolkit = get_toolkit()
     element = toolkit.get_element(category)
     if element is None:
         element = toolkit.get_element(snakecase_to_sentencecase(category))
@@ -1,11 +1,13 @@
 import logging
-from typing import List, Union
+import weakref
+from typing import List, Union, Dict, Tuple
+import networkx as nx
 import rdflib
 from rdflib import Namespace, URIRef
 from rdflib.namespace import RDF, RDFS, OWL
 from prefixcommons.curie_util import expand_uri
-from kgx.utils.graph_utils import get_category_via_superclass
-from kgx.utils.kgx_utils import get_toolkit, get_curie_lookup_service, make_curie
+from kgx.utils.graph_utils import get_category_via_ontology
+from kgx.utils.kgx_utils import get_toolkit, make_curie
 
 toolkit = get_toolkit()
 m = toolkit.generator.mappings
@@ -134,6 +136,8 @@ is_property_multivalued = {
     'type': False,
 }
 
+iri_mapping_index = None
+
 def process_iri(iri:Union[str, URIRef]) -> str:
     """
     Casts iri to a string, and then checks whether it maps to any pre-defined
@@ -151,21 +155,36 @@ def process_iri(iri:Union[str, URIRef]) -> str:
         A string corresponding to the IRI
 
     """
-    mappings = [
-        predicate_mapping,
-        category_mapping,
-        property_mapping,
-    ]
-
-    for mapping in mappings:
-        for key, value in mapping.items():
-            if iri.lower() == key.lower():
-                return value
+    value = get_iri_mapping_index().get(iri.lower())
+    if value is not None:
+        return value
 
     return make_curie(iri)
 
+def get_iri_mapping_index() -> Dict[str, str]:
+    """
+    Get an index of `predicate_mapping`, `category_mapping` and `property_mapping`,
+    by lower case IRI. Where an IRI is in more than one mapping, the first mapping wins.
+
+    Returns
+    -------
+    Dict[str, str]
+        The mapped value for each lower case IRI
+
+    """
+    global iri_mapping_index
+    if iri_mapping_index is None:
+        index = {}
+        for mapping in [predicate_mapping, category_mapping, property_mapping]:
+            for key, value in mapping.items():
+                index.setdefault(key.lower(), value)
+        iri_mapping_index = index
+    return iri_mapping_index
+
 OBO = Namespace('http://purl.obolibrary.org/obo/')
 
+CATEGORY_INDEX_CACHE = weakref.WeakKeyDictionary()
+
 top_level_terms = {
     OBO.term('CL_0000000'): 'cell',
     OBO.term('UBERON_0001062'): 'anatomical_entity',
@@ -206,7 +225,89 @@ top_level_terms = {
 }
 
 
-def infer_category(iri: URIRef, rdfgraph:rdflib.Graph) -> List[str]:
+def build_category_index(rdfgraph: rdflib.Graph) -> Dict[URIRef, Tuple[Tuple[str, ...], URIRef]]:
+    """
+    Label every class in rdfgraph with the categories of all the
+    `top_level_terms` that it reaches via subClassOf.
+
+    The subClassOf hierarchy is condensed into a DAG of strongly connected
+    components, and categories are propagated from superclasses down to
+    subclasses in a single pass. Each class is also labelled with a root
+    superclass, which is used when none of `top_level_terms` are reachable.
+
+    Parameters
+    ----------
+    rdfgraph: rdflib.Graph
+        A graph to traverse
+
+    Returns
+    -------
+    Dict[URIRef, Tuple[Tuple[str, ...], URIRef]]
+        A dictionary of each class to its categories and its root superclass
+
+    """
+    hierarchy = nx.DiGraph()
+    for s, o in rdfgraph.subject_objects(RDFS.subClassOf):
+        hierarchy.add_edge(s, o)
+    condensed = nx.condensation(hierarchy)
+
+    categories = {}
+    roots = {}
+    interned = {}
+    # superclasses are successors in the condensed graph; visit them before their subclasses
+    for component in reversed(list(nx.topological_sort(condensed))):
+        members = sorted(condensed.nodes[component]['members'])
+        parents = list(condensed.successors(component))
+        component_categories = []
+        for member in members:
+            if member in top_level_terms and top_level_terms[member] not in component_categories:
+                component_categories.append(top_level_terms[member])
+        for parent in parents:
+            for category in categories[parent]:
+                if category not in component_categories:
+                    component_categories.append(category)
+        component_categories = tuple(component_categories)
+        categories[component] = interned.setdefault(component_categories, component_categories)
+        roots[component] = roots[parents[-1]] if parents else members[0]
+
+    index = {}
+    for node, component in condensed.graph['mapping'].items():
+        if condensed.out_degree(component) == 0:
+            # a class without superclasses is its own root
+            index[node] = (categories[component], node)
+        else:
+            index[node] = (categories[component], roots[component])
+    return index
+
+
+def get_category_index(rdfgraph: rdflib.Graph) -> Dict[URIRef, Tuple[Tuple[str, ...], URIRef]]:
+    """
+    Get the category index for rdfgraph, as built by `build_category_index`.
+
+    The index is built once and reused for as long as the number of
+    triples in rdfgraph does not change.
+
+    Parameters
+    ----------
+    rdfgraph: rdflib.Graph
+        A graph to traverse
+
+    Returns
+    -------
+    Dict[URIRef, Tuple[Tuple[str, ...], URIRef]]
+        A dictionary of each class to its categories and its root superclass
+
+    """
+    size = len(rdfgraph)
+    entry = CATEGORY_INDEX_CACHE.get(rdfgraph)
+    if entry is None or entry[0] != size:
+        logging.info("Building category index over {} triples".format(size))
+        entry = (size, build_category_index(rdfgraph))
+        CATEGORY_INDEX_CACHE[rdfgraph] = entry
+    return entry[1]
+
+
+def infer_category(iri: URIRef, rdfgraph:rdflib.Graph, category_index: Dict = None) -> List[str]:
     """
     Infer category for a given iri by traversing rdfgraph.
 
@@ -216,6 +317,8 @@ def infer_category(iri: URIRef, rdfgraph:rdflib.Graph) -> List[str]:
         IRI
     rdfgraph: rdflib.Graph
         A graph to traverse
+    category_index: dict
+        The category index for rdfgraph; If None then `get_category_index` is used
 
     Returns
     -------
@@ -223,14 +326,17 @@ def infer_category(iri: URIRef, rdfgraph:rdflib.Graph) -> List[str]:
         A list of category corresponding to the given IRI
 
     """
-    category = None
-    subj = None
-    closure = list(rdfgraph.transitive_objects(iri, URIRef(RDFS.subClassOf)))
-    category = [top_level_terms[x] for x in closure if x in top_level_terms.keys()]
+    if category_index is None:
+        category_index = get_category_index(rdfgraph)
+    if iri in category_index:
+        category, subj = category_index[iri]
+        category = list(category)
+    else:
+        category = [top_level_terms[iri]] if iri in top_level_terms else []
+        subj = iri
     if category:
         logging.debug("Inferred category as {} based on transitive closure over 'subClassOf' relation".format(category))
     else:
-        subj = closure[-1]
         if subj == iri:
             return category
         subject_curie = make_curie(subj)
@@ -238,6 +344,5 @@ def infer_category(iri: URIRef, rdfgraph:rdflib.Graph) -> List[str]:
             fixed_curie = subject_curie.split(':', 1)[1].split('_', 1)[1]
             logging.warning("Malformed CURIE {} will be fixed to {}".format(subject_curie, fixed_curie))
             subject_curie = fixed_curie
-        cls = get_curie_lookup_service()
-        category = get_category_via_superclass(cls.ontology_graph, subject_curie)
+        category = get_category_via_ontology(subject_curie)
     return category
@@ -1,4 +1,5 @@
 import os
+import pytest
 
 from kgx import PandasTransformer
 
@@ -75,3 +76,53 @@ def test_read_achive():
     pt3 = PandasTransformer()
     pt3.parse(tar_bz_file)
     assert not pt3.is_empty()
+
+def test_neo4j_import_roundtrip():
+    """
+    Export a graph as CSVs for neo4j-admin import, and read them back
+    """
+    t = PandasTransformer()
+    t.parse(os.path.join(resource_dir, "semmed/semmeddb_test_nodes.csv"))
+    t.parse(os.path.join(resource_dir, "semmed/semmeddb_test_edges.csv"))
+    t.graph.nodes['UMLS:C0061133']['negated'] = True
+
+    output = os.path.join(target_dir, 'neo4j_import')
+    filenames = t.save_neo4j_import(output)
+    with open(filenames[0]) as f:
+        header = f.readline().strip().split(',')
+    assert header[:2] == ['id:ID', ':LABEL']
+    assert 'category:string[]' in header
+
+    t2 = PandasTransformer()
+    t2.parse_neo4j_import(filenames)
+    assert t2.graph.number_of_nodes() == t.graph.number_of_nodes()
+    assert t2.graph.number_of_edges() == t.graph.number_of_edges()
+    for n, data in t.graph.nodes(data=True):
+        assert t2.graph.nodes[n] == data
+    for s, o, key, data in t.graph.edges(keys=True, data=True):
+        assert t2.graph.edges[s, o, key] == data
+
+def test_neo4j_import_shards():
+    """
+    Labels that sanitize to the same file name are written to different files,
+    and arrays with values that contain the array delimiter are rejected
+    """
+    t = PandasTransformer()
+    t.graph.add_node('A:1', id='A:1', category=['gene'])
+    t.graph.add_node('A:2', id='A:2', category=['gene'])
+    t.graph.add_edge('A:1', 'A:2', subject='A:1', object='A:2', edge_label='part of', relation='BFO:0000050')
+    t.graph.add_edge('A:1', 'A:2', subject='A:1', object='A:2', edge_label='part/of', relation='BFO:0000050')
+    t.graph.add_edge('A:2', 'A:1', subject='A:2', object='A:1', edge_label='Part_of', relation='BFO:0000050')
+
+    output = os.path.join(target_dir, 'neo4j_import_shards')
+    filenames = t.save_neo4j_import(output)
+    assert len(filenames) == len(set(filenames)) == 4
+    assert os.path.join(output, 'edges_part_of.csv') in filenames
+
+    t2 = PandasTransformer()
+    t2.parse_neo4j_import(filenames)
+    assert sorted(label for s, o, label in t2.graph.edges(data='edge_label')) == ['Part_of', 'part of', 'part/of']
+
+    t.graph.nodes['A:1']['synonym'] = ['a;b']
+    with pytest.raises(Exception):
+        t.save_neo4j_import(output)
@@ -0,0 +1,125 @@
+import os
+
+import networkx as nx
+
+import gc
+import weakref
+
+from kgx.utils.graph_utils import get_parents, get_ancestors, invalidate_closure, frozen_graph, CategoryCache
+
+cwd = os.path.abspath(os.path.dirname(__file__))
+target_dir = os.path.join(cwd, 'target')
+
+
+def get_graph():
+    graph = nx.MultiDiGraph()
+    graph.add_edge('HP:0000001', 'HP:0000002', edge_label='subclass_of')
+    graph.add_edge('HP:0000001', 'HP:0000003', edge_label='subclass_of')
+    graph.add_edge('HP:0000002', 'HP:0000004', edge_label='subclass_of')
+    graph.add_edge('HP:0000003', 'HP:0000004', edge_label='subclass_of')
+    graph.add_edge('HP:0000004', 'HP:0000005', edge_label='part_of')
+    graph.add_edge('HP:0000006', 'HP:0000007', edge_label='subclass_of')
+    graph.add_edge('HP:0000007', 'HP:0000006', edge_label='subclass_of')
+    return graph
+
+def test_get_parents():
+    """
+    Test for getting parents filtered by relations
+    """
+    graph = get_graph()
+    assert get_parents(graph, 'HP:0000001', relations=['subclass_of']) == ['HP:0000002', 'HP:0000003']
+    assert get_parents(graph, 'HP:0000004', relations=['subclass_of']) == []
+    assert get_parents(graph, 'HP:0000004') == ['HP:0000005']
+    assert get_parents(graph, 'HP:9999999') == []
+
+def test_get_ancestors():
+    """
+    Test for getting ancestors over a diamond and a cycle
+    """
+    graph = get_graph()
+    assert get_ancestors(graph, 'HP:0000001', relations=['subclass_of']) == ['HP:0000003', 'HP:0000004', 'HP:0000002']
+    assert get_ancestors(graph, 'HP:0000001') == ['HP:0000003', 'HP:0000004', 'HP:0000005', 'HP:0000002']
+    assert get_ancestors(graph, 'HP:0000006', relations=['subclass_of']) == ['HP:0000007']
+    assert get_ancestors(graph, 'HP:0000007', relations=['subclass_of']) == ['HP:0000006']
+
+    graph.add_edge('HP:0000005', 'HP:0000008', edge_label='part_of')
+    assert get_ancestors(graph, 'HP:0000004') == ['HP:0000005', 'HP:0000008']
+    graph.add_edge('HP:0000004', 'HP:0000006', edge_label='subclass_of')
+    invalidate_closure(graph)
+    assert get_ancestors(graph, 'HP:0000004', relations=['subclass_of']) == ['HP:0000006', 'HP:0000007']
+
+    graph.edges['HP:0000004', 'HP:0000006', 0]['edge_label'] = 'part_of'
+    invalidate_closure(graph)
+    assert get_ancestors(graph, 'HP:0000004', relations=['subclass_of']) == []
+
+def test_closure_cache():
+    """
+    Test that cached closures follow new nodes, and new edges between existing nodes
+    once invalidated, and do not keep their graph alive
+    """
+    graph = nx.MultiDiGraph()
+    graph.add_edge('a', 'b', edge_label='subclass_of')
+    graph.add_node('c')
+    assert get_ancestors(graph, 'a') == ['b']
+    graph.add_edge('b', 'c', edge_label='subclass_of')
+    assert get_ancestors(graph, 'a') == ['b']
+    invalidate_closure(graph)
+    assert get_ancestors(graph, 'a') == ['b', 'c']
+
+    with frozen_graph(graph):
+        graph.add_edge('c', 'd', edge_label='subclass_of')
+        assert get_ancestors(graph, 'a') == ['b', 'c']
+    assert get_ancestors(graph, 'a') == ['b', 'c', 'd']
+
+    ref = weakref.ref(graph)
+    del graph
+    gc.collect()
+    assert ref() is None
+
+def test_category_cache():
+    """
+    Test for scoping, invalidation, eviction and persistence of CategoryCache
+    """
+    g1 = get_graph()
+    g2 = get_graph()
+    cache = CategoryCache(max_bytes=10000)
+    cache.put(g1, ('HP:0000001', True), {'phenotypic_feature'})
+    assert cache.get(g1, ('HP:0000001', True)) == (True, {'phenotypic_feature'})
+    assert cache.get(g2, ('HP:0000001', True)) == (False, None)
+
+    scope = cache.scopes[g1][0]
+    g1.add_node('HP:0000009')
+    assert cache.get(g1, ('HP:0000001', True)) == (False, None)
+    cache.put(g1, ('HP:0000001', True), {'phenotypic_feature'})
+    g1.add_edge('HP:0000005', 'HP:0000009', edge_label='subclass_of')
+    invalidate_closure(g1)
+    assert cache.get(g1, ('HP:0000001', True)) == (False, None)
+    cache.put(g1, ('HP:0000001', True), {'phenotypic_feature'})
+    g1.nodes['HP:0000009']['name'] = 'disease'
+    cache.invalidate(g1)
+    assert cache.get(g1, ('HP:0000001', True)) == (False, None)
+    cache.put(g1, ('HP:0000001', True), {'disease'})
+    assert cache.get(g1, ('HP:0000001', True)) == (True, {'disease'})
+    # a graph keeps its scope, and its finalizer, across changes
+    assert cache.scopes[g1][0] == scope
+
+    for i in range(100):
+        cache.put(g2, ('HP:{}'.format(i), True), {'phenotypic_feature'})
+    stats = cache.stats()
+    assert stats['bytes'] <= 10000
+    assert stats['evictions'] > 0
+    assert stats['hits'] == 2 and stats['misses'] == 4
+
+    os.makedirs(target_dir, exist_ok=True)
+    path = os.path.join(target_dir, 'category_cache')
+    cache = CategoryCache(path=path)
+    cache.set_signature(g1, 'hp-test')
+    cache.put(g1, ('HP:0000001', False), {'phenotypic_feature'})
+    cache.close()
+
+    cache = CategoryCache(path=path)
+    g3 = get_graph()
+    cache.set_signature(g3, 'hp-test')
+    assert cache.get(g3, ('HP:0000001', False)) == (True, {'phenotypic_feature'})
+    assert cache.stats()['persistent_hits'] == 1
+    cache.close()
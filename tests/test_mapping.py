@@ -47,3 +47,52 @@ def curie(n):
     return "X:{}".format(n)
 def mapped_curie(n):
     return "Y:{}".format(n)
+
+def test_relabel_nodes_inplace():
+    """
+    relabel a node onto an existing node and check that attributes and edges are merged
+    """
+    G = nx.MultiDiGraph()
+    G.add_node('a', synonym=['A'])
+    G.add_node('b', synonym=['B'], name='b')
+    G.add_node('c', synonym=['C'], name='c')
+    G.add_node('d', synonym=['D'])
+    G.add_edge('a', 'c', key='a-related_to-c', edge_label='related_to')
+    G.add_edge('c', 'd', key='c-related_to-d', edge_label='related_to')
+    G.add_edge('a', 'b', key='a-related_to-c', edge_label='related_to', publications=['PMID:1'])
+
+    node_count, edge_count = mapper.relabel_nodes_inplace(G, {'c': 'b', 'x': 'y'})
+    assert (node_count, edge_count) == (1, 2)
+    assert 'c' not in G
+    assert G.nodes['b']['synonym'] == ['B', 'C']
+    assert G.nodes['b']['name'] == 'b'
+    assert G.has_edge('b', 'd', key='c-related_to-d')
+    assert G.number_of_edges('a', 'b') == 1
+    assert G.edges['a', 'b', 'a-related_to-c']['publications'] == ['PMID:1']
+
+def test_relabel_nodes_chain_and_swap():
+    """
+    relabel with chained and swapped mappings, which must be applied all at once
+    """
+    G = nx.MultiDiGraph()
+    G.add_node('a', name='a')
+    G.add_node('b', name='b')
+    G.add_node('c', name='c')
+    G.add_edge('a', 'b', key='a-b')
+    G.add_edge('b', 'c', key='b-c')
+
+    chained = G.copy()
+    node_count, edge_count = mapper.relabel_nodes_inplace(chained, {'a': 'b', 'b': 'c'})
+    assert (node_count, edge_count) == (2, 2)
+    assert set(chained.nodes()) == {'b', 'c'}
+    assert chained.nodes['b']['name'] == 'a'
+    assert chained.has_edge('b', 'c', key='a-b')
+    assert chained.has_edge('c', 'c', key='b-c')
+
+    swapped = G.copy()
+    g = mapper.relabel_nodes(swapped, {'a': 'b', 'b': 'a'})
+    assert g is swapped
+    assert swapped.nodes['a']['name'] == 'b'
+    assert swapped.nodes['b']['name'] == 'a'
+    assert swapped.has_edge('b', 'a', key='a-b')
+    assert swapped.has_edge('a', 'c', key='b-c')
@@ -1,6 +1,7 @@
 import os
 
 import pytest
+import networkx as nx
 
 from kgx import NeoTransformer, PandasTransformer, JsonTransformer
 
@@ -12,6 +13,80 @@ cwd = os.path.abspath(os.path.dirname(__file__))
 resource_dir = os.path.join(cwd, 'resources')
 target_dir = os.path.join(cwd, 'target')
 
+
+class FakeSession(object):
+    """
+    A session of FakeDriver, that runs every query through its driver
+    """
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute_read(self, fn, query, params):
+        return self.driver.run(query, params)
+
+    def execute_write(self, fn, query, params):
+        return self.driver.run(query, params)
+
+    def begin_transaction(self):
+        return FakeTransaction(self.driver)
+
+
+class FakeTransaction(object):
+    """
+    An explicit transaction of FakeDriver, that runs every query through its driver
+    """
+    def __init__(self, driver):
+        self.driver = driver
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def run(self, query, params):
+        return self.driver.run(query, params)
+
+
+class FakeDriver(object):
+    """
+    A stand-in for a Neo4j driver, that records all queries along with their
+    parameters, and answers them with `respond`. Before each query, `fail` is
+    called with the query and its parameters, and may raise to simulate a failure.
+    """
+    def __init__(self, respond=None, fail=None):
+        self.respond = respond
+        self.fail = fail
+        self.queries = []
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+    def run(self, query, params):
+        if self.fail is not None:
+            self.fail(query, params)
+        self.queries.append((query, params))
+        return self.respond(query, params) if self.respond is not None else []
+
+    def close(self):
+        pass
+
+
+def get_transformer(graph=None, cls=NeoTransformer, driver=None, **attributes):
+    """
+    Build a NeoTransformer, or an instance of a subclass, that talks to a FakeDriver rather than to Neo4j
+    """
+    nt = cls(graph, host='localhost', port='7687', driver=driver if driver is not None else FakeDriver())
+    for key, value in attributes.items():
+        setattr(nt, key, value)
+    return nt
+
 def test_csv_to_neo_load():
     """
     load csv to neo4j test
@@ -19,7 +94,7 @@ def test_csv_to_neo_load():
     pt = PandasTransformer()
     pt.parse(os.path.join(resource_dir, "cm_nodes.csv"))
     pt.parse(os.path.join(resource_dir, "cm_edges.csv"))
-    nt = NeoTransformer(pt.graph, host='localhost', port='7474', username='neo4j', password='test')
+    nt = NeoTransformer(pt.graph, host='localhost', port='7687', username='neo4j', password='test')
     nt.save_with_unwind()
     nt.neo4j_report()
 
@@ -27,7 +102,7 @@ def test_neo_to_graph_transform():
     """
     load from neo4j and transform to nx graph
     """
-    nt = NeoTransformer(host='localhost', port='7474', username='neo4j', password='test')
+    nt = NeoTransformer(host='localhost', port='7687', username='neo4j', password='test')
     nt.load()
     nt.report()
     t = PandasTransformer(nt.graph)
@@ -40,7 +115,7 @@ def test_neo_to_graph_upload():
     jt = JsonTransformer()
     jt.parse('resources/robodb2.json')
 
-    nt = NeoTransformer(jt.graph, host='localhost', port='7474', username='neo4j', password='test')
+    nt = NeoTransformer(jt.graph, host='localhost', port='7687', username='neo4j', password='test')
     nt.save_with_unwind()
     nt.neo4j_report()
 
@@ -115,3 +190,256 @@ def test_neo_to_graph_download():
 
         if stop_after is not None and G.number_of_edges() > stop_after:
             break
+
+def test_neo_concurrent_pages():
+    """
+    concurrent download of partitions, with pages handed to a single consumer
+    """
+    class PartitionedTransformer(NeoTransformer):
+        def get_partitions(self, workers, is_directed=True):
+            return [('query', {'partition': i}) for i in range(5)]
+
+    records = {i: get_edge_records(25, i) for i in range(5)}
+    nt = get_transformer(cls=PartitionedTransformer, driver=FakeDriver(respond=respond_with(records)))
+    pages = list(nt.get_pages_concurrently(page_size=10, workers=3))
+    assert len(pages) == 15
+    assert sorted(NeoTransformer.get_cursor(x) for page in pages for x in page) == sorted(NeoTransformer.get_cursor(x) for p in range(5) for x in records[p])
+
+    # the consumer may stop early without the readers blocking
+    pages = nt.get_pages_concurrently(page_size=1, workers=2)
+    next(pages)
+    pages.close()
+
+    # partitions are read from after, and report, their last records
+    progress = {0: {'count': 20, 'after': NeoTransformer.get_cursor(records[0][19])}, 3: {'count': 25, 'after': NeoTransformer.get_cursor(records[3][24])}}
+    pages = list(nt.get_pages_concurrently(page_size=10, workers=3, progress=progress))
+    assert sorted(NeoTransformer.get_cursor(x) for page in pages for x in page) == sorted(NeoTransformer.get_cursor(x) for p in [0, 1, 2, 4] for x in records[p][20 if p == 0 else 0:])
+    assert progress == {p: {'count': 25, 'after': NeoTransformer.get_cursor(records[p][24])} for p in range(5)}
+
+class FakeEntity(dict):
+    """
+    A node or relationship of a record, with its properties and an element id
+    """
+    def __init__(self, element_id, **properties):
+        super(FakeEntity, self).__init__(properties)
+        self.element_id = element_id
+
+def get_edge_records(count, partition=0):
+    """
+    Records of edges, as returned by the query from `NeoTransformer.get_edge_query`
+    """
+    records = []
+    for i in range(count):
+        s = FakeEntity(f'4:{partition}:{i}', id=f'HGNC:{partition}:{i:03d}')
+        p = FakeEntity(f'5:{partition}:{i}')
+        records.append({'s': s, 'p': p, 'o': s})
+    return records
+
+def respond_with(records, interrupt=None):
+    """
+    Answer edge queries from a list of records, or from a dictionary of lists by
+    the partition in `$partition`, in the order of their identity, after the cursor in `$after`.
+    With `interrupt`, the connection is lost after that many records have been streamed.
+    """
+    from neo4j.exceptions import ServiceUnavailable
+
+    def stream(selected):
+        yield from selected[:interrupt]
+        raise ServiceUnavailable('connection lost')
+
+    def respond(query, params):
+        after = params['after']
+        selected = records[params['partition']] if 'partition' in params else records
+        ordered = sorted(selected, key=NeoTransformer.get_cursor)
+        selected = [r for r in ordered if after is None or NeoTransformer.get_cursor(r) > after]
+        selected = selected[params['skip']:params['skip'] + params['limit'] if 'limit' in params else None]
+        return selected if interrupt is None else stream(selected)
+    return respond
+
+def test_neo_get_pages():
+    """
+    pages are streamed from a single query, resumed after the identity of a record, and errors are raised
+    """
+    from neo4j.exceptions import ServiceUnavailable
+
+    records = get_edge_records(25)
+    nt = get_transformer(driver=FakeDriver(respond=respond_with(records)))
+    query = nt.get_edge_query(limit=True, cursor=True)
+    assert 'ORDER BY s.id, elementId(s), elementId(p)' in query
+    pages = list(nt.get_pages(query, start=3, end=24, page_size=5))
+    assert [len(x) for x in pages] == [5, 5, 5, 5, 1]
+    assert [x for page in pages for x in page] == records[3:24]
+    assert [(p['skip'], p['limit'], p['after']) for q, p in nt.driver.queries] == [(3, 21, None)]
+
+    nt.driver.queries = []
+    query = nt.get_edge_query(cursor=True)
+    pages = list(nt.get_pages(query, page_size=10, after=NeoTransformer.get_cursor(records[9])))
+    assert [x for page in pages for x in page] == records[10:]
+    assert [p['after'] for q, p in nt.driver.queries] == [['HGNC:0:009', '4:0:9', '5:0:9']]
+
+    nt = get_transformer(driver=FakeDriver(respond=respond_with(records, interrupt=15)))
+    pages = nt.get_pages(query, page_size=10)
+    assert len(next(pages)) == 10
+    with pytest.raises(ServiceUnavailable):
+        next(pages)
+
+def test_neo_partitions():
+    """
+    edges of each type are partitioned by disjoint ranges of the indexed id of their subject
+    """
+    from neo4j import Record
+
+    ids = sorted(f'HGNC:{i}' for i in range(10))
+
+    def respond(query, params):
+        if 'db.relationshipTypes' in query:
+            return [Record({'label': x}) for x in edge_labels]
+        if 'COUNT(n)' in query:
+            return [Record({'count': len(ids)})]
+        if 'ORDER BY n.id' in query:
+            return [Record({'id': ids[params['skip']]})]
+        # whether there are nodes without an indexed id
+        return unindexed
+
+    edge_labels = ['interacts_with']
+    unindexed = []
+    nt = get_transformer(driver=FakeDriver(respond=respond))
+    partitions = nt.get_partitions(3)
+    assert [p for q, p in partitions] == [
+        {'lower': '', 'upper': ids[3]}, {'lower': ids[3], 'upper': ids[6]}, {'lower': ids[6]}
+    ]
+    assert 's.id >= $lower AND s.id < $upper' in partitions[0][0]
+    assert 's.id < $upper' not in partitions[2][0]
+    assert not any('id(p)' in q for q, p in partitions)
+
+    unindexed = [Record({'n': None})]
+    partitions = nt.get_partitions(2)
+    assert len(partitions) == 3
+    assert "NOT coalesce(s:`named_thing` AND s.id >= '', false)" in partitions[-1][0]
+
+    # each type is partitioned by the same ranges
+    edge_labels = ['interacts_with', 'part_of']
+    unindexed = []
+    partitions = nt.get_partitions(3)
+    assert len(partitions) == 6
+    assert all('[p:`interacts_with`]' in q for q, p in partitions[:3])
+    assert all('[p:`part_of`]' in q for q, p in partitions[3:])
+    assert [p for q, p in partitions[:3]] == [p for q, p in partitions[3:]]
+
+def test_neo_resume():
+    """
+    resume an interrupted download from its checkpoint, after the last record that was loaded
+    """
+    from neo4j.exceptions import ServiceUnavailable
+
+    class RecordTransformer(NeoTransformer):
+        def count(self, is_directed=True):
+            return 50
+
+        def load_edges(self, edges):
+            keys = []
+            for record in edges:
+                s, o = record['s'].element_id, record['p'].element_id
+                self.graph.add_edge(s, o, key='interacts_with', subject=s, object=o, edge_label='interacts_with')
+                keys.append((s, o, 'interacts_with'))
+            return keys
+
+    records = get_edge_records(50)
+    checkpoint = os.path.join(target_dir, 'neo_checkpoint.jsonl')
+    nt = get_transformer(cls=RecordTransformer, driver=FakeDriver(respond=respond_with(records, interrupt=25)))
+    with pytest.raises(ServiceUnavailable):
+        nt.load(page_size=10, checkpoint=checkpoint)
+    assert nt.graph.number_of_edges() == 20
+
+    # without resume, the download starts over
+    nt = get_transformer(cls=RecordTransformer, driver=FakeDriver(respond=respond_with(records, interrupt=25)))
+    with pytest.raises(ServiceUnavailable):
+        nt.load(page_size=10, checkpoint=checkpoint)
+    assert nt.driver.queries[0][1]['after'] is None
+
+    nt = get_transformer(cls=RecordTransformer, driver=FakeDriver(respond=respond_with(records)))
+    nt.load(page_size=10, checkpoint=checkpoint, resume=True)
+    assert nt.driver.queries[0][1]['after'] == ['HGNC:0:019', '4:0:19', '5:0:19']
+    assert nt.graph.number_of_edges() == 50
+    assert nt.graph.edges['4:0:0', '5:0:0', 'interacts_with']['edge_label'] == 'interacts_with'
+    # the checkpoint of a finished download is removed
+    assert not os.path.exists(checkpoint)
+
+def test_neo_batched_unwind():
+    """
+    batched upload, with edges partitioned by subject and transient errors retried
+    """
+    from neo4j import Record
+    from neo4j.exceptions import TransientError
+
+    attempts = []
+
+    def fail(query, params):
+        attempts.append(query)
+        if len(attempts) == 1:
+            raise TransientError('deadlock')
+
+    class BatchTransformer(NeoTransformer):
+        RETRY_BACKOFF = 0
+
+    def respond(query, params):
+        # every node is created
+        return [Record({'id': x['id']}) for x in params.get('nodes', [])]
+
+    nt = get_transformer(cls=BatchTransformer, driver=FakeDriver(respond=respond, fail=fail))
+    nt.save_node_unwind({'gene': [{'id': f'HGNC:{i}'} for i in range(25)]}, batch_size=10, workers=2)
+    batches = [p for q, p in nt.driver.queries]
+    assert sorted(len(x['nodes']) for x in batches if 'nodes' in x) == [5, 10, 10]
+    assert sum(len(x['ids']) for x in batches if 'ids' in x) == 25
+
+    nt.driver.queries = []
+    edges = [{'subject': f'HGNC:{i % 7}', 'object': f'HGNC:{i}', 'edge_label': 'interacts_with'} for i in range(100)]
+    nt.save_edge_unwind({'interacts_with': edges}, batch_size=10, workers=3)
+    batches = [p for q, p in nt.driver.queries]
+    assert sum(len(x['edges']) for x in batches) == 100
+    for batch in batches:
+        assert len({hash(x['subject']) % 3 for x in batch['edges']}) == 1
+
+def test_neo_existing_node_labels():
+    """
+    category labels are only set on nodes that the merge created
+    """
+    from neo4j import Record
+
+    def respond(query, params):
+        # only nodes with an even number are new
+        return [Record({'id': x['id']}) for x in params.get('nodes', []) if int(x['id'].split(':')[1]) % 2 == 0]
+
+    nt = get_transformer(driver=FakeDriver(respond=respond))
+    nt.save_node_unwind({'gene': [{'id': f'HGNC:{i}'} for i in range(10)]}, batch_size=4)
+    queries = nt.driver.queries
+    assert all('WHERE created' in q for q, p in queries if 'nodes' in p)
+    ids = [i for q, p in queries if 'ids' in p for i in p['ids']]
+    assert sorted(ids) == [f'HGNC:{i}' for i in range(0, 10, 2)]
+
+def test_neo_fresh_load():
+    """
+    fresh load, with deduplicated input and constraints created after the data
+    """
+    g = nx.MultiDiGraph()
+    g.add_node('HGNC:1', id='HGNC:1', category=['gene'])
+    g.add_node('HGNC:2', id='HGNC:2', category=['gene'])
+    g.add_edge('HGNC:1', 'HGNC:2', subject='HGNC:1', object='HGNC:2', edge_label='interacts_with', relation='RO:0002434')
+    g.add_edge('HGNC:1', 'HGNC:2', subject='HGNC:1', object='HGNC:2', edge_label='interacts_with', relation='RO:0002434', publications=['PMID:1'])
+    nt = get_transformer(g)
+    nt.save_with_unwind(fresh=True)
+
+    queries = [' '.join(q.split()) for q, p in nt.driver.queries]
+    steps = [
+        next(i for i, q in enumerate(queries) if 'CREATE (n:' in q),
+        queries.index('CREATE CONSTRAINT `named_thing_id` IF NOT EXISTS FOR (n:`named_thing`) REQUIRE n.id IS UNIQUE'),
+        next(i for i, q in enumerate(queries) if 'SET n:`gene`' in q),
+        next(i for i, q in enumerate(queries) if 'CREATE (s)-[r:`interacts_with`]->(o)' in q),
+        queries.index('CREATE CONSTRAINT `gene_id` IF NOT EXISTS FOR (n:`gene`) REQUIRE n.id IS UNIQUE'),
+    ]
+    assert steps == sorted(steps)
+    assert queries.count('CREATE CONSTRAINT `named_thing_id` IF NOT EXISTS FOR (n:`named_thing`) REQUIRE n.id IS UNIQUE') == 1
+    assert not any('MERGE' in q for q in queries)
+    edges = [p['edges'] for q, p in nt.driver.queries if 'edges' in p]
+    assert len(edges) == 1 and len(edges[0]) == 1
+    assert edges[0][0]['publications'] == ['PMID:1']
@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import networkx as nx
+import pytest
+import rdflib
+from rdflib.graph import ModificationException
+
+from kgx.curie_lookup_service import CurieLookupService
+from kgx.ontology_index import OntologyIndex
+from kgx.ontology_registry import OntologyRegistry, get_ontology_registry
+from kgx.utils.graph_utils import get_ancestors
+from kgx.utils.kgx_utils import make_curie
+
+cwd = os.path.abspath(os.path.dirname(__file__))
+resource_dir = os.path.join(cwd, 'resources')
+target_dir = os.path.join(cwd, 'target', 'ontologies')
+
+
+def test_ontology_index():
+    """
+    Build an index for an ontology and check it against the ontology itself.
+    """
+    shutil.rmtree(target_dir, ignore_errors=True)
+    get_ontology_registry().clear()
+    source = os.path.join(resource_dir, 'mody.ttl')
+    index = OntologyIndex.load(source, target_dir, 'MONDO')
+    # the ontology is not kept in memory once its index is written
+    assert source not in get_ontology_registry().graphs
+
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(source, format='turtle')
+    graph = nx.MultiDiGraph()
+    for s, o in rdfgraph.subject_objects(rdflib.RDFS.subClassOf):
+        if isinstance(o, rdflib.BNode):
+            continue
+        graph.add_edge(make_curie(s), make_curie(o), edge_label='subclass_of')
+    for n in graph.nodes():
+        assert index.get_ancestors(n) == get_ancestors(graph, n, ['subclass_of'])
+    assert index.get_label('MONDO:0005151') == 'endocrine_system_disease'
+    assert 'MONDO' in index.get_prefixes()
+
+    # an index that is up to date is reused rather than rebuilt
+    mtime = os.path.getmtime(index.path)
+    assert OntologyIndex.load(source, target_dir, 'MONDO').path == index.path
+    assert os.path.getmtime(index.path) == mtime
+
+    cls = CurieLookupService(ontologies={'MONDO': source}, directory=target_dir)
+    assert cls.get_label('MONDO:0005151') == 'endocrine_system_disease'
+    assert cls.get_ancestors('MONDO:0005151') == index.get_ancestors('MONDO:0005151')
+    assert cls.ontology_graph.nodes['MONDO:0005151']['name'] == 'endocrine_system_disease'
+
+
+def test_selective_loading():
+    """
+    Test that ontologies are only loaded for the prefixes that are looked up.
+    """
+    source = os.path.join(resource_dir, 'mody.ttl')
+    cls = CurieLookupService(ontologies={'MONDO': source, 'HP': os.path.join(resource_dir, 'missing.owl')}, directory=target_dir)
+    assert cls.indexes == {}
+    assert cls.get_label('MONDO:0005151') == 'endocrine_system_disease'
+    assert list(cls.indexes.keys()) == ['MONDO']
+
+    cls.prefetch(['go', 'mondo'])
+    assert list(cls.futures.keys()) == ['MONDO']
+    cls.wait()
+    assert cls.futures['MONDO'].done()
+
+    # prefixes that are not configured are looked up in all ontologies, whether loaded before or not
+    cls = CurieLookupService(ontologies={'MONDO': source}, directory=target_dir)
+    assert cls.get_label('IAO:0000115') == 'definition'
+    assert cls.get_label('FOO:0000001') is None
+    assert list(cls.indexes.keys()) == ['MONDO']
+
+
+def test_ontology_registry():
+    """
+    Test that an ontology is parsed once, shared as a read-only view,
+    and reloaded from its pickle by a new registry.
+    """
+    directory = os.path.join(target_dir, 'registry')
+    shutil.rmtree(directory, ignore_errors=True)
+    source = os.path.join(resource_dir, 'mody.ttl')
+    registry = OntologyRegistry(directory, pickled=True)
+    transient = registry.get_graph(source, keep=False)
+    assert registry.graphs == {}
+    view = registry.get_graph(source)
+    assert view.graphs[0] is not transient.graphs[0]
+    assert registry.get_graph(source).graphs[0] is view.graphs[0]
+    assert registry.get_graph(source, keep=False).graphs[0] is view.graphs[0]
+    assert len(view) == len(rdflib.Graph().parse(source, format='turtle'))
+    with pytest.raises(ModificationException):
+        view.add((rdflib.URIRef('http://example.org/a'), rdflib.RDFS.label, rdflib.Literal('a')))
+
+    pickles = os.listdir(directory)
+    assert len(pickles) == 1 and pickles[0].endswith('.pickle')
+    mtime = os.path.getmtime(os.path.join(directory, pickles[0]))
+    reloaded = OntologyRegistry(directory, pickled=True).get_graph(source)
+    assert os.path.getmtime(os.path.join(directory, pickles[0])) == mtime
+    assert set(reloaded.triples((None, rdflib.RDFS.label, None))) == set(view.triples((None, rdflib.RDFS.label, None)))
+
+    index = registry.get_index(source, directory, 'MONDO')
+    assert registry.get_index(source, directory, 'MONDO') is index
+    registry.clear()
+    assert registry.indexes == {} and registry.graphs == {}
@@ -73,3 +73,209 @@ def test_ontology_load():
     """
     # TODO
     pass
+
+def test_category_index():
+    """
+    Test for inferring categories via the precomputed closure over subClassOf
+    """
+    from kgx.utils.rdf_utils import get_category_index, infer_category
+    input_file = os.path.join(resource_dir, 'mody.ttl')
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(input_file, format='ttl')
+    category_index = get_category_index(rdfgraph)
+    assert get_category_index(rdfgraph) is category_index
+
+    OBO = Namespace('http://purl.obolibrary.org/obo/')
+    assert infer_category(OBO.MONDO_0000001, rdfgraph, category_index) == ['disease']
+    assert infer_category(OBO.MONDO_0005151, rdfgraph, category_index) == ['disease']
+    assert infer_category(OBO.MONDO_0000001, rdfgraph) == ['disease']
+
+
+def test_streaming_save():
+    """
+    Save a graph as gzipped N-Triples and as Turtle, without building an rdflib.Graph,
+    and check both against the triples that rdflib would serialize.
+    """
+    import networkx as nx
+
+    g = nx.MultiDiGraph()
+    g.add_node('HGNC:1', id='HGNC:1', name='gene "one"\nwith a line break', category=['gene'])
+    g.add_node('MONDO:0000001', id='MONDO:0000001', name='disease', category=['disease'])
+    g.add_edge('HGNC:1', 'MONDO:0000001', id='urn:uuid:5a2a1c88-4f7a-4a52-b6f1-1d4b0e3e0001', subject='HGNC:1', object='MONDO:0000001',
+               edge_label='related_to', relation='RO:0002200', provided_by=['source one', 'source two'])
+
+    t = ObanRdfTransformer(g)
+    expected = rdflib.Graph()
+    for triple in t.triples():
+        expected.add(triple)
+
+    for filename, output_format in [('test_streaming.nt.gz', 'nt'), ('test_streaming.ttl', 'turtle')]:
+        output_file = os.path.join(target_dir, filename)
+        t.save(output_file, output_format=output_format)
+        actual = rdflib.Graph()
+        if filename.endswith('.gz'):
+            import gzip
+            with gzip.open(output_file, 'rb') as f:
+                actual.parse(data=f.read(), format=output_format)
+        else:
+            actual.parse(output_file, format=output_format)
+        assert len(actual) == len(expected) == 11
+        assert actual.isomorphic(expected)
+
+
+def test_rdf_writer_type_object():
+    """
+    rdf:type is abbreviated as the predicate of a Turtle statement, but not as its object
+    """
+    from kgx.rdf_writer import RdfWriter
+
+    OBAN = Namespace('http://purl.org/oban/')
+    association = rdflib.URIRef('urn:uuid:1')
+    triples = [
+        (association, RDF.type, OBAN.association),
+        (association, OBAN.association_has_predicate, RDF.type),
+    ]
+    output_file = os.path.join(target_dir, 'test_rdf_writer.ttl')
+    with RdfWriter(output_file, 'turtle', prefixes={'OBAN': str(OBAN), 'rdf': str(RDF)}) as writer:
+        writer.write(triples)
+    actual = rdflib.Graph()
+    actual.parse(output_file, format='turtle')
+    assert set(actual) == set(triples)
+
+
+def test_property_plan():
+    """
+    Check that each attribute is resolved against the biolink model once,
+    and that CURIEs are expanded with the namespace for their prefix.
+    """
+    import networkx as nx
+
+    g = nx.MultiDiGraph()
+    for i in range(3):
+        g.add_node('HGNC:{}'.format(i), id='HGNC:{}'.format(i), name='gene {}'.format(i), category=['gene'])
+    t = ObanRdfTransformer(g)
+    lookups = []
+    get_element = t.toolkit.get_element
+    t.toolkit.get_element = lambda key: lookups.append(key) or get_element(key)
+    triples = list(t.triples())
+    t.toolkit.get_element = get_element
+
+    assert sorted(lookups) == ['category', 'name']
+    assert len(triples) == 6
+    assert t.uriref('HGNC:2') == rdflib.URIRef('http://identifiers.org/hgnc/2')
+    assert t.namespaces['HGNC'] == 'http://identifiers.org/hgnc/'
+    assert t.uriref('FOO:1') == rdflib.URIRef('FOO:1')
+
+
+def test_sharded_save():
+    """
+    Save a graph in shards, and check that it holds the same triples as when saved
+    in one go, with the same association IRIs in every run.
+    """
+    import gzip
+    import networkx as nx
+
+    g = nx.MultiDiGraph()
+    for i in range(20):
+        g.add_node('HGNC:{}'.format(i), id='HGNC:{}'.format(i), name='gene {}'.format(i), category=['gene'])
+    for i in range(20):
+        g.add_edge('HGNC:{}'.format(i), 'HGNC:{}'.format((i + 1) % 20), subject='HGNC:{}'.format(i), object='HGNC:{}'.format((i + 1) % 20),
+                   edge_label='interacts_with', relation='RO:0002434')
+
+    t = ObanRdfTransformer(g)
+    output_file = os.path.join(target_dir, 'test_sharded.nt')
+    t.save(output_file, output_format='nt')
+    expected = rdflib.Graph()
+    expected.parse(output_file, format='nt')
+
+    sharded_file = os.path.join(target_dir, 'test_sharded.nt.gz')
+    t.save(sharded_file, output_format='nt', shards=3)
+    assert not os.path.exists(os.path.join(target_dir, 'test_sharded.part000.nt.gz'))
+    actual = rdflib.Graph()
+    with gzip.open(sharded_file, 'rb') as f:
+        actual.parse(data=f.read(), format='nt')
+    assert len(actual) == len(expected) == 20 * 2 + 20 * 5
+    assert set(actual) == set(expected)
+
+    filenames = t.save_shards(output_file, output_format='nt', shards=3, concatenate=False)
+    assert [os.path.basename(x) for x in filenames] == ['test_sharded.part000.nt', 'test_sharded.part001.nt', 'test_sharded.part002.nt']
+    lines = [line for x in filenames for line in open(x)]
+    assert sorted(lines) == sorted(open(output_file))
+
+
+def test_dereify_associations():
+    """
+    Load OBAN associations, where two associations are for the same edge,
+    and check that their attributes are merged onto that edge.
+    """
+    data = """
+    @prefix OBAN: <http://purl.org/oban/> .
+    @prefix biolink: <http://w3id.org/biolink/vocab/> .
+
+    <urn:uuid:1> a OBAN:association ;
+        OBAN:association_has_subject <http://identifiers.org/hgnc/1> ;
+        OBAN:association_has_predicate <http://purl.obolibrary.org/obo/RO_0002200> ;
+        OBAN:association_has_object <http://purl.obolibrary.org/obo/HP_0000118> ;
+        biolink:description "first" ;
+        biolink:has_evidence <http://purl.obolibrary.org/obo/ECO_0000501> ;
+        biolink:publications <http://www.ncbi.nlm.nih.gov/pubmed/1> .
+
+    <urn:uuid:2> a OBAN:association ;
+        OBAN:association_has_subject <http://identifiers.org/hgnc/1> ;
+        OBAN:association_has_predicate <http://purl.obolibrary.org/obo/RO_0002200> ;
+        OBAN:association_has_object <http://purl.obolibrary.org/obo/HP_0000118> ;
+        biolink:description "second" ;
+        biolink:publications <http://www.ncbi.nlm.nih.gov/pubmed/2> .
+
+    <urn:uuid:3> a OBAN:association ;
+        OBAN:association_has_subject <http://identifiers.org/hgnc/2> ;
+        OBAN:association_has_predicate <http://purl.obolibrary.org/obo/RO_0002200> ;
+        OBAN:association_has_object <http://purl.obolibrary.org/obo/HP_0000118> .
+    """
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(data=data, format='turtle')
+    t = ObanRdfTransformer()
+    t.load_networkx_graph(rdfgraph)
+
+    assert t.graph.number_of_edges() == 2
+    edge = t.graph.edges['HGNC:1', 'HP:0000118', 'HGNC:1-has_phenotype-HP:0000118']
+    assert edge['edge_label'] == 'has_phenotype'
+    assert edge['relation'] == 'RO:0002200'
+    assert str(edge['description']) in ['first', 'second']
+    assert sorted(edge['publications']) == ['PMID:1', 'PMID:2']
+    assert edge['has_evidence'] == 'ECO:0000501'
+    assert t.graph.has_edge('HGNC:2', 'HP:0000118', key='HGNC:2-has_phenotype-HP:0000118')
+
+
+def test_owl_class_expressions():
+    """
+    Load existential restrictions and intersections, both as superclasses and
+    as equivalent classes, along with a restriction that is not supported.
+    """
+    data = """
+    @prefix owl: <http://www.w3.org/2002/07/owl#> .
+    @prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+    @prefix obo: <http://purl.obolibrary.org/obo/> .
+
+    obo:MONDO_0000002 rdfs:subClassOf obo:MONDO_0000001 ,
+        [ a owl:Restriction ; owl:onProperty obo:RO_0002200 ; owl:someValuesFrom obo:HP_0000001 ] .
+    obo:MONDO_0000003 rdfs:subClassOf [ owl:intersectionOf ( obo:MONDO_0000001
+        [ a owl:Restriction ; owl:onProperty obo:RO_0002200 ; owl:someValuesFrom obo:HP_0000002 ] ) ] .
+    obo:MONDO_0000004 owl:equivalentClass [ owl:intersectionOf ( obo:MONDO_0000002
+        [ a owl:Restriction ; owl:onProperty obo:RO_0002200 ; owl:someValuesFrom obo:HP_0000003 ] ) ] .
+    obo:MONDO_0000005 rdfs:subClassOf [ a owl:Restriction ; owl:onProperty obo:RO_0002200 ; owl:allValuesFrom obo:HP_0000004 ] .
+    """
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(data=data, format='turtle')
+    t = RdfOwlTransformer()
+    t.load_networkx_graph(rdfgraph)
+
+    edges = {(u, data['edge_label'], v) for u, v, data in t.graph.edges(data=True)}
+    assert edges == {
+        ('MONDO:0000002', 'subclass_of', 'MONDO:0000001'),
+        ('MONDO:0000002', 'has_phenotype', 'HP:0000001'),
+        ('MONDO:0000003', 'subclass_of', 'MONDO:0000001'),
+        ('MONDO:0000003', 'has_phenotype', 'HP:0000002'),
+        ('MONDO:0000004', 'subclass_of', 'MONDO:0000002'),
+        ('MONDO:0000004', 'has_phenotype', 'HP:0000003'),
+    }
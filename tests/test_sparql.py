@@ -1,4 +1,109 @@
-from kgx import SparqlTransformer, GraphMLTransformer
+import glob
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import rdflib
+from requests import HTTPError
+
+from kgx import SparqlTransformer, GraphMLTransformer, RedSparqlTransformer
+from kgx.sparql_client import NodePropertyCache, SparqlClient, term_value, term_type
+
+cwd = os.path.abspath(os.path.dirname(__file__))
+target_dir = os.path.join(cwd, 'target')
+
+data = """
+@prefix bl: <http://w3id.org/biolink/vocab/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <http://example.org/> .
+@prefix NCBIGene: <http://www.ncbi.nlm.nih.gov/gene/> .
+@prefix OBO: <http://purl.obolibrary.org/obo/> .
+
+ex:a1 a bl:GeneToPhenotypicFeatureAssociation ; bl:subject NCBIGene:1 ; bl:relation OBO:RO_0002200 ; bl:object OBO:HP_1 .
+ex:a2 a bl:GeneToPhenotypicFeatureAssociation ; bl:subject NCBIGene:1 ; bl:relation OBO:RO_0002200 ; bl:object OBO:HP_2 .
+ex:a3 a bl:GeneToPhenotypicFeatureAssociation ; bl:subject NCBIGene:2 ; bl:relation OBO:RO_0002200 ; bl:object OBO:HP_2 .
+ex:a4 a bl:GeneToPhenotypicFeatureAssociation ; bl:subject NCBIGene:3 ; bl:relation OBO:RO_0002200 ; bl:object OBO:HP_3 .
+
+NCBIGene:1 rdfs:label "gene 1" .
+NCBIGene:2 rdfs:label "gene 2" .
+NCBIGene:3 rdfs:label "gene 3" .
+OBO:HP_1 rdfs:label "phenotype 1" .
+OBO:HP_2 rdfs:label "phenotype 2" .
+OBO:HP_3 rdfs:label "phenotype 3" .
+"""
+
+
+def to_tsv(result: rdflib.query.Result) -> bytes:
+    """
+    Serialize SELECT results as SPARQL TSV, which rdflib has no serializer for.
+    """
+    def term(x):
+        if x is None:
+            return ''
+        if isinstance(x, rdflib.Literal):
+            value = str(x)
+            for c, escaped in [('\\', '\\\\'), ('"', '\\"'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r')]:
+                value = value.replace(c, escaped)
+            return '"{}"'.format(value) + ('@{}'.format(x.language) if x.language else '')
+        return x.n3()
+    lines = ['\t'.join('?{}'.format(x) for x in result.vars)]
+    lines.extend('\t'.join(term(x) for x in row) for row in result)
+    return '\n'.join(lines).encode('utf-8') + b'\n'
+
+
+def start_sparql_server(rdfgraph: rdflib.Graph) -> ThreadingHTTPServer:
+    """
+    Start a SPARQL endpoint backed by an rdflib Graph, on a free local port.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self.respond(parse_qs(urlparse(self.path).query)['query'][0])
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8')
+            self.respond(body)
+
+        def respond(self, query):
+            with server.lock:
+                server.queries.append(query)
+                server.ports.add(self.client_address[1])
+                if server.fail(query):
+                    self.send_error(503)
+                    return
+                if server.tsv and 'text/tab-separated-values' in self.headers['Accept']:
+                    content_type = 'text/tab-separated-values'
+                    result = to_tsv(rdfgraph.query(query))
+                else:
+                    content_type = 'application/sparql-results+json'
+                    result = rdfgraph.query(query).serialize(format='json')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(result)))
+            self.end_headers()
+            self.wfile.write(result)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.queries = []
+    server.ports = set()
+    server.fail = lambda query: False
+    server.tsv = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class PagedTransformer(RedSparqlTransformer):
+    PAGE_SIZE = 3
+    NODE_BATCH_SIZE = 2
+
 
 def test_dummy():
     pass
@@ -11,3 +116,121 @@ def TODO_test_load():
     t.set_filter('predicate', 'foo')
     t.set_filter('subject_category', 'gene')
     t.load_edges()
+
+def test_red_sparql_load():
+    """
+    load pages of triples and node properties concurrently from a local SPARQL endpoint
+    """
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(data=data, format='turtle')
+    server = start_sparql_server(rdfgraph)
+
+    t = PagedTransformer(url='http://127.0.0.1:{}/sparql'.format(server.server_address[1]), workers=3, node_cache=NodePropertyCache())
+    t.load_networkx_graph(predicates={'http://w3id.org/biolink/vocab/GeneToPhenotypicFeatureAssociation'})
+    t.client.close()
+    server.shutdown()
+
+    assert t.graph.number_of_nodes() == 6
+    assert t.graph.number_of_edges() == 4
+    assert t.graph.has_edge('NCBIGene:1', 'HP:2')
+    assert t.graph.nodes['NCBIGene:2']['name'] == 'gene 2'
+    assert t.graph.nodes['HP:3']['name'] == 'phenotype 3'
+    # 1 count query, 6 pages of triples and node properties in groups of 2
+    assert len([x for x in server.queries if 'OFFSET' in x]) == 6
+    # connections are reused
+    assert len(server.ports) <= 3
+
+def test_node_property_cache():
+    """
+    fetch properties only once per node, across pages and across runs
+    """
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(data=data, format='turtle')
+    server = start_sparql_server(rdfgraph)
+    url = 'http://127.0.0.1:{}/sparql'.format(server.server_address[1])
+    path = os.path.join(target_dir, 'node_properties')
+    os.makedirs(target_dir, exist_ok=True)
+    for filename in glob.glob('{}*'.format(path)):
+        os.remove(filename)
+
+    cache = NodePropertyCache(path=path)
+    t = PagedTransformer(url=url, node_cache=cache)
+    t.load_networkx_graph(predicates={'http://w3id.org/biolink/vocab/GeneToPhenotypicFeatureAssociation'})
+    stats = cache.stats()
+    assert stats['misses'] == 6
+    assert stats['hits'] > 0
+    fetched = [x for x in server.queries if 'VALUES' in x]
+    assert sum(x.split('VALUES')[1].count('<http') for x in fetched) == 6
+    cache.close()
+
+    # a restart with the persistent cache does not fetch any node again
+    server.queries.clear()
+    cache = NodePropertyCache(path=path)
+    t2 = PagedTransformer(url=url, node_cache=cache)
+    t2.load_networkx_graph(predicates={'http://w3id.org/biolink/vocab/GeneToPhenotypicFeatureAssociation'})
+    assert not [x for x in server.queries if 'VALUES' in x]
+    assert cache.stats()['persistent_hits'] == 6
+    assert dict(t2.graph.nodes(data='name')) == dict(t.graph.nodes(data='name'))
+    cache.close()
+    t.client.close()
+    t2.client.close()
+    server.shutdown()
+
+def test_red_sparql_resume():
+    """
+    resume an interrupted load from its checkpoint
+    """
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(data=data, format='turtle')
+    server = start_sparql_server(rdfgraph)
+    url = 'http://127.0.0.1:{}/sparql'.format(server.server_address[1])
+    predicates = {'http://w3id.org/biolink/vocab/GeneToPhenotypicFeatureAssociation'}
+    checkpoint = os.path.join(target_dir, 'sparql_checkpoint.jsonl')
+
+    # the endpoint goes away after the first pages
+    server.fail = lambda query: 'OFFSET 9' in query
+    t = PagedTransformer(url=url, workers=1, node_cache=NodePropertyCache())
+    with pytest.raises(HTTPError):
+        t.load_networkx_graph(predicates=predicates, checkpoint=checkpoint)
+    assert 0 < t.graph.number_of_edges() < 4
+
+    server.fail = lambda query: False
+    server.queries.clear()
+    t2 = PagedTransformer(url=url, workers=1, node_cache=NodePropertyCache())
+    t2.load_networkx_graph(predicates=predicates, checkpoint=checkpoint, resume=True)
+    assert [x for x in server.queries if 'OFFSET 0' in x] == []
+    assert t2.graph.number_of_edges() == 4
+    assert t2.graph.nodes['HP:1']['name'] == 'phenotype 1'
+    # the checkpoint of a finished load is removed
+    assert not os.path.exists(checkpoint)
+    t.client.close()
+    t2.client.close()
+    server.shutdown()
+
+def test_sparql_tsv():
+    """
+    stream results as TSV, or convert JSON results to the same rows
+    """
+    rdfgraph = rdflib.Graph()
+    rdfgraph.parse(data="""
+    @prefix ex: <http://example.org/> .
+    ex:a ex:name "tab\\there \\"quoted\\" \\\\ and\\nnewline"@en ;
+         ex:count 3 ;
+         ex:knows [ ex:name "anonymous" ] .
+    """, format='turtle')
+    server = start_sparql_server(rdfgraph)
+    client = SparqlClient('http://127.0.0.1:{}/sparql'.format(server.server_address[1]))
+    query = 'SELECT ?s ?p ?o WHERE { ?s ?p ?o } ORDER BY ?p'
+
+    rows = {}
+    for tsv in [True, False]:
+        server.tsv = tsv
+        rows[tsv] = [(term_type(s), term_value(p), term_type(o), term_value(o)) for o, s, p in client.select(query, ['o', 's', 'p'])]
+    assert rows[True] == rows[False]
+    values = {(p, o_type): o for s_type, p, o_type, o in rows[True] if s_type == 'uri'}
+    assert values[('http://example.org/name', 'literal')] == 'tab\there "quoted" \\ and\nnewline'
+    assert values[('http://example.org/count', 'literal')] == '3'
+    assert ('http://example.org/knows', 'bnode') in values
+    assert ('bnode', 'http://example.org/name', 'literal', 'anonymous') in rows[True]
+    client.close()
+    server.shutdown()
@@ -0,0 +1,54 @@
+import networkx as nx
+
+from kgx import Transformer
+
+
+def get_graph():
+    graph = nx.MultiDiGraph()
+    graph.add_node('HGNC:11603', id='HGNC:11603', category=['gene'])
+    graph.add_node('HP:0000118', id='HP:0000118', category=['phenotypic_abnormality'])
+    graph.add_node('SO:0000704', id='SO:0000704', name='gene', category=['gene'])
+    graph.add_node('SO:0000673', id='SO:0000673', category=['named_thing'])
+    graph.add_edge('SO:0000673', 'SO:0000704', edge_label='subclass_of')
+    graph.add_node('X:0000001', id='X:0000001')
+    graph.add_edge('X:0000001', 'SO:0000673', edge_label='subclass_of')
+    return graph
+
+def test_categorize():
+    """
+    Test for categorizing nodes, with and without worker processes
+    """
+    t = Transformer(get_graph())
+    t.categorize()
+    assert t.graph.nodes['HGNC:11603']['category'] == ['gene']
+    assert t.graph.nodes['HGNC:11603']['_old_category'] == ['gene']
+    assert t.graph.nodes['HP:0000118']['category'] == ['phenotypic_feature']
+    assert 'gene' in t.graph.nodes['X:0000001']['category']
+    assert '_old_category' not in t.graph.nodes['X:0000001']
+
+    t2 = Transformer(get_graph())
+    t2.categorize(workers=2)
+    for n, data in t.graph.nodes(data=True):
+        assert sorted(t2.graph.nodes[n]['category']) == sorted(data['category'])
+
+
+def test_set_edge_ids():
+    """
+    Test that edges get identifiers from their content, that do not depend
+    on attributes that do not identify them
+    """
+    t = Transformer(get_graph())
+    t.graph.add_edge('HGNC:11603', 'HP:0000118', edge_label='has_phenotype', relation='RO:0002200', provided_by=['a'])
+    t.graph.add_edge('HGNC:11603', 'HP:0000118', edge_label='has_phenotype', relation='RO:0002200', negated=True)
+    t.graph.add_edge('X:0000001', 'SO:0000704', id='X:1', edge_label='subclass_of')
+    assert t.set_edge_ids() == 4
+    ids = {(u, v, k): data['id'] for u, v, k, data in t.graph.edges(keys=True, data=True)}
+    assert ids[('X:0000001', 'SO:0000704', 0)] == 'X:1'
+    assert ids[('HGNC:11603', 'HP:0000118', 0)] != ids[('HGNC:11603', 'HP:0000118', 1)]
+    assert all(x.startswith('urn:uuid:') for x in ids.values() if x != 'X:1')
+
+    t2 = Transformer(get_graph())
+    t2.graph.add_edge('HGNC:11603', 'HP:0000118', edge_label='has_phenotype', relation='RO:0002200', provided_by=['b'])
+    t2.set_edge_ids()
+    assert t2.graph.edges['HGNC:11603', 'HP:0000118', 0]['id'] == ids[('HGNC:11603', 'HP:0000118', 0)]
+    assert t2.graph.edges['SO:0000673', 'SO:0000704', 0]['id'] == ids[('SO:0000673', 'SO:0000704', 0)]